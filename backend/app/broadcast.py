@@ -0,0 +1,262 @@
+"""Fan-out of committed meal changes to Server-Sent Events streams.
+
+Each open ``GET /api/meals/stream`` is a subscriber with an asyncio queue
+on the event loop, so idle connections cost a queue and a suspended
+coroutine, never a thread. Write paths publish from threadpool threads;
+events are handed to the loop with ``call_soon_threadsafe`` and filtered
+by each subscriber's date range first. A subscriber that falls more than
+MEAL_STREAM_QUEUE_SIZE batches behind has its backlog dropped and gets a
+``reset`` event telling the client to refetch.
+
+Event ids carry a per-process token and a sequence number. A client that
+reconnects with ``Last-Event-ID`` is replayed the events it missed from the
+last MEAL_STREAM_REPLAY changes, or told to reset when they are gone, e.g.
+after a restart. With several workers a stream gets the events of its own
+worker's writes. Writes from other workers or tools are found by the
+external write watcher (see ``app.watcher``). Streams whose range holds a
+day it finds get a ``reset``. While streams are open the app runs the
+watcher every MEAL_STREAM_WATCH_INTERVAL seconds.
+
+uvicorn waits for open connections to finish before it runs the lifespan
+shutdown, and a stream never finishes on its own. The app therefore ends
+every stream as soon as the server receives SIGINT or SIGTERM.
+"""
+import asyncio
+import json
+import os
+import secrets
+import signal
+import threading
+from collections import deque
+from collections.abc import AsyncGenerator
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import date
+from typing import Self
+
+from . import changes
+from .changes import MealChange
+
+# Sent when a subscriber has missed events; the client should refetch
+RESET = "reset"
+
+_CLOSED = object()
+
+
+@dataclass(frozen=True, slots=True)
+class StreamEvent:
+    """One SSE message: a meal change, or a reset without data."""
+    id: str
+    event: str
+    data: str = ""
+
+    def encode(self) -> bytes:
+        lines = [f"id: {self.id}", f"event: {self.event}"]
+        if self.data:
+            lines.append(f"data: {self.data}")
+        return ("\n".join(lines) + "\n\n").encode()
+
+
+class _Subscriber:
+    __slots__ = ("queue", "loop", "start", "end")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int, start, end):
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.loop = loop
+        self.start: date | None = start
+        self.end: date | None = end
+
+    def wants(self, change: MealChange) -> bool:
+        return self.covers(change.date)
+
+    def covers(self, day: date) -> bool:
+        return (self.start is None or day >= self.start) and (
+            self.end is None or day <= self.end
+        )
+
+    def offer(self, item) -> None:
+        """Queue a batch of events, or a reset if the subscriber is too far behind."""
+        if item is not _CLOSED and not self.queue.full():
+            self.queue.put_nowait(item)
+            return
+        # Nothing queued matters any more: the client refetches or the stream ends
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item if item is _CLOSED else RESET)
+
+
+class ChangeBroadcaster:
+    """Delivers change-feed batches to SSE subscribers, filtered by date range."""
+
+    def __init__(
+        self,
+        queue_size: int = 100,
+        replay: int = 1000,
+        heartbeat: float = 15.0,
+        watch_interval: float = 1.0,
+    ):
+        self.queue_size = queue_size
+        # Seconds between keep-alive comments, which also reveal closed connections
+        self.heartbeat = heartbeat
+        # Seconds between checks for other workers' writes while streams are open
+        self.watch_interval = watch_interval
+        self.token = secrets.token_hex(4)
+        self._sequence = 0
+        self._recent: deque[tuple[int, MealChange]] = deque(maxlen=replay)
+        self._subscribers: set[_Subscriber] = set()
+        self._lock = threading.Lock()
+        self.resets = 0
+        # Set once the server is stopping; new streams end right away
+        self.stopping = False
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> Self:
+        """Build a broadcaster from the MEAL_STREAM_* environment variables."""
+        return cls(
+            queue_size=int(environ.get("MEAL_STREAM_QUEUE_SIZE", "100")),
+            replay=int(environ.get("MEAL_STREAM_REPLAY", "1000")),
+            heartbeat=float(environ.get("MEAL_STREAM_HEARTBEAT", "15")),
+            watch_interval=float(environ.get("MEAL_STREAM_WATCH_INTERVAL", "1")),
+        )
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, batch: list[MealChange]) -> None:
+        """Change-feed subscriber: number the changes and pass them on."""
+        with self._lock:
+            numbered = []
+            for change in batch:
+                self._sequence += 1
+                numbered.append((self._sequence, change))
+            self._recent.extend(numbered)
+            # Scheduled under the lock, so every queue sees batches in order
+            for subscriber in self._subscribers:
+                events = [
+                    self._event(sequence, change)
+                    for sequence, change in numbered
+                    if subscriber.wants(change)
+                ]
+                if events:
+                    _call_soon(subscriber, subscriber.offer, events)
+
+    def reset_days(self, days: set[date]) -> None:
+        """Send a reset to the streams whose range holds any of `days`.
+
+        For writes that never passed through this process's change feed,
+        e.g. another worker's; there is no event to send, only a refetch.
+        """
+        with self._lock:
+            for subscriber in self._subscribers:
+                if any(subscriber.covers(day) for day in days):
+                    _call_soon(subscriber, subscriber.offer, RESET)
+
+    async def stream(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        last_event_id: str | None = None,
+    ) -> AsyncGenerator[bytes]:
+        """SSE frames for the changes in a date range, until closed or disconnected."""
+        if self.stopping:
+            return
+        subscriber = _Subscriber(asyncio.get_running_loop(), self.queue_size, start, end)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            replay = self._replay(subscriber, last_event_id)
+        try:
+            # Tell EventSource how soon to reconnect, in milliseconds
+            yield b"retry: 3000\n\n"
+            if replay is not None:
+                yield b"".join(event.encode() for event in replay)
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if item is _CLOSED:
+                    return
+                if item == RESET:
+                    self.resets += 1
+                    yield self._reset().encode()
+                    continue
+                yield b"".join(event.encode() for event in item)
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown, so connections don't hold it up."""
+        with self._lock:
+            for subscriber in self._subscribers:
+                _call_soon(subscriber, subscriber.offer, _CLOSED)
+
+    def shutdown(self) -> None:
+        """End every open stream and every stream opened from now on."""
+        self.stopping = True
+        self.close()
+
+    def close_on_exit_signals(self) -> None:
+        """Shut the streams down when SIGINT or SIGTERM arrives, then let the
+        server's own handlers run. Call from the running event loop.
+
+        Does nothing off the main thread, where signals can't be handled,
+        e.g. under the test client.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(signum)
+            if not callable(previous):
+                continue
+
+            def handler(sig, frame, previous=previous):
+                # The interrupted code may hold the lock, so shut down from the loop
+                loop.call_soon_threadsafe(self.shutdown)
+                previous(sig, frame)
+
+            signal.signal(signum, handler)
+
+    def _replay(self, subscriber: _Subscriber, last_event_id: str | None) -> list | None:
+        """The events after last_event_id, or a lone reset if they are no longer kept."""
+        if last_event_id is None:
+            return None
+        token, _, sequence = last_event_id.partition("-")
+        oldest = self._recent[0][0] if self._recent else self._sequence + 1
+        if (
+            token != self.token
+            or not sequence.isdigit()
+            or not oldest - 1 <= int(sequence) <= self._sequence
+        ):
+            return [self._reset()]
+        return [
+            self._event(number, change)
+            for number, change in self._recent
+            if number > int(sequence) and subscriber.wants(change)
+        ]
+
+    def _event(self, sequence: int, change: MealChange) -> StreamEvent:
+        return StreamEvent(
+            id=f"{self.token}-{sequence}",
+            event=change.action,
+            data=json.dumps(
+                {"id": change.id, "date": change.date.isoformat(), "meal_type": change.meal_type},
+                separators=(",", ":"),
+            ),
+        )
+
+    def _reset(self) -> StreamEvent:
+        return StreamEvent(id=f"{self.token}-{self._sequence}", event=RESET)
+
+
+def _call_soon(subscriber: _Subscriber, callback, item) -> None:
+    # RuntimeError: its event loop has closed; the stream's cleanup removes it
+    with suppress(RuntimeError):
+        subscriber.loop.call_soon_threadsafe(callback, item)
+
+
+change_broadcaster = ChangeBroadcaster.from_env()
+changes.subscribe(change_broadcaster.publish)
@@ -0,0 +1,145 @@
+"""Bounded LRU cache of serialized date-range responses.
+
+Entries are keyed by ``(start_date, end_date)`` and evicted by entry count,
+total size and age. Committed meal changes invalidate only the cached
+ranges that contain a changed date.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Self
+
+from . import changes
+
+RangeKey = tuple[date, date]
+
+
+@dataclass(slots=True)
+class _Entry:
+    etag: str
+    body: bytes
+    expires_at: float
+
+
+class RangeCache:
+    """Thread-safe LRU cache of (ETag, JSON body) pairs per date range."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: float = 300.0,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[RangeKey, _Entry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a read that raced a write is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> Self:
+        """Build a cache from the MEAL_CACHE_* environment variables."""
+        return cls(
+            enabled=environ.get("MEAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            max_entries=int(environ.get("MEAL_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(environ.get("MEAL_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            ttl=float(environ.get("MEAL_CACHE_TTL", "300")),
+        )
+
+    def get(self, key: RangeKey) -> tuple[str, bytes] | None:
+        """Return the cached (etag, body) for a range, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.etag, entry.body
+
+    def put(self, key: RangeKey, etag: str, body: bytes, generation: int) -> None:
+        """Store a response read while the cache was at `generation`.
+
+        The entry is dropped if any invalidation happened since, because the
+        response may predate that write.
+        """
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(etag, body, time.monotonic() + self.ttl)
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_dates(self, dates: set[date]) -> None:
+        """Drop every cached range that contains one of the dates."""
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key for key in self._entries
+                if any(key[0] <= day <= key[1] for day in dates)
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def invalidate_changes(self, meal_changes: list[changes.MealChange]) -> None:
+        """Change-feed subscriber: invalidate the ranges touched by the changes."""
+        self.invalidate_dates({change.date for change in meal_changes})
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Counters and current occupancy."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: RangeKey) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+
+meal_cache = RangeCache.from_env()
+changes.subscribe(meal_cache.invalidate_changes)
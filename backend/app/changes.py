@@ -0,0 +1,59 @@
+"""In-process feed of committed meal changes.
+
+Write paths in ``crud`` publish once their transaction has committed, so
+subscribers (caches, indexes, push channels) see exactly the meals that
+changed without polling the database.
+"""
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+ChangeAction = Literal["created", "updated", "deleted"]
+
+
+@dataclass(frozen=True, slots=True)
+class MealChange:
+    """A committed change to one meal.
+
+    ``ingredients`` are the meal's ingredients after the change, empty for deletes.
+    """
+    action: ChangeAction
+    id: int
+    date: date
+    meal_type: str
+    ingredients: tuple[str, ...] = ()
+
+
+Subscriber = Callable[[list[MealChange]], None]
+
+_subscribers: list[Subscriber] = []
+
+
+def subscribe(callback: Subscriber) -> Subscriber:
+    """Register a callback that receives every published batch of changes."""
+    _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback: Subscriber) -> None:
+    """Remove a callback registered with subscribe."""
+    _subscribers.remove(callback)
+
+
+def publish(changes: list[MealChange]) -> None:
+    """Deliver committed changes to all subscribers.
+
+    The data is already committed, so a failing subscriber is logged and
+    must not turn the request into an error.
+    """
+    if not changes:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(changes)
+        except Exception:
+            logger.exception("Meal change subscriber %r failed", callback)
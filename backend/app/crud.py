@@ -0,0 +1,946 @@
+"""Meal queries and mutations shared by the sync and async routers.
+
+Every function takes a synchronous ``Session`` as its first argument; the
+async router runs them on an ``AsyncSession`` through ``run_sync``.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import zlib
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, timedelta
+from typing import Any, BinaryIO, TextIO
+
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import String, and_, func, select, text, tuple_, type_coerce
+from sqlalchemy.dialects.sqlite import Insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from . import changes
+from .cache import meal_cache
+from .changes import ChangeAction, MealChange
+from .etag import etag_matches, weak_etag
+from .models import Meal, MealDayVersion, MealIngredient, MealNameStats, meals_fts
+from .pagination import decode_cursor, encode_cursor
+from .schemas import (
+    MAX_IMPORT_ERRORS,
+    MAX_UNPAGINATED_DAYS,
+    ConflictPolicy,
+    FileFormat,
+    ImportConflictPolicy,
+    MealBatchCreate,
+    MealBatchItemResult,
+    MealBatchResponse,
+    MealCopy,
+    MealCopyMany,
+    MealCopyRange,
+    MealCopyResult,
+    MealCreate,
+    MealImportError,
+    MealImportResult,
+    MealPage,
+    MealResponse,
+    MealStats,
+    MealStatsSort,
+    MealType,
+    MealUpdate,
+    ShoppingListItem,
+)
+from .watcher import write_watcher
+
+try:
+    import orjson
+except ImportError:  # optional, pip install ".[fast]"
+    orjson = None
+
+# Build range responses from Core rows instead of ORM objects + Pydantic
+FAST_SERIALIZATION = os.getenv("MEAL_FAST_SERIALIZATION", "true").lower() in ("1", "true", "yes")
+
+_MEAL_LIST = TypeAdapter(list[MealResponse])
+
+# A write that flushes but leaves committing to its caller, see commit_staged
+Stage = Callable[..., tuple[Any, list[MealChange]]]
+
+# What _change needs from RETURNING rows of bulk writes
+_CHANGE_COLUMNS = (Meal.id, Meal.date, Meal.meal_type, Meal.ingredients)
+
+# Rows fetched from SQLite and encoded per streamed chunk of an export
+EXPORT_BATCH_SIZE = 1000
+
+# Rows validated and written per transaction of an import
+IMPORT_CHUNK_SIZE = 500
+
+_EXPORT_COLUMNS = ("id", "date", "meal_type", "name", "ingredients")
+_EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def search_meals_by_ingredient(
+    db: Session, ingredient: str, limit: int = 10, cursor: str | None = None
+) -> MealPage:
+    """One page of meals containing an ingredient (exact match, case-insensitive), latest first."""
+    # Seek on (ingredient_norm, date, meal_id) of the trigger-maintained
+    # ingredient table, so every page reads only its own rows in index order
+    stmt = (
+        select(Meal)
+        .join(MealIngredient, MealIngredient.meal_id == Meal.id)
+        .where(MealIngredient.ingredient_norm == func.lower(ingredient.strip()))
+        .order_by(MealIngredient.date.desc(), MealIngredient.meal_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        day, meal_id = _decode_position(cursor, date, int)
+        stmt = stmt.where(
+            tuple_(MealIngredient.date, MealIngredient.meal_id) < tuple_(day, meal_id)
+        )
+    meals = db.scalars(stmt).all()
+
+    if len(meals) <= limit:
+        return MealPage(items=meals)
+    last = meals[limit - 1]
+    next_cursor = encode_cursor([last.date.isoformat(), last.id])
+    return MealPage(items=meals[:limit], next_cursor=next_cursor)
+
+
+def search_meals_by_text(db: Session, q: str, limit: int, cursor: str | None) -> MealPage:
+    """One page of full-text matches, every word matched as a prefix."""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return MealPage(items=[])
+    match = " ".join(f'"{term}"*' for term in terms)
+
+    offset = 0
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if len(position) != 1 or not isinstance(position[0], int) or position[0] < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        offset = position[0]
+
+    # bm25 ranks lower-is-better; a hit in the name weighs more than in ingredients
+    stmt = (
+        select(Meal)
+        .join(meals_fts, meals_fts.c.rowid == Meal.id)
+        .where(text("meals_fts MATCH :match"))
+        .order_by(text("bm25(meals_fts, 10.0, 1.0)"), Meal.date.desc(), Meal.id.desc())
+        .limit(limit + 1)
+        .offset(offset)
+    )
+    meals = db.scalars(stmt, {"match": match}).all()
+
+    next_cursor = encode_cursor([offset + limit]) if len(meals) > limit else None
+    return MealPage(items=meals[:limit], next_cursor=next_cursor)
+
+
+def get_meals(db: Session, start_date: date, end_date: date) -> list[Meal]:
+    """All meals within a date range."""
+    meals = db.query(Meal).filter(
+        Meal.date >= start_date,
+        Meal.date <= end_date
+    ).order_by(Meal.date, Meal.meal_type).all()
+    return meals
+
+
+def get_meals_page(
+    db: Session, start_date: date, end_date: date, limit: int, cursor: str | None
+) -> MealPage:
+    """One page of a date range, ordered by date, meal type and id.
+
+    Pages are found by seeking past the last returned row on the
+    (date, meal_type) unique index, which SQLite extends with the rowid,
+    so a deep page costs the same as the first one.
+    """
+    stmt = (
+        select(Meal)
+        .where(Meal.date.between(start_date, end_date))
+        .order_by(Meal.date, Meal.meal_type, Meal.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        day, meal_type, meal_id = _decode_position(cursor, date, str, int)
+        stmt = stmt.where(
+            tuple_(Meal.date, Meal.meal_type, Meal.id) > tuple_(day, meal_type, meal_id)
+        )
+    meals = db.scalars(stmt).all()
+
+    if len(meals) <= limit:
+        return MealPage(items=meals)
+    last = meals[limit - 1]
+    next_cursor = encode_cursor([last.date.isoformat(), last.meal_type, last.id])
+    return MealPage(items=meals[:limit], next_cursor=next_cursor)
+
+
+def get_meals_response(
+    db: Session, start_date: date, end_date: date, if_none_match: str | None
+) -> Response:
+    """JSON response for a date range, served from the range cache when possible.
+
+    Carries a weak ETag; a matching If-None-Match returns 304 without
+    loading any meal rows. Ranges longer than MAX_UNPAGINATED_DAYS have to
+    be read page by page through get_meals_page.
+    """
+    if end_date - start_date >= timedelta(days=MAX_UNPAGINATED_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ranges over {MAX_UNPAGINATED_DAYS} days must be paginated with limit",
+        )
+    # Taken before anything is read, so a write committed from here on keeps
+    # the rows read below out of the cache
+    generation = meal_cache.generation
+    # Another worker may have written to a cached range
+    write_watcher.check(db)
+    key = (start_date, end_date)
+    cached = meal_cache.get(key)
+    if cached is None:
+        # Read the version before the rows so the ETag is never newer than the body
+        etag = weak_etag(get_meals_version(db, start_date, end_date))
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=_range_headers(etag))
+        body = (
+            get_meals_json(db, start_date, end_date)
+            if FAST_SERIALIZATION
+            else _MEAL_LIST.dump_json(_MEAL_LIST.validate_python(
+                get_meals(db, start_date, end_date), from_attributes=True
+            ))
+        )
+        meal_cache.put(key, etag, body, generation)
+    else:
+        etag, body = cached
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=_range_headers(etag))
+    return Response(content=body, media_type="application/json", headers=_range_headers(etag))
+
+
+def get_meals_json(db: Session, start_date: date, end_date: date) -> bytes:
+    """Serialize a date range straight from Core rows.
+
+    Produces the same bytes as dumping ``list[MealResponse]`` but skips ORM
+    hydration and per-object validation; rows were validated when written.
+    Dates are read as their stored ISO text instead of being parsed and
+    formatted again.
+    """
+    meals = Meal.__table__
+    rows = db.execute(
+        select(
+            meals.c.name,
+            meals.c.ingredients,
+            meals.c.id,
+            type_coerce(meals.c.date, String),
+            meals.c.meal_type,
+        )
+        .where(meals.c.date.between(start_date, end_date))
+        .order_by(meals.c.date, meals.c.meal_type)
+    )
+    return _dump_json([
+        {
+            "name": name,
+            "ingredients": ingredients or [],
+            "id": meal_id,
+            "date": day,
+            "meal_type": meal_type,
+        }
+        for name, ingredients, meal_id, day, meal_type in rows
+    ])
+
+
+def export_meals(
+    db: Session,
+    export_format: FileFormat,
+    start_date: date | None,
+    end_date: date | None,
+    compress: bool,
+) -> StreamingResponse:
+    """Stream every meal, optionally within date bounds, as NDJSON or CSV.
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time from a server-side cursor
+    and each batch is encoded (and gzipped) into one chunk, so memory stays
+    flat however long the history is. Ingredients are a JSON array in both
+    formats so the export round-trips.
+    """
+    meals = Meal.__table__
+    stmt = (
+        select(
+            meals.c.id,
+            type_coerce(meals.c.date, String),
+            meals.c.meal_type,
+            meals.c.name,
+            meals.c.ingredients,
+        )
+        .order_by(meals.c.date, meals.c.meal_type)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if start_date is not None:
+        stmt = stmt.where(meals.c.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(meals.c.date <= end_date)
+
+    encode = _ndjson_chunks if export_format == "ndjson" else _csv_chunks
+    chunks = encode(db.execute(stmt).partitions())
+    filename = f"meals.{export_format}"
+    if compress:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress else _EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def get_shopping_list(db: Session, start_date: date, end_date: date) -> list[ShoppingListItem]:
+    """Every normalized ingredient of a date range with its meals, in alphabetical order.
+
+    Grouped in SQLite over the trigger-maintained ingredient table, so no
+    ingredients arrays are decoded in Python.
+    """
+    # Ordered rows feed the aggregates; the ORDER BY keeps SQLite from flattening it away
+    uses = (
+        select(
+            MealIngredient.ingredient_norm,
+            Meal.id,
+            Meal.date,
+            Meal.meal_type,
+            Meal.name,
+        )
+        .join(Meal, Meal.id == MealIngredient.meal_id)
+        .where(Meal.date.between(start_date, end_date))
+        .order_by(MealIngredient.ingredient_norm, Meal.date, Meal.meal_type)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            uses.c.ingredient_norm,
+            func.count(),
+            func.json_group_array(uses.c.date.distinct()),
+            func.json_group_array(func.json_object(
+                "id", uses.c.id,
+                "date", uses.c.date,
+                "meal_type", uses.c.meal_type,
+                "name", uses.c.name,
+            )),
+        )
+        .group_by(uses.c.ingredient_norm)
+        .order_by(uses.c.ingredient_norm)
+    )
+    return [
+        ShoppingListItem(
+            ingredient=ingredient,
+            count=count,
+            dates=json.loads(dates),
+            meals=json.loads(meals),
+        )
+        for ingredient, count, dates, meals in rows
+    ]
+
+
+def get_meal_stats(
+    db: Session,
+    sort: MealStatsSort,
+    name: str | None,
+    not_since: date | None,
+    limit: int,
+) -> list[MealStats]:
+    """Meals by normalized name from the trigger-maintained summary table.
+
+    ``name`` looks up one meal; ``not_since`` keeps meals last planned
+    before that date. The meals table itself is never read.
+    """
+    stmt = select(MealNameStats).limit(limit)
+    if name is not None:
+        stmt = stmt.where(MealNameStats.name_norm == func.lower(func.trim(name)))
+    if not_since is not None:
+        stmt = stmt.where(MealNameStats.last_date < not_since)
+    if sort == "count":
+        stmt = stmt.order_by(MealNameStats.count.desc(), MealNameStats.name_norm)
+    elif sort == "last_date":
+        stmt = stmt.order_by(MealNameStats.last_date.desc(), MealNameStats.name_norm)
+    else:
+        stmt = stmt.order_by(MealNameStats.name_norm)
+    return [MealStats.model_validate(row) for row in db.scalars(stmt)]
+
+
+def get_meals_version(db: Session, start_date: date, end_date: date) -> int:
+    """Version of a date range; changes whenever any meal in the range changes.
+
+    Reads only the per-day version table, no meal rows are loaded.
+    """
+    version = db.scalar(
+        select(func.max(MealDayVersion.version)).where(
+            MealDayVersion.date.between(start_date, end_date)
+        )
+    )
+    return version or 0
+
+
+def create_meal(db: Session, meal: MealCreate) -> Meal:
+    """Create a new meal, 409 if its slot is taken."""
+    return commit_staged(db, stage_create_meal, meal)
+
+
+def stage_create_meal(db: Session, meal: MealCreate) -> tuple[Meal, list[MealChange]]:
+    db_meal = Meal(
+        date=meal.date,
+        meal_type=meal.meal_type,
+        name=meal.name,
+        ingredients=meal.ingredients
+    )
+    try:
+        db.add(db_meal)
+        db.flush()
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A meal already exists for {meal.date} - {meal.meal_type}"
+        ) from None
+    db.refresh(db_meal)
+    return db_meal, [_change("created", db_meal)]
+
+
+def create_meals_batch(
+    db: Session, batch: MealBatchCreate
+) -> MealBatchResponse | JSONResponse:
+    """Create many meals in a single transaction with per-item results."""
+    results: list[MealBatchItemResult | None] = [None] * len(batch.items)
+    pending: dict[tuple[date, str], tuple[int, MealCreate]] = {}
+    for index, item in enumerate(batch.items):
+        try:
+            meal = MealCreate.model_validate(item)
+        except ValidationError as exc:
+            results[index] = MealBatchItemResult(
+                index=index, status="invalid", detail=_describe_errors(exc)
+            )
+            continue
+        slot = (meal.date, meal.meal_type)
+        if slot in pending:
+            results[index] = MealBatchItemResult(
+                index=index,
+                status="conflict",
+                detail=f"Duplicate of item {pending[slot][0]} for {meal.date} - {meal.meal_type}",
+            )
+            continue
+        pending[slot] = (index, meal)
+
+    if batch.on_conflict == "fail" and any(result is not None for result in results):
+        response = _batch_response(results)
+        return JSONResponse(status_code=409, content=response.model_dump(mode="json"))
+
+    if pending:
+        # Whether each row was inserted or overwrote a meal comes from the
+        # statement itself; a slot taken under skip or fail returns no row
+        stmt = _on_slot_conflict(sqlite_insert(Meal), batch.on_conflict)
+        # Overwritten meals already loaded in the session take the new values
+        stmt = stmt.returning(Meal, _INSERTED).execution_options(populate_existing=True)
+        saved = {
+            (db_meal.date, db_meal.meal_type): (db_meal, inserted)
+            for db_meal, inserted in db.execute(stmt, [
+                {
+                    "date": meal.date,
+                    "meal_type": meal.meal_type,
+                    "name": meal.name,
+                    "ingredients": meal.ingredients,
+                }
+                for _, meal in pending.values()
+            ])
+        }
+        for slot, (index, meal) in pending.items():
+            if slot not in saved:
+                results[index] = MealBatchItemResult(
+                    index=index,
+                    status="conflict",
+                    detail=f"A meal already exists for {meal.date} - {meal.meal_type}",
+                )
+        if batch.on_conflict == "fail" and len(saved) < len(pending):
+            db.rollback()
+            response = _batch_response(results)
+            return JSONResponse(status_code=409, content=response.model_dump(mode="json"))
+        db.commit()
+
+        changes.publish([
+            _change("created" if inserted else "updated", db_meal)
+            for db_meal, inserted in saved.values()
+        ])
+        for slot, (index, _) in pending.items():
+            if slot in saved:
+                db_meal, inserted = saved[slot]
+                results[index] = MealBatchItemResult(
+                    index=index,
+                    status="created" if inserted else "overwritten",
+                    meal=MealResponse.model_validate(db_meal),
+                )
+
+    return _batch_response(results)
+
+
+def import_meals(
+    db: Session, file: BinaryIO, file_format: FileFormat, on_conflict: ImportConflictPolicy
+) -> MealImportResult:
+    """Validate and upsert meals from an NDJSON or CSV file in chunked transactions.
+
+    The file is read line by line (gunzipped on the fly if needed) and every
+    IMPORT_CHUNK_SIZE valid rows are written with one INSERT ... ON CONFLICT
+    and committed, so it is never held in memory. Chunks committed before a
+    file turns out to be unreadable stay written.
+    """
+    result = MealImportResult()
+    chunk: dict[tuple[date, str], MealCreate] = {}
+    try:
+        text = _open_upload(file)
+        rows = _ndjson_meals(text) if file_format == "ndjson" else _csv_meals(text)
+        for line, meal in rows:
+            if isinstance(meal, str):
+                result.invalid += 1
+                if len(result.errors) < MAX_IMPORT_ERRORS:
+                    result.errors.append(MealImportError(line=line, detail=meal))
+                continue
+            slot = (meal.date, meal.meal_type)
+            if slot in chunk:
+                # The same slot twice in a chunk: overwrite keeps the last row, skip the first
+                if on_conflict == "overwrite":
+                    chunk[slot] = meal
+                    result.overwritten += 1
+                else:
+                    result.skipped += 1
+                continue
+            chunk[slot] = meal
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                _write_import_chunk(db, chunk, on_conflict, result)
+                chunk = {}
+    except (UnicodeDecodeError, gzip.BadGzipFile, EOFError, csv.Error):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unreadable {file_format} file after {_import_total(result)} rows",
+        ) from None
+    if chunk:
+        _write_import_chunk(db, chunk, on_conflict, result)
+    return result
+
+
+def file_format_of(filename: str | None) -> FileFormat:
+    """Guess an import format from a file name, NDJSON unless it is a CSV file."""
+    name = (filename or "").lower().removesuffix(".gz")
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def update_meal(db: Session, meal_id: int, meal: MealUpdate) -> Meal:
+    """Update an existing meal, 404 if it does not exist."""
+    return commit_staged(db, stage_update_meal, meal_id, meal)
+
+
+def stage_update_meal(
+    db: Session, meal_id: int, meal: MealUpdate
+) -> tuple[Meal, list[MealChange]]:
+    db_meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    if not db_meal:
+        raise HTTPException(status_code=404, detail="Meal not found")
+    
+    db_meal.name = meal.name
+    db_meal.ingredients = meal.ingredients
+    db.flush()
+    db.refresh(db_meal)
+    return db_meal, [_change("updated", db_meal)]
+
+
+def set_meal_slot(
+    db: Session, day: date, meal_type: MealType, meal: MealUpdate
+) -> tuple[Meal, bool]:
+    """Create or replace the meal in a slot with one INSERT ... ON CONFLICT DO UPDATE.
+
+    Returns the meal and whether it was created rather than updated, as
+    reported by the statement itself, so a concurrent writer filling the
+    slot first makes this an update.
+    """
+    stmt = _on_slot_conflict(sqlite_insert(Meal), "overwrite")
+    stmt = stmt.returning(Meal, _INSERTED).execution_options(populate_existing=True)
+    db_meal, created = db.execute(stmt, [{
+        "date": day,
+        "meal_type": meal_type,
+        "name": meal.name,
+        "ingredients": meal.ingredients,
+    }]).one()
+    db.commit()
+
+    changes.publish([_change("created" if created else "updated", db_meal)])
+    return db_meal, created
+
+
+def delete_meal(db: Session, meal_id: int) -> None:
+    """Delete a meal, 404 if it does not exist."""
+    commit_staged(db, stage_delete_meal, meal_id)
+
+
+def stage_delete_meal(db: Session, meal_id: int) -> tuple[None, list[MealChange]]:
+    db_meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    if not db_meal:
+        raise HTTPException(status_code=404, detail="Meal not found")
+    
+    deleted = _change("deleted", db_meal)
+    db.delete(db_meal)
+    db.flush()
+    return None, [deleted]
+
+
+def copy_meal(db: Session, meal_id: int, copy_data: MealCopy) -> Meal:
+    """Copy an existing meal to another slot, 409 if that slot is taken."""
+    return commit_staged(db, stage_copy_meal, meal_id, copy_data)
+
+
+def stage_copy_meal(
+    db: Session, meal_id: int, copy_data: MealCopy
+) -> tuple[Meal, list[MealChange]]:
+    source_meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    if not source_meal:
+        raise HTTPException(status_code=404, detail="Source meal not found")
+    
+    new_meal = Meal(
+        date=copy_data.target_date,
+        meal_type=copy_data.target_meal_type,
+        name=source_meal.name,
+        ingredients=source_meal.ingredients or []
+    )
+    
+    try:
+        db.add(new_meal)
+        db.flush()
+    except IntegrityError:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A meal already exists for {copy_data.target_date} - "
+            f"{copy_data.target_meal_type}",
+        ) from None
+
+    db.refresh(new_meal)
+    return new_meal, [_change("created", new_meal)]
+
+
+def copy_meal_range(db: Session, copy_range: MealCopyRange) -> MealCopyResult:
+    """Copy a date range with a single INSERT ... SELECT shifting the dates in SQLite."""
+    days = (copy_range.target_start - copy_range.source_start).days
+    in_range = Meal.date.between(copy_range.source_start, copy_range.source_end)
+    shifted_date = func.date(Meal.date, f"{days:+d} days")
+
+    # One row per source meal with the id of the meal already in its target slot
+    target = aliased(Meal)
+    target_ids = db.scalars(
+        select(target.id)
+        .select_from(Meal)
+        .outerjoin(target, and_(target.date == shifted_date, target.meal_type == Meal.meal_type))
+        .where(in_range)
+    ).all()
+    total = len(target_ids)
+    taken_ids = {target_id for target_id in target_ids if target_id is not None}
+    if copy_range.on_conflict == "fail" and taken_ids:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(taken_ids)} meals already exist in the target range",
+        )
+
+    stmt = _on_slot_conflict(
+        sqlite_insert(Meal.__table__).from_select(
+            ["date", "meal_type", "name", "ingredients"],
+            select(shifted_date, Meal.meal_type, Meal.name, Meal.ingredients).where(in_range),
+        ),
+        copy_range.on_conflict,
+    )
+    saved = db.execute(stmt.returning(*_CHANGE_COLUMNS)).all()
+    if copy_range.on_conflict == "fail" and len(saved) < total:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"{total - len(saved)} meals already exist in the target range",
+        )
+    db.commit()
+    changes.publish([
+        _change("updated" if row.id in taken_ids else "created", row) for row in saved
+    ])
+    return _copy_result(total, len(taken_ids), len(saved), copy_range.on_conflict)
+
+
+def copy_meal_many(db: Session, meal_id: int, copy_data: MealCopyMany) -> MealCopyResult:
+    """Copy an existing meal to every combination of dates and meal types."""
+    source_meal = db.query(Meal).filter(Meal.id == meal_id).first()
+    if not source_meal:
+        raise HTTPException(status_code=404, detail="Source meal not found")
+
+    target_dates = sorted(set(copy_data.target_dates))
+    target_meal_types = sorted(set(copy_data.target_meal_types))
+    taken_ids = set(db.scalars(
+        select(Meal.id).where(
+            Meal.date.in_(target_dates), Meal.meal_type.in_(target_meal_types)
+        )
+    ))
+    if copy_data.on_conflict == "fail" and taken_ids:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(taken_ids)} meals already exist in the target slots",
+        )
+
+    rows = [
+        {
+            "date": target_date,
+            "meal_type": meal_type,
+            "name": source_meal.name,
+            "ingredients": source_meal.ingredients or [],
+        }
+        for target_date in target_dates
+        for meal_type in target_meal_types
+    ]
+    stmt = _on_slot_conflict(sqlite_insert(Meal.__table__), copy_data.on_conflict)
+    saved = db.execute(stmt.returning(*_CHANGE_COLUMNS), rows).all()
+    if copy_data.on_conflict == "fail" and len(saved) < len(rows):
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(rows) - len(saved)} meals already exist in the target slots",
+        )
+    db.commit()
+    changes.publish([
+        _change("updated" if row.id in taken_ids else "created", row) for row in saved
+    ])
+    return _copy_result(len(rows), len(taken_ids), len(saved), copy_data.on_conflict)
+
+
+def commit_staged(db: Session, stage: Stage, *args) -> Any:
+    """Run a staged write in a transaction of its own and publish its changes.
+
+    A stage function writes and flushes but leaves committing to its caller,
+    here or in the group committer, which shares one transaction between
+    the stages of concurrent requests.
+    """
+    try:
+        result, changed = stage(db, *args)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    changes.publish(changed)
+    return result
+
+
+def _change(action: ChangeAction, meal) -> MealChange:
+    """Describe a committed change to a Meal or a RETURNING row of meals."""
+    return MealChange(
+        action=action,
+        id=meal.id,
+        date=meal.date,
+        meal_type=meal.meal_type,
+        ingredients=() if action == "deleted" else tuple(meal.ingredients or ()),
+    )
+
+
+# Whether an overwriting upsert inserted its row: only its DO UPDATE counts up
+_INSERTED = (Meal.overwrites == 0).label("inserted")
+
+
+def _on_slot_conflict(stmt: Insert, policy: ConflictPolicy) -> Insert:
+    """Apply a conflict policy to an INSERT into meals on the date/meal type slot.
+
+    ``fail`` is checked by the callers before writing; skipping here only
+    guards against a slot taken by a concurrent writer since that check.
+    """
+    if policy == "overwrite":
+        return stmt.on_conflict_do_update(
+            index_elements=[Meal.date, Meal.meal_type],
+            set_={
+                "name": stmt.excluded.name,
+                "ingredients": stmt.excluded.ingredients,
+                "updated_at": func.now(),
+                "overwrites": Meal.overwrites + 1,
+            },
+        )
+    return stmt.on_conflict_do_nothing(index_elements=[Meal.date, Meal.meal_type])
+
+
+def _copy_result(
+    total: int, conflicts: int, changed: int, policy: ConflictPolicy
+) -> MealCopyResult:
+    """Summarize a multi-meal copy from the source count and rows written."""
+    if policy == "overwrite":
+        return MealCopyResult(copied=total - conflicts, skipped=0, overwritten=conflicts)
+    return MealCopyResult(copied=changed, skipped=total - changed, overwritten=0)
+
+
+def _dump_json(value) -> bytes:
+    """Compact UTF-8 JSON, matching Pydantic's dump_json output."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _decode_position(cursor: str, *types: type) -> list:
+    """Decode a keyset cursor into values of the given types, 400 if it does not fit."""
+    values = decode_cursor(cursor)
+    if len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    position = []
+    for value, kind in zip(values, types, strict=True):
+        if kind is date and isinstance(value, str):
+            try:
+                value = date.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor") from None
+        # bool is an int subclass but never a valid id
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        position.append(value)
+    return position
+
+
+def _ndjson_chunks(partitions: Iterable) -> Iterator[bytes]:
+    """One JSON object per line, shaped like MealResponse."""
+    for rows in partitions:
+        yield b"".join(
+            _dump_json({
+                "name": name,
+                "ingredients": ingredients or [],
+                "id": meal_id,
+                "date": day,
+                "meal_type": meal_type,
+            }) + b"\n"
+            for meal_id, day, meal_type, name, ingredients in rows
+        )
+
+
+def _csv_chunks(partitions: Iterable) -> Iterator[bytes]:
+    """A header row followed by one CSV row per meal."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(_EXPORT_COLUMNS)
+    for rows in partitions:
+        writer.writerows(
+            (meal_id, day, meal_type, name, _dump_json(ingredients or []).decode())
+            for meal_id, day, meal_type, name, ingredients in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only, nothing matched
+        yield buffer.getvalue().encode()
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _open_upload(file: BinaryIO) -> TextIO:
+    """Text view of an uploaded file, decompressed on the fly if it is gzipped."""
+    gzipped = file.read(2) == b"\x1f\x8b"
+    file.seek(0)
+    raw: BinaryIO | gzip.GzipFile = gzip.GzipFile(fileobj=file, mode="rb") if gzipped else file
+    return io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+
+def _ndjson_meals(text: TextIO) -> Iterator[tuple[int, MealCreate | str]]:
+    """Validated meals, or error messages, per non-blank line of an NDJSON file."""
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, MealCreate.model_validate_json(raw)
+        except ValidationError as exc:
+            yield line, _describe_errors(exc)
+
+
+def _csv_meals(text: TextIO) -> Iterator[tuple[int, MealCreate | str]]:
+    """Validated meals, or error messages, per row of a CSV file with a header.
+
+    Ingredients are a JSON array, as written by the export, or a
+    semicolon-separated list as typed into a spreadsheet.
+    """
+    reader = csv.DictReader(text)
+    missing = {"date", "meal_type", "name"} - set(reader.fieldnames or ())
+    if missing:
+        raise HTTPException(
+            status_code=400, detail=f"CSV header is missing {', '.join(sorted(missing))}"
+        )
+    for row in reader:
+        row.pop(None, None)  # cells beyond the header
+        ingredients = (row.get("ingredients") or "").strip()
+        try:
+            if ingredients.startswith("["):
+                row["ingredients"] = json.loads(ingredients)
+            else:
+                row["ingredients"] = ingredients.split(";") if ingredients else []
+        except ValueError:
+            yield reader.line_num, "ingredients: Invalid JSON array"
+            continue
+        try:
+            yield reader.line_num, MealCreate.model_validate(row)
+        except ValidationError as exc:
+            yield reader.line_num, _describe_errors(exc)
+
+
+def _write_import_chunk(
+    db: Session,
+    chunk: dict[tuple[date, str], MealCreate],
+    on_conflict: ImportConflictPolicy,
+    result: MealImportResult,
+) -> None:
+    """Upsert one chunk of an import in its own transaction and count the outcome."""
+    rows = db.execute(
+        select(Meal.date, Meal.meal_type).where(Meal.date.in_({d for d, _ in chunk}))
+    )
+    taken = {(row.date, row.meal_type) for row in rows} & chunk.keys()
+
+    stmt = _on_slot_conflict(sqlite_insert(Meal.__table__), on_conflict)
+    saved = db.execute(stmt.returning(*_CHANGE_COLUMNS), [
+        {
+            "date": meal.date,
+            "meal_type": meal.meal_type,
+            "name": meal.name,
+            "ingredients": meal.ingredients,
+        }
+        for meal in chunk.values()
+    ]).all()
+    db.commit()
+
+    overwritten = [row for row in saved if (row.date, row.meal_type) in taken]
+    changes.publish([
+        _change("updated" if (row.date, row.meal_type) in taken else "created", row)
+        for row in saved
+    ])
+    result.created += len(saved) - len(overwritten)
+    result.overwritten += len(overwritten)
+    result.skipped += len(chunk) - len(saved)
+
+
+def _import_total(result: MealImportResult) -> int:
+    """Rows of an import accounted for so far."""
+    return result.created + result.overwritten + result.skipped + result.invalid
+
+
+def _range_headers(etag: str) -> dict[str, str]:
+    """Caching headers for date-range responses; clients must revalidate."""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _describe_errors(exc: ValidationError) -> str:
+    """Flatten a validation error into a single readable message."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _batch_response(results: list[MealBatchItemResult | None]) -> MealBatchResponse:
+    """Build the batch response with per-status totals."""
+    items = [result for result in results if result is not None]
+    counts = Counter(result.status for result in items)
+    return MealBatchResponse(
+        results=items,
+        created=counts["created"],
+        overwritten=counts["overwritten"],
+        conflicts=counts["conflict"],
+        invalid=counts["invalid"],
+    )
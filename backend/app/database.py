@@ -1,16 +1,165 @@
+import functools
+import inspect
 import os
+import re
+from urllib.parse import quote
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import URL, Engine, create_engine, event, make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/meals.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+# Opt-in async request path over aiosqlite (pip install ".[async]")
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() in ("1", "true", "yes")
+
+# Named SQLite tuning profiles, applied with PRAGMA on every new connection.
+# "legacy" applies nothing and keeps SQLite's built-in defaults.
+SQLITE_PROFILES: dict[str, dict[str, str]] = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": "-65536",  # negative means KiB, i.e. 64 MiB
+        "mmap_size": "268435456",
+        "temp_store": "MEMORY",
+        "busy_timeout": "5000",
+        "foreign_keys": "ON",
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": "-16384",
+        "mmap_size": "0",
+        "temp_store": "DEFAULT",
+        "busy_timeout": "5000",
+        "foreign_keys": "ON",
+    },
+    "legacy": {},
+}
+
+SQLITE_PRAGMA_NAMES = (
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "busy_timeout",
+    "foreign_keys",
+)
+
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragmas_from_env(environ=os.environ) -> tuple[str, dict[str, str]]:
+    """Resolve the SQLite profile and per-pragma overrides from the environment.
+
+    ``SQLITE_PROFILE`` selects a named profile and ``SQLITE_<PRAGMA>``
+    (e.g. ``SQLITE_CACHE_SIZE``) overrides single values of it.
+    """
+    profile = environ.get("SQLITE_PROFILE", "performance")
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(
+            f"Unknown SQLITE_PROFILE {profile!r}, expected one of {sorted(SQLITE_PROFILES)}"
+        )
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PRAGMA_NAMES:
+        value = environ.get(f"SQLITE_{name.upper()}")
+        if value is not None:
+            pragmas[name] = value
+    for name, value in pragmas.items():
+        if not _PRAGMA_VALUE.match(value):
+            raise ValueError(f"Invalid value {value!r} for SQLite pragma {name}")
+    return profile, pragmas
+
+
+def configure_sqlite(engine: Engine, pragmas: dict[str, str]) -> None:
+    """Apply the given pragmas to every connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def async_database_url(url: str) -> str:
+    """Translate a sync SQLite URL into its aiosqlite equivalent."""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.removeprefix("sqlite://")
+    return url
+
+
+def read_only_database_url(url: str) -> URL | None:
+    """The read-only URI form of a SQLite file URL; None if it isn't one."""
+    parsed = make_url(url)
+    database = parsed.database
+    if parsed.get_backend_name() != "sqlite" or not database or database == ":memory:":
+        return None
+    if database.startswith("file:"):
+        return None
+    path = quote(os.path.abspath(database))
+    return parsed.set(database=f"file:{path}", query={"mode": "ro", "uri": "true"})
+
+
+def read_only_pragmas(pragmas: dict[str, str]) -> dict[str, str]:
+    """The pragmas for read connections: the journal mode is the writer's to set."""
+    readers = {name: value for name, value in pragmas.items() if name != "journal_mode"}
+    readers["query_only"] = "ON"
+    return readers
+
+
+def create_engines(url: str, pragmas: dict[str, str]) -> tuple[Engine, Engine]:
+    """Create the write engine and the read engine for a database URL.
+
+    SQLite allows one writer at a time. For a database file, writes go
+    through a pool of a single connection, so concurrent write requests
+    wait their turn in the pool's queue instead of failing with "database
+    is locked". Reads use a separate pool of read-only connections, which
+    WAL mode never blocks. Other databases get one engine for both.
+    """
+    read_url = read_only_database_url(url)
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Needed for SQLite
+        **({"pool_size": 1, "max_overflow": 0} if read_url is not None else {}),
+    )
+    if engine.dialect.name == "sqlite":
+        configure_sqlite(engine, pragmas)
+    if read_url is None:
+        # An in-memory database exists only on its own connection
+        return engine, engine
+    read_engine = create_engine(read_url, connect_args={"check_same_thread": False})
+    configure_sqlite(read_engine, read_only_pragmas(pragmas))
+    return engine, read_engine
+
+
+SQLITE_PROFILE, SQLITE_PRAGMAS = sqlite_pragmas_from_env()
+
+engine, read_engine = create_engines(DATABASE_URL, SQLITE_PRAGMAS)
+
+# Written meals stay loaded after commit: reloading them to build the response
+# would fail if a concurrent request had deleted them in the meantime
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(async_database_url(DATABASE_URL))
+    if async_engine.dialect.name == "sqlite":
+        configure_sqlite(async_engine.sync_engine, SQLITE_PRAGMAS)
+    # Objects stay loaded after commit, attribute access must not trigger async IO
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
 
 Base = declarative_base()
 
@@ -22,3 +171,55 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency to get a read-only database session for endpoints that never write."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class SessionRoute(APIRoute):
+    """Route whose sync endpoint closes its database sessions as soon as it returns.
+
+    FastAPI closes a session dependency only after the response has been
+    serialized, and for a sync endpoint that takes a threadpool thread. With
+    every thread waiting for a pooled connection, e.g. the single write
+    connection, the request holding one could not give it back until the
+    pool timed out. Closing in the endpoint's own thread ends the transaction
+    and returns the connection first; objects it loaded stay readable. A
+    streaming response reads from its session while it is sent, so that
+    session is left to the dependency.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _closing_sessions(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _closing_sessions(endpoint):
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        response = None
+        try:
+            response = endpoint(*args, **kwargs)
+            return response
+        finally:
+            if not isinstance(response, StreamingResponse):
+                for value in kwargs.values():
+                    if isinstance(value, Session):
+                        value.close()
+
+    return run
+
+
+async def get_async_db():
+    """Dependency to get an async database session (ASYNC_DATABASE mode)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires ASYNC_DATABASE=true")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,161 @@
+"""Group commit: concurrent single-meal writes share one transaction.
+
+Every create, update, delete or copy otherwise commits on its own, and
+with ``synchronous=FULL`` each commit is an fsync. With MEAL_GROUP_COMMIT
+on, the sync router hands these writes to one background thread instead.
+The thread takes the first waiting write, collects whatever else arrives
+within MEAL_GROUP_COMMIT_WINDOW_MS (up to MEAL_GROUP_COMMIT_MAX_BATCH), and
+runs them all in a single transaction. Each write runs under its own
+SAVEPOINT, so one that fails, e.g. with a 409, is rolled back alone and its
+request gets the error while the rest commit. Requests are answered once
+their batch has committed, so a response still means the write is durable.
+
+The async routes keep committing on their own: a handler on the event loop
+must not block waiting for the writer thread.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Self
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import changes
+from .changes import MealChange
+from .crud import Stage
+from .database import SessionLocal
+from .metrics import MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Write:
+    stage: Stage
+    args: tuple
+    result: Future = field(default_factory=Future)
+
+
+class GroupCommitter:
+    """Runs staged writes from many requests in shared transactions."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session] = SessionLocal,
+        enabled: bool = False,
+        window: float = 0.002,
+        max_batch: int = 64,
+        registry: MetricsRegistry | None = None,
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        # Seconds the writer waits for more writes after the first one arrives
+        self.window = window
+        self.max_batch = max_batch
+        self.registry = registry or metrics
+        self._queue: queue.SimpleQueue[_Write | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> Self:
+        """Build a committer from MEAL_GROUP_COMMIT, MEAL_GROUP_COMMIT_WINDOW_MS
+        and MEAL_GROUP_COMMIT_MAX_BATCH.
+        """
+        return cls(
+            enabled=environ.get("MEAL_GROUP_COMMIT", "false").lower() in ("1", "true", "yes"),
+            window=float(environ.get("MEAL_GROUP_COMMIT_WINDOW_MS", "2")) / 1000,
+            max_batch=int(environ.get("MEAL_GROUP_COMMIT_MAX_BATCH", "64")),
+        )
+
+    def submit(self, stage: Stage, *args) -> Any:
+        """Run ``stage(db, *args)`` in the next batch; returns once it has committed.
+
+        Raises whatever the stage raised, or the error that failed the commit.
+        """
+        write = _Write(stage, args)
+        self._start()
+        self._queue.put(write)
+        return write.result.result()
+
+    def stop(self) -> None:
+        """Commit the writes already submitted, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="group-commit", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    write = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch: list[_Write]) -> None:
+        """Apply a batch in one transaction and resolve every write in it."""
+        staged: list[tuple[_Write, Any, list[MealChange]]] = []
+        # Results are handed to other threads after the session has closed
+        with self.session_factory(expire_on_commit=False) as db:
+            try:
+                if db.get_bind().dialect.name == "sqlite":
+                    # pysqlite only opens a transaction before the first write, and
+                    # a SAVEPOINT outside one commits on release, so open it here
+                    db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for write in batch:
+                    try:
+                        with db.begin_nested():
+                            result, changed = write.stage(db, *write.args)
+                    except Exception as exc:
+                        write.result.set_exception(exc)
+                        continue
+                    staged.append((write, result, changed))
+                if staged:
+                    started = time.perf_counter()
+                    db.commit()
+                    self.registry.observe_group_commit(len(batch), time.perf_counter() - started)
+            except Exception as exc:
+                logger.exception("Group commit of %d writes failed", len(batch))
+                for write in batch:
+                    if not write.result.done():
+                        write.result.set_exception(exc)
+                return
+        changes.publish([change for _, _, changed in staged for change in changed])
+        for write, result, _ in staged:
+            write.result.set_result(result)
+
+
+group_commit = GroupCommitter.from_env()
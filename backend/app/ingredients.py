@@ -0,0 +1,157 @@
+"""In-memory prefix index of every distinct ingredient, for autocomplete.
+
+Ingredients are kept as a sorted list searched with bisect plus a usage
+count per ingredient. The index is loaded once at startup and then kept
+current from the change feed, so suggestions never touch the database.
+"""
+import heapq
+import string
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import changes
+from .models import Meal
+
+# SQLite's lower() only folds ASCII, so the index does the same to keep its
+# suggestions matching the normalized ingredients used by exact search
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_ingredient(ingredient: str) -> str:
+    """The lower(trim()) form the ingredient search compares against."""
+    return ingredient.strip(" ").translate(_ASCII_LOWER)
+
+
+class IngredientIndex:
+    """Thread-safe sorted index of normalized ingredients and their usage counts."""
+
+    def __init__(self):
+        self._names: list[str] = []
+        self._counts: Counter[str] = Counter()
+        # Each meal's ingredients, to undo them when the meal changes
+        self._meals: dict[int, frozenset[str]] = {}
+        # Meals per day, so a day changed by another process can be re-read
+        self._meal_days: dict[int, date] = {}
+        self._day_meals: dict[date, set[int]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """Replace the index with the ingredients of every meal in the database."""
+        meals = {}
+        meal_days = {}
+        day_meals: dict[date, set[int]] = {}
+        for meal_id, day, ingredients in db.execute(select(Meal.id, Meal.date, Meal.ingredients)):
+            meals[meal_id] = self._normalized(ingredients)
+            meal_days[meal_id] = day
+            day_meals.setdefault(day, set()).add(meal_id)
+        counts = Counter(name for names in meals.values() for name in names)
+        with self._lock:
+            self._meals = {meal_id: names for meal_id, names in meals.items() if names}
+            self._meal_days = meal_days
+            self._day_meals = day_meals
+            self._counts = counts
+            self._names = sorted(counts)
+
+    def set_meal(self, meal_id: int, ingredients, day: date | None = None) -> None:
+        """Record a meal's current ingredients and day, replacing what it had before.
+
+        Empty ingredients with no day remove the meal.
+        """
+        names = self._normalized(ingredients)
+        with self._lock:
+            self._set_day(meal_id, day)
+            self._set_names(meal_id, names)
+
+    def refresh_days(self, db: Session, days: Iterable[date]) -> None:
+        """Re-read the meals on some days, e.g. after another process wrote to them."""
+        days = list(days)
+        found: dict[int, tuple[date, frozenset[str]]] = {}
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(days), 500):
+            rows = db.execute(
+                select(Meal.id, Meal.date, Meal.ingredients)
+                .where(Meal.date.in_(days[start:start + 500]))
+            )
+            for meal_id, day, ingredients in rows:
+                found[meal_id] = (day, self._normalized(ingredients))
+        with self._lock:
+            for day in days:
+                for meal_id in self._day_meals.get(day, set()) - found.keys():
+                    self._set_day(meal_id, None)
+                    self._set_names(meal_id, frozenset())
+            for meal_id, (day, names) in found.items():
+                self._set_day(meal_id, day)
+                self._set_names(meal_id, names)
+
+    def _set_day(self, meal_id: int, day: date | None) -> None:
+        old = self._meal_days.pop(meal_id, None)
+        if old is not None:
+            self._day_meals[old].discard(meal_id)
+            if not self._day_meals[old]:
+                del self._day_meals[old]
+        if day is not None:
+            self._meal_days[meal_id] = day
+            self._day_meals.setdefault(day, set()).add(meal_id)
+
+    def _set_names(self, meal_id: int, names: frozenset[str]) -> None:
+        old = self._meals.pop(meal_id, frozenset())
+        if names:
+            self._meals[meal_id] = names
+        for name in old - names:
+            self._counts[name] -= 1
+            if not self._counts[name]:
+                del self._counts[name]
+                del self._names[bisect_left(self._names, name)]
+        for name in names - old:
+            if not self._counts[name]:
+                insort(self._names, name)
+            self._counts[name] += 1
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        """The most used ingredients starting with a prefix, as (ingredient, count)."""
+        prefix = normalize_ingredient(prefix)
+        with self._lock:
+            start = bisect_left(self._names, prefix)
+            # Every string with the prefix sorts before prefix + the highest code point
+            end = bisect_left(self._names, prefix + "\U0010ffff", lo=start)
+            matches = [(name, self._counts[name]) for name in self._names[start:end]]
+        return heapq.nsmallest(limit, matches, key=lambda match: (-match[1], match[0]))
+
+    def apply_changes(self, meal_changes: list[changes.MealChange]) -> None:
+        """Change-feed subscriber: update the meals that changed."""
+        for change in meal_changes:
+            day = None if change.action == "deleted" else change.date
+            self.set_meal(change.id, change.ingredients, day)
+
+    def clear(self) -> None:
+        """Drop all ingredients."""
+        with self._lock:
+            self._names.clear()
+            self._counts.clear()
+            self._meals.clear()
+            self._meal_days.clear()
+            self._day_meals.clear()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _normalized(ingredients) -> frozenset[str]:
+        """Distinct normalized non-blank text ingredients, as the triggers store them."""
+        return frozenset(
+            name for name in (
+                normalize_ingredient(item) for item in ingredients or ()
+                if isinstance(item, str)
+            )
+            if name
+        )
+
+
+ingredient_index = IngredientIndex()
+changes.subscribe(ingredient_index.apply_changes)
@@ -1,23 +1,93 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import Base, engine
-from .routers import meals
+from .broadcast import change_broadcaster
+from .database import ASYNC_DATABASE, ReadSessionLocal, async_engine, engine, read_engine
+from .group_commit import group_commit
+from .ingredients import ingredient_index
+from .metrics import MetricsMiddleware, metrics
+from .migrations import migrate
+from .profiler import SQLProfilerMiddleware, sql_profiler
+from .routers import diagnostics, ingredients, meals, shopping_list, stats
+from .routers import metrics as metrics_router
+from .watcher import write_watcher
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# Time every SQL statement from the first one on
+metrics.instrument_engine(engine)
+if read_engine is not engine:
+    metrics.instrument_engine(read_engine, "read")
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+# The profiler's events are only attached when it is switched on
+if sql_profiler.enabled:
+    sql_profiler.instrument_engine(engine)
+    if read_engine is not engine:
+        sql_profiler.instrument_engine(read_engine)
+    if async_engine is not None:
+        sql_profiler.instrument_engine(async_engine.sync_engine)
+
+
+def _check_external_writes() -> None:
+    with ReadSessionLocal() as db:
+        write_watcher.check(db)
+
+
+async def _watch_for_streams() -> None:
+    """Run the write watcher while change streams are open.
+
+    Otherwise a worker that serves only streams would never look, and its
+    clients would miss what other workers write.
+    """
+    while True:
+        await asyncio.sleep(change_broadcaster.watch_interval)
+        if not change_broadcaster.subscribers:
+            continue
+        try:
+            await asyncio.to_thread(_check_external_writes)
+        except Exception:
+            logger.exception("Checking for other workers' writes failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the database once per worker before it serves requests."""
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+    migrate(engine)
+    # Load the autocomplete index; committed writes keep it current from here on
+    with ReadSessionLocal() as db:
+        write_watcher.prime(db)
+        ingredient_index.load(db)
+    # Chained in front of uvicorn's handlers, which are installed by now
+    change_broadcaster.close_on_exit_signals()
+    watching = asyncio.create_task(_watch_for_streams()) if write_watcher.enabled else None
+    yield
+    if watching is not None:
+        watching.cancel()
+        with suppress(asyncio.CancelledError):
+            await watching
+    change_broadcaster.close()
+    group_commit.stop()
 
-# Ensure data directory exists
-os.makedirs("data", exist_ok=True)
 
 app = FastAPI(
     title="Meal Calendar API",
     description="API for managing weekly meal plans",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+if sql_profiler.enabled:
+    app.add_middleware(SQLProfilerMiddleware)  # type: ignore[arg-type]
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,  # type: ignore[arg-type]
@@ -26,9 +96,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so request latency includes the other middleware
+app.add_middleware(MetricsMiddleware)  # type: ignore[arg-type]
+
+# Include routers; async meal routes shadow their sync twins when enabled
+if ASYNC_DATABASE:
+    from .routers import meals_async
 
-# Include routers
+    app.include_router(meals_async.router)
 app.include_router(meals.router)
+app.include_router(shopping_list.router)
+app.include_router(ingredients.router)
+app.include_router(stats.router)
+app.include_router(diagnostics.router)
+app.include_router(metrics_router.router)
 
 
 @app.get("/api/health")
@@ -0,0 +1,243 @@
+"""Request and database metrics in the Prometheus text exposition format.
+
+Requests are timed by an ASGI middleware and labelled with their route
+template, SQL statements by engine events. Each series is a histogram of
+plain counters updated without a lock, so the hot path costs a bisect and
+two increments; two threads updating the same series at the same instant
+may rarely lose an increment, which is accepted for metrics. Gauges are
+read when the endpoint is scraped. Numbers are per process, so with
+several uvicorn workers each one reports its own.
+"""
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable
+
+from sqlalchemy import Engine, QueuePool, event
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+# Writes per group commit (see app.group_commit)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# Statement kinds get their own label value; anything else is "OTHER". All
+# of these are six letters, so the kind is the first six characters.
+_STATEMENT_KINDS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA"})
+
+LabelSet = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Bucket counts, sum and count of observed values."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        # One counter per bucket plus the +Inf overflow, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Request and SQL histograms plus the engines whose pools are reported."""
+
+    def __init__(self):
+        self.requests: dict[LabelSet, Histogram] = {}
+        self.statements: dict[LabelSet, Histogram] = {}
+        self.statement_errors: Counter[LabelSet] = Counter()
+        self.commit_batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.commit_duration = Histogram(STATEMENT_BUCKETS)
+        self.engines: dict[str, Engine] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (("method", method), ("route", route), ("status", str(status)))
+        histogram = self.requests.get(key)
+        if histogram is None:
+            # setdefault keeps the first histogram if two threads race to create it
+            histogram = self.requests.setdefault(key, Histogram(REQUEST_BUCKETS))
+        histogram.observe(seconds)
+
+    def observe_statement(self, statement: str, seconds: float) -> None:
+        kind = statement.lstrip()[:6].upper()
+        key = (("operation", kind if kind in _STATEMENT_KINDS else "OTHER"),)
+        histogram = self.statements.get(key)
+        if histogram is None:
+            histogram = self.statements.setdefault(key, Histogram(STATEMENT_BUCKETS))
+        histogram.observe(seconds)
+
+    def observe_group_commit(self, size: int, seconds: float) -> None:
+        """Record one group commit: how many writes it held and how long COMMIT took."""
+        self.commit_batch_size.observe(size)
+        self.commit_duration.observe(seconds)
+
+    def instrument_engine(self, engine: Engine, name: str = "default") -> None:
+        """Time every statement the engine runs and report its connection pool."""
+        self.engines[name] = engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info["metrics_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def stop_timer(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop("metrics_started", None)
+            if started is not None:
+                self.observe_statement(statement, time.perf_counter() - started)
+
+        @event.listens_for(engine, "handle_error")
+        def count_error(context):
+            if context.connection is not None:
+                context.connection.info.pop("metrics_started", None)
+            error = type(context.original_exception).__name__
+            self.statement_errors[(("error", error),)] += 1
+
+    def clear(self) -> None:
+        """Drop all observations; instrumented engines stay registered."""
+        self.requests.clear()
+        self.statements.clear()
+        self.statement_errors.clear()
+        self.commit_batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.commit_duration = Histogram(STATEMENT_BUCKETS)
+
+    def render(self, extra: Iterable[tuple[str, str, str, float]] = ()) -> str:
+        """The exposition text, then `(name, type, help, value)` samples from the caller."""
+        lines: list[str] = []
+        _histogram_lines(
+            lines, "http_request_duration_seconds",
+            "Request latency by method, route template and status; _count is the request count.",
+            self.requests,
+        )
+        _histogram_lines(
+            lines, "db_statement_duration_seconds",
+            "SQL statement latency by operation; _count is the statement count.",
+            self.statements,
+        )
+        _header(lines, "db_statement_errors_total", "counter", "SQL statements that raised.")
+        for labels, count in list(self.statement_errors.items()):
+            lines.append(f"db_statement_errors_total{_labels(labels)} {count}")
+        _histogram_lines(
+            lines, "db_group_commit_batch_size",
+            "Writes per group commit, failed ones included; _count is the commit count.",
+            _unlabelled(self.commit_batch_size),
+        )
+        _histogram_lines(
+            lines, "db_group_commit_duration_seconds",
+            "Time the group committer's COMMIT took.",
+            _unlabelled(self.commit_duration),
+        )
+
+        # Only a QueuePool has a size; static and single-thread pools are skipped
+        pools = [
+            (name, engine.pool) for name, engine in self.engines.items()
+            if isinstance(engine.pool, QueuePool)
+        ]
+        pool_gauges = (
+            ("db_pool_size", "Connections the pool keeps open.", QueuePool.size),
+            ("db_pool_checked_out", "Connections currently in use.", QueuePool.checkedout),
+            # overflow() counts up from -size while the pool fills
+            ("db_pool_overflow", "Connections open beyond the pool size.",
+             lambda pool: max(pool.overflow(), 0)),
+        )
+        for metric, help_text, read in pool_gauges if pools else ():
+            _header(lines, metric, "gauge", help_text)
+            for name, pool in pools:
+                lines.append(f"{metric}{_labels((('engine', name),))} {read(pool)}")
+
+        for metric, kind, help_text, value in extra:
+            _header(lines, metric, kind, help_text)
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per method, route template and status.
+
+    The route template (e.g. ``/api/meals/{meal_id}``) is read from the scope
+    after routing, so every meal id lands in the same series. Requests that
+    match no route share the "unmatched" template. Latency runs until the
+    last body chunk is sent, which covers streamed responses. Server-Sent
+    Events streams are left out: they stay open as long as the client does,
+    and the streams open now are reported by meal_stream_subscribers.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry | None = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        # Stays 500 when the app raises before sending a response
+        status = 500
+        event_stream = False
+
+        async def send_with_status(message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                event_stream = any(
+                    name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if not event_stream:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                self.registry.observe_request(
+                    scope["method"], route, status, time.perf_counter() - started
+                )
+
+
+def _header(lines: list[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _unlabelled(histogram: Histogram) -> dict[LabelSet, Histogram]:
+    """A histogram without labels as a series, left out until it has observations."""
+    return {(): histogram} if any(histogram.counts) else {}
+
+
+def _histogram_lines(
+    lines: list[str], name: str, help_text: str, series: dict[LabelSet, Histogram]
+) -> None:
+    _header(lines, name, "histogram", help_text)
+    # Copy first, a request may add a series while the scrape iterates
+    for labels, histogram in list(series.items()):
+        cumulative = 0
+        for bound, count in zip(
+            (*histogram.buckets, "+Inf"), histogram.counts, strict=True
+        ):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels((*labels, ('le', str(bound))))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,184 @@
+"""
+Versioned schema migrations tracked in ``PRAGMA user_version``.
+
+The app runs them from its lifespan handler, so importing it never touches
+the database. Each pending migration runs in its own ``BEGIN IMMEDIATE``
+transaction together with the version bump. That write lock makes every
+other worker wait and then find the work already done. In WAL mode readers
+keep going while an index is built, and committing per migration holds the
+write lock for one step at a time.
+
+A new database is created from the models and stamped with the latest
+version. A database from before versioning gets migration 1, which creates
+whatever the current models declare and it lacks. Later migrations must
+therefore be idempotent, e.g. ``CREATE INDEX IF NOT EXISTS``. Run from
+backend/:
+
+    python -m app.migrations status
+    python -m app.migrations upgrade
+"""
+import argparse
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateTable
+
+from .database import Base, engine
+from .models import MEAL_INGREDIENT_DDL, MealIngredient
+
+logger = logging.getLogger(__name__)
+
+# How long a worker waits for another one's migrations before giving up
+LOCK_TIMEOUT = 300.0
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int):
+    """Register the decorated function as the migration to `version`."""
+
+    def register(function: Callable[[Connection], None]):
+        name = getattr(function, "__name__", f"migration {version}")
+        description = (function.__doc__ or name).strip().splitlines()[0]
+        MIGRATIONS.append(Migration(version, description, function))
+        return function
+
+    return register
+
+
+@migration(1)
+def _baseline(connection: Connection) -> None:
+    """Create the tables, indexes and triggers of the models that are missing."""
+    Base.metadata.create_all(connection)
+
+
+@migration(2)
+def _meal_ingredients_by_date(connection: Connection) -> None:
+    """Rebuild meal_ingredients with the meal date, indexed for ingredient search."""
+    # The table is derived from meals, so it is rebuilt rather than altered:
+    # SQLite cannot add a NOT NULL column without a default. The index is
+    # built once over the backfilled rows instead of row by row.
+    for trigger in ("after_insert", "after_update", "after_delete"):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS meal_ingredients_{trigger}")
+    MealIngredient.__table__.drop(connection, checkfirst=True)
+    connection.execute(CreateTable(MealIngredient.__table__))
+    for ddl in MEAL_INGREDIENT_DDL:
+        connection.execute(ddl)
+    create_index(
+        connection,
+        "ix_meal_ingredients_ingredient_norm_date",
+        "meal_ingredients",
+        "ingredient_norm, date, meal_id",
+    )
+
+
+@migration(3)
+def _meal_overwrites(connection: Connection) -> None:
+    """Add the overwrite counter that tells an upsert's insert from its update."""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(meals)")}
+    if "overwrites" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE meals ADD COLUMN overwrites INTEGER NOT NULL DEFAULT 0"
+        )
+
+
+def create_index(connection: Connection, name: str, table: str, expressions: str) -> None:
+    """Create an index unless it exists; for migrations that add one to a live table."""
+    connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({expressions})")
+
+
+def head_version(migrations: list[Migration] | None = None) -> int:
+    """The newest version, checking that versions run 1, 2, 3... without gaps."""
+    versions = [m.version for m in migrations or MIGRATIONS]
+    if versions != list(range(1, len(versions) + 1)):
+        raise RuntimeError(f"Migration versions must be 1..n in order, got {versions}")
+    return len(versions)
+
+
+def current_version(connection: Connection) -> int:
+    return int(connection.exec_driver_sql("PRAGMA user_version").scalar() or 0)
+
+
+def migrate(
+    bind: Engine,
+    migrations: list[Migration] | None = None,
+    lock_timeout: float = LOCK_TIMEOUT,
+) -> list[int]:
+    """Bring the database up to the newest version; returns the versions applied."""
+    migrations = migrations or MIGRATIONS
+    head = head_version(migrations)
+    applied = []
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        while True:
+            _begin_immediate(connection, lock_timeout)
+            try:
+                version = current_version(connection)
+                if version >= head:
+                    connection.exec_driver_sql("COMMIT")
+                    return applied
+                if version == 0 and not _has_meals_table(connection):
+                    # A new database gets the current models in one go
+                    Base.metadata.create_all(connection)
+                    version = head
+                    logger.info("Created schema version %d", head)
+                else:
+                    step = migrations[version]
+                    step.apply(connection)
+                    version = step.version
+                    logger.info("Applied migration %d: %s", version, step.description)
+                connection.exec_driver_sql(f"PRAGMA user_version = {version:d}")
+                connection.exec_driver_sql("COMMIT")
+            except BaseException:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+            applied.append(version)
+
+
+def _begin_immediate(connection: Connection, lock_timeout: float) -> None:
+    """Take the database write lock, waiting while another worker migrates."""
+    deadline = time.monotonic() + lock_timeout
+    while True:
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as exc:
+            if "locked" not in str(exc.orig) or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _has_meals_table(connection: Connection) -> bool:
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meals'"
+    ).first() is not None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["status", "upgrade"])
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = migrate(engine)
+        print(f"applied {applied}" if applied else "already up to date")
+    with engine.connect() as connection:
+        version = current_version(connection)
+    print(f"database version {version}, newest {head_version()}")
+    for step in MIGRATIONS[version:]:
+        print(f"pending {step.version}: {step.description}")
+
+
+if __name__ == "__main__":
+    main()
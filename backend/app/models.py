@@ -1,4 +1,18 @@
-from sqlalchemy import JSON, Column, Date, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    column,
+    event,
+    table,
+)
 from sqlalchemy.sql import func
 
 from .database import Base
@@ -16,7 +30,288 @@ class Meal(Base):
     ingredients = Column(JSON, nullable=True, default=list)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Times a slot upsert replaced this row; 0 in a RETURNING row means it was inserted
+    overwrites = Column(Integer, nullable=False, server_default="0")
     
     __table_args__ = (
         UniqueConstraint('date', 'meal_type', name='unique_date_meal_type'),
     )
+
+
+class MealIngredient(Base):
+    """Normalized ingredient of a meal, used for indexed ingredient lookups.
+
+    Rows are maintained by SQLite triggers on ``meals`` so every write path
+    (ORM or plain SQL) keeps this table in sync with ``Meal.ingredients``.
+    ``date`` is a copy of the meal's date, so a search pages through the
+    index in date order instead of sorting every match.
+    """
+
+    __tablename__ = "meal_ingredients"
+
+    meal_id = Column(Integer, ForeignKey("meals.id", ondelete="CASCADE"), primary_key=True)
+    ingredient_norm = Column(String, primary_key=True)
+    date = Column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("ix_meal_ingredients_ingredient_norm_date", "ingredient_norm", "date", "meal_id"),
+    )
+
+
+class MealDayVersion(Base):
+    """Change marker per calendar day, used to build cheap ETags for date ranges.
+
+    Every write to ``meals`` stamps the affected days with the next value of a
+    global sequence (maintained by triggers), so the maximum version of a range
+    changes whenever anything inside that range changes.
+    """
+
+    __tablename__ = "meal_day_versions"
+
+    date = Column(Date, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+
+
+# Normalized ingredients of a meal row: lower(trim()) of every non-blank text element.
+_INGREDIENTS_OF = """
+    SELECT {meal}.id, lower(trim(j.value)), {meal}.date
+    FROM {source} json_each({meal}.ingredients) AS j
+    WHERE j.type = 'text' AND trim(j.value) != ''
+"""
+
+# Triggers that keep meal_ingredients in sync, then the backfill; run on create
+MEAL_INGREDIENT_DDL = tuple(DDL(statement) for statement in (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_ingredients_after_insert AFTER INSERT ON meals
+    BEGIN
+        INSERT OR IGNORE INTO meal_ingredients (meal_id, ingredient_norm, date)
+        {_INGREDIENTS_OF.format(meal="NEW", source="")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_ingredients_after_update
+    AFTER UPDATE OF ingredients, date ON meals
+    BEGIN
+        DELETE FROM meal_ingredients WHERE meal_id = OLD.id;
+        INSERT OR IGNORE INTO meal_ingredients (meal_id, ingredient_norm, date)
+        {_INGREDIENTS_OF.format(meal="NEW", source="")};
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS meal_ingredients_after_delete AFTER DELETE ON meals
+    BEGIN
+        DELETE FROM meal_ingredients WHERE meal_id = OLD.id;
+    END
+    """,
+    # Backfill databases created before the side table existed
+    f"""
+    INSERT OR IGNORE INTO meal_ingredients (meal_id, ingredient_norm, date)
+    {_INGREDIENTS_OF.format(meal="m", source="meals AS m,")}
+    """,
+))
+
+for ddl in MEAL_INGREDIENT_DDL:
+    event.listen(MealIngredient.__table__, "after_create", ddl)
+
+
+# Stamp a day with the next global version; ON CONFLICT needs a WHERE on the SELECT
+_BUMP_DAY = """
+    INSERT INTO meal_day_versions (date, version)
+    SELECT {day}, (SELECT COALESCE(MAX(version), 0) + 1 FROM meal_day_versions)
+    WHERE {condition}
+    ON CONFLICT (date) DO UPDATE SET version = excluded.version;
+"""
+
+# Triggers and backfill reference meals, which has to exist first
+MealDayVersion.__table__.add_is_dependent_on(Meal.__table__)
+
+for statement in (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_day_versions_after_insert AFTER INSERT ON meals
+    BEGIN
+        {_BUMP_DAY.format(day="NEW.date", condition="1")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_day_versions_after_update AFTER UPDATE ON meals
+    BEGIN
+        {_BUMP_DAY.format(day="NEW.date", condition="1")}
+        {_BUMP_DAY.format(day="OLD.date", condition="OLD.date != NEW.date")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_day_versions_after_delete AFTER DELETE ON meals
+    BEGIN
+        {_BUMP_DAY.format(day="OLD.date", condition="1")}
+    END
+    """,
+    # Backfill databases created before the version table existed
+    """
+    INSERT OR IGNORE INTO meal_day_versions (date, version)
+    SELECT DISTINCT date, 1 FROM meals
+    """,
+):
+    event.listen(MealDayVersion.__table__, "after_create", DDL(statement))
+
+
+class MealNameStats(Base):
+    """Usage summary per normalized meal name, for "what do we eat most" questions.
+
+    Maintained by SQLite triggers on ``meals``: counts move by one per write
+    and dates are re-read through an expression index on the normalized
+    name, so no write scans the meals table. ``name`` is the spelling used by
+    the latest meal. ``app.stats`` rebuilds and verifies the table.
+    """
+
+    __tablename__ = "meal_name_stats"
+
+    name_norm = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    count = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False, index=True)
+    breakfast_count = Column(Integer, nullable=False)
+    lunch_count = Column(Integer, nullable=False)
+    dinner_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_meal_name_stats_count", "count"),
+    )
+
+
+# Summary rows computed from scratch; used for the backfill, rebuilds and checks
+MEAL_NAME_STATS_SELECT = """
+    SELECT
+        lower(trim(m.name)) AS name_norm,
+        (SELECT latest.name FROM meals AS latest
+         WHERE lower(trim(latest.name)) = lower(trim(m.name))
+         ORDER BY latest.date DESC, latest.id DESC LIMIT 1) AS name,
+        count(*) AS count,
+        min(m.date) AS first_date,
+        max(m.date) AS last_date,
+        sum(m.meal_type = 'breakfast') AS breakfast_count,
+        sum(m.meal_type = 'lunch') AS lunch_count,
+        sum(m.meal_type = 'dinner') AS dinner_count
+    FROM meals AS m
+    GROUP BY lower(trim(m.name))
+"""
+
+# Move one meal into (sign +1) or out of (sign -1) the summary row of its name
+_COUNT_MEAL = """
+    INSERT INTO meal_name_stats (
+        name_norm, name, count, first_date, last_date,
+        breakfast_count, lunch_count, dinner_count
+    )
+    VALUES (lower(trim({row}.name)), {row}.name, 0, {row}.date, {row}.date, 0, 0, 0)
+    ON CONFLICT (name_norm) DO NOTHING;
+    UPDATE meal_name_stats SET
+        count = count {sign} 1,
+        breakfast_count = breakfast_count {sign} ({row}.meal_type = 'breakfast'),
+        lunch_count = lunch_count {sign} ({row}.meal_type = 'lunch'),
+        dinner_count = dinner_count {sign} ({row}.meal_type = 'dinner'),
+        first_date = coalesce((SELECT min(date) FROM meals
+                               WHERE lower(trim(name)) = lower(trim({row}.name))), first_date),
+        last_date = coalesce((SELECT max(date) FROM meals
+                              WHERE lower(trim(name)) = lower(trim({row}.name))), last_date),
+        name = coalesce((SELECT name FROM meals
+                         WHERE lower(trim(name)) = lower(trim({row}.name))
+                         ORDER BY date DESC, id DESC LIMIT 1), name)
+    WHERE name_norm = lower(trim({row}.name));
+    DELETE FROM meal_name_stats WHERE name_norm = lower(trim({row}.name)) AND count <= 0;
+"""
+
+# Triggers and backfill reference meals, which has to exist first
+MealNameStats.__table__.add_is_dependent_on(Meal.__table__)
+
+for statement in (
+    # Lets the triggers find a name's first, last and latest meal without a scan;
+    # created here so databases whose meals table predates it get it too
+    """
+    CREATE INDEX IF NOT EXISTS ix_meals_name_norm_date ON meals (lower(trim(name)), date)
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_name_stats_after_insert AFTER INSERT ON meals
+    BEGIN
+        {_COUNT_MEAL.format(row="NEW", sign="+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_name_stats_after_update
+    AFTER UPDATE OF name, date, meal_type ON meals
+    BEGIN
+        {_COUNT_MEAL.format(row="OLD", sign="-")}
+        {_COUNT_MEAL.format(row="NEW", sign="+")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS meal_name_stats_after_delete AFTER DELETE ON meals
+    BEGIN
+        {_COUNT_MEAL.format(row="OLD", sign="-")}
+    END
+    """,
+    # Backfill databases created before the summary table existed
+    f"INSERT OR IGNORE INTO meal_name_stats {MEAL_NAME_STATS_SELECT}",
+):
+    event.listen(MealNameStats.__table__, "after_create", DDL(statement))
+
+# Full-text index over meal names and ingredients. FTS5 virtual tables cannot be
+# declared through the ORM, so it is created next to the mapped tables and kept
+# in sync by triggers. Ingredients are indexed as decoded text, not raw JSON.
+meals_fts = table("meals_fts", column("rowid"), column("name"), column("ingredients"))
+
+_FTS_ROW_OF = """
+    {meal}.id,
+    {meal}.name,
+    (SELECT group_concat(j.value, ' ') FROM json_each({meal}.ingredients) AS j
+     WHERE j.type = 'text')
+"""
+
+_FTS_STATEMENTS = (
+    """
+    CREATE VIRTUAL TABLE meals_fts USING fts5(
+        name, ingredients, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER meals_fts_after_insert AFTER INSERT ON meals
+    BEGIN
+        INSERT INTO meals_fts (rowid, name, ingredients) VALUES ({_FTS_ROW_OF.format(meal="NEW")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER meals_fts_after_update AFTER UPDATE OF name, ingredients ON meals
+    BEGIN
+        DELETE FROM meals_fts WHERE rowid = OLD.id;
+        INSERT INTO meals_fts (rowid, name, ingredients) VALUES ({_FTS_ROW_OF.format(meal="NEW")});
+    END
+    """,
+    """
+    CREATE TRIGGER meals_fts_after_delete AFTER DELETE ON meals
+    BEGIN
+        DELETE FROM meals_fts WHERE rowid = OLD.id;
+    END
+    """,
+    # Backfill databases created before the search index existed
+    f"""
+    INSERT INTO meals_fts (rowid, name, ingredients)
+    SELECT {_FTS_ROW_OF.format(meal="m")} FROM meals AS m
+    """,
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_meals_fts(target, connection, **kw):
+    """Create and backfill the full-text index if it does not exist yet."""
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meals_fts'"
+    ).first()
+    if exists:
+        return
+    for statement in _FTS_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_meals_fts(target, connection, **kw):
+    """Drop the full-text index together with the mapped tables."""
+    connection.exec_driver_sql("DROP TABLE IF EXISTS meals_fts")
@@ -0,0 +1,204 @@
+"""Opt-in per-request SQL profiler.
+
+With ``MEAL_SQL_PROFILER`` set to "headers" (development) or "log"
+(production) every statement a request runs is counted and timed.
+Statements slower than ``MEAL_SLOW_QUERY_MS`` are captured with their
+EXPLAIN QUERY PLAN, so a query that falls back to a table scan shows up
+with the plan that explains it. A statement repeated
+``MEAL_REPEATED_QUERY_LIMIT`` times or more in one request is reported as a
+likely N+1. Requests with findings are always logged as a JSON warning. In
+"headers" mode the totals also go out as X-SQL-* and Server-Timing
+response headers. In "log" mode every request gets an info line.
+"""
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Self
+
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+PROFILER_MODES = ("off", "headers", "log")
+
+_EXPLAINABLE = frozenset({"SELECT", "WITH", "INSERT", "UPDATE", "DELETE"})
+
+# Expanded IN lists differ only in their number of placeholders
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    """Statements run while serving one request."""
+
+    statements: list[tuple[str, float]] = field(default_factory=list)
+    slow: list[dict] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(seconds for _, seconds in self.statements) * 1000
+
+    def repeated(self, limit: int) -> list[tuple[str, int]]:
+        """Statements run at least `limit` times, most repeated first."""
+        counts = Counter(_IN_LIST.sub("(?)", sql) for sql, _ in self.statements)
+        return [(sql, count) for sql, count in counts.most_common() if count >= limit]
+
+
+# The profile of the request being served, seen by the engine events in the
+# threadpool (and greenlets) that run the request's session
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+
+
+class SQLProfiler:
+    """Per-request statement timing, slow statement plans and N+1 detection."""
+
+    def __init__(self, mode: str = "off", slow_ms: float = 100.0, repeat_limit: int = 5):
+        if mode not in PROFILER_MODES:
+            raise ValueError(
+                f"Unknown MEAL_SQL_PROFILER {mode!r}, expected one of {list(PROFILER_MODES)}"
+            )
+        self.mode = mode
+        self.slow_ms = slow_ms
+        self.repeat_limit = repeat_limit
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> Self:
+        """Build a profiler from the MEAL_SQL_PROFILER and related environment variables."""
+        return cls(
+            mode=environ.get("MEAL_SQL_PROFILER", "off").lower(),
+            slow_ms=float(environ.get("MEAL_SLOW_QUERY_MS", "100")),
+            repeat_limit=int(environ.get("MEAL_REPEATED_QUERY_LIMIT", "5")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Record the engine's statements into the profile of the current request."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            if _current_profile.get() is not None:
+                conn.info["profiler_started"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def stop_timer(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop("profiler_started", None)
+            profile = _current_profile.get()
+            if started is None or profile is None:
+                return
+            seconds = time.perf_counter() - started
+            profile.statements.append((statement, seconds))
+            if seconds * 1000 >= self.slow_ms:
+                profile.slow.append({
+                    "sql": statement,
+                    "ms": round(seconds * 1000, 3),
+                    "plan": _explain(conn, statement, parameters, executemany),
+                })
+
+        @event.listens_for(engine, "handle_error")
+        def record_failure(context):
+            # A statement that raised (e.g. a unique conflict) still ran and counts
+            if context.connection is None or context.statement is None:
+                return
+            started = context.connection.info.pop("profiler_started", None)
+            profile = _current_profile.get()
+            if started is not None and profile is not None:
+                profile.statements.append((context.statement, time.perf_counter() - started))
+
+    def headers(self, profile: RequestProfile) -> dict[str, str]:
+        """Response headers summarizing the statements run so far."""
+        total_ms = f"{profile.total_ms:.3f}"
+        return {
+            "X-SQL-Count": str(len(profile.statements)),
+            "X-SQL-Time-Ms": total_ms,
+            "X-SQL-Slow": str(len(profile.slow)),
+            "X-SQL-Repeated": str(len(profile.repeated(self.repeat_limit))),
+            "Server-Timing": f'db;dur={total_ms};desc="{len(profile.statements)} statements"',
+        }
+
+    def report(self, scope, status: int, profile: RequestProfile) -> None:
+        """Log the request's profile: a warning with findings, else info in log mode."""
+        repeated = profile.repeated(self.repeat_limit)
+        findings = bool(profile.slow or repeated)
+        if not findings and self.mode != "log":
+            return
+        route = getattr(scope.get("route"), "path", None)
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "statements": len(profile.statements),
+            "sql_ms": round(profile.total_ms, 3),
+            "slow": profile.slow,
+            "repeated": [{"sql": sql, "count": count} for sql, count in repeated],
+        }
+        logger.log(logging.WARNING if findings else logging.INFO, json.dumps(record))
+
+
+class SQLProfilerMiddleware:
+    """ASGI middleware that profiles the SQL of each request.
+
+    Headers are written when the response starts, so statements a streamed
+    body runs afterwards are only in the log record.
+    """
+
+    def __init__(self, app, profiler: SQLProfiler | None = None):
+        self.app = app
+        self.profiler = profiler or sql_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        # Stays 500 when the app raises before sending a response
+        status = 500
+
+        async def send_with_profile(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.profiler.mode == "headers":
+                    headers = MutableHeaders(scope=message)
+                    for name, value in self.profiler.headers(profile).items():
+                        headers.append(name, value)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current_profile.reset(token)
+            self.profiler.report(scope, status, profile)
+
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> list[str]:
+    """EXPLAIN QUERY PLAN of a statement as its detail lines, empty where unsupported."""
+    words = statement.split(None, 1)
+    if conn.dialect.name != "sqlite" or not words or words[0].upper() not in _EXPLAINABLE:
+        return []
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    # A raw DBAPI cursor, so the EXPLAIN is neither timed nor profiled itself
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in cursor.fetchall()]
+    except conn.dialect.loaded_dbapi.Error:
+        logger.debug("EXPLAIN QUERY PLAN failed for %s", statement, exc_info=True)
+        return []
+    finally:
+        cursor.close()
+
+
+sql_profiler = SQLProfiler.from_env()
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ..cache import meal_cache
+from ..database import (
+    SQLITE_PRAGMA_NAMES,
+    SQLITE_PRAGMAS,
+    SQLITE_PROFILE,
+    SessionRoute,
+    get_read_db,
+)
+
+router = APIRouter(prefix="/api/diagnostics", tags=["diagnostics"], route_class=SessionRoute)
+
+
+@router.get("/sqlite")
+def sqlite_settings(db: Session = Depends(get_read_db)):
+    """Show the configured SQLite profile and the pragmas in effect on a live connection.
+
+    The connection comes from the read pool, so polling this never makes
+    writes wait for the single write connection.
+    """
+    connection = db.connection()
+    effective = {
+        name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        for name in SQLITE_PRAGMA_NAMES
+    }
+    return {
+        "profile": SQLITE_PROFILE,
+        "configured": SQLITE_PRAGMAS,
+        "effective": effective,
+        "sqlite_version": connection.exec_driver_sql("SELECT sqlite_version()").scalar(),
+    }
+
+
+@router.get("/cache")
+def cache_stats():
+    """Show hit, miss and eviction counters of the date-range cache."""
+    return meal_cache.stats()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..database import SessionRoute, get_read_db
+from ..ingredients import ingredient_index
+from ..schemas import IngredientSuggestion
+from ..watcher import write_watcher
+
+router = APIRouter(prefix="/api/ingredients", tags=["ingredients"], route_class=SessionRoute)
+
+
+@router.get("/suggest", response_model=list[IngredientSuggestion])
+def suggest_ingredients(
+    prefix: str = Query(..., min_length=1, description="Start of the ingredient being typed"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    db: Session = Depends(get_read_db),
+):
+    """Suggest existing ingredients for a prefix, most used first.
+
+    Served from an in-memory index, fast enough to call on every keystroke.
+    Suggestions are normalized like the ingredient search.
+    """
+    write_watcher.check(db)
+    return [
+        IngredientSuggestion(ingredient=ingredient, count=count)
+        for ingredient, count in ingredient_index.suggest(prefix, limit)
+    ]
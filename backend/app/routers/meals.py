@@ -1,130 +1,223 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError
+from fastapi import APIRouter, Depends, File, Header, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import Meal
-from ..schemas import MealCopy, MealCreate, MealResponse, MealUpdate
-
-router = APIRouter(prefix="/api/meals", tags=["meals"])
-
-
-@router.get("/search", response_model=list[MealResponse])
+from .. import crud
+from ..broadcast import change_broadcaster
+from ..database import SessionRoute, get_db, get_read_db
+from ..group_commit import group_commit
+from ..schemas import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    FileFormat,
+    ImportConflictPolicy,
+    MealBatchCreate,
+    MealBatchResponse,
+    MealCopy,
+    MealCopyMany,
+    MealCopyRange,
+    MealCopyResult,
+    MealCreate,
+    MealImportResult,
+    MealPage,
+    MealResponse,
+    MealType,
+    MealUpdate,
+)
+
+router = APIRouter(prefix="/api/meals", tags=["meals"], route_class=SessionRoute)
+
+# Reads use the read-only pool (get_read_db); everything that writes goes
+# through the single writer connection (get_db).
+
+
+def _write(db: Session, stage: crud.Stage, *args):
+    """Run a single-meal write, batched with concurrent ones when group commit is on."""
+    if group_commit.enabled:
+        return group_commit.submit(stage, *args)
+    return crud.commit_staged(db, stage, *args)
+
+
+@router.get("/search", response_model=list[MealResponse] | MealPage)
 def search_meals_by_ingredient(
     ingredient: str = Query(..., min_length=1, description="Ingredient to search for"),
-    db: Session = Depends(get_db)
+    limit: int | None = Query(
+        None, ge=1, le=100, description="Page size; returns a page with next_cursor"
+    ),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Search for meals containing a specific ingredient (exact match, case-insensitive).
+
+    Without limit or cursor the latest 10 matches are returned as a plain list.
+    """
+    page = crud.search_meals_by_ingredient(db, ingredient, limit or 10, cursor)
+    if limit is None and cursor is None:
+        return page.items
+    return page
+
+
+@router.get("/search/text", response_model=MealPage)
+def search_meals_by_text(
+    q: str = Query(..., min_length=1, description="Words to search for in names and ingredients"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: Session = Depends(get_read_db)
 ):
-    """Search for meals containing a specific ingredient (exact match, case-insensitive)."""
-    # Get meal IDs that contain the ingredient using json_each
-    stmt = text("""
-        SELECT DISTINCT m.id
-        FROM meals m, json_each(m.ingredients) AS j
-        WHERE LOWER(j.value) = LOWER(:ingredient)
-        ORDER BY m.date DESC
-        LIMIT 10
-    """)
-    result = db.execute(stmt, {"ingredient": ingredient.strip()})
-    meal_ids = [row[0] for row in result.fetchall()]
-    
-    if not meal_ids:
-        return []
-    
-    # Fetch full Meal objects using ORM for proper serialization
-    meals = db.query(Meal).filter(Meal.id.in_(meal_ids)).all()
-    # Re-sort by date descending since IN doesn't preserve order
-    meals.sort(key=lambda m: m.date, reverse=True)
-    return meals
-
-
-@router.get("", response_model=list[MealResponse])
+    """Full-text search over meal names and ingredients, best matches first.
+
+    Every word is matched as a prefix, so partially typed words already match.
+    """
+    return crud.search_meals_by_text(db, q, limit, cursor)
+
+
+@router.get("", response_model=list[MealResponse] | MealPage)
 def get_meals(
+    request: Request,
     start_date: date = Query(..., description="Start date (inclusive)"),
     end_date: date = Query(..., description="End date (inclusive)"),
-    db: Session = Depends(get_db)
+    limit: int | None = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a page with next_cursor"
+    ),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Get all meals within a date range.
+
+    Responses carry a weak ETag; a matching If-None-Match returns 304.
+    With limit or cursor one page is returned instead, ordered by date,
+    meal type and id; long ranges must be read this way.
+    """
+    if limit is None and cursor is None:
+        return crud.get_meals_response(
+            db, start_date, end_date, request.headers.get("if-none-match")
+        )
+    return crud.get_meals_page(
+        db, start_date, end_date, limit or DEFAULT_PAGE_SIZE, cursor
+    )
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_meal_changes(
+    start_date: date | None = Query(None, description="Only changes on or after this date"),
+    end_date: date | None = Query(None, description="Only changes on or before this date"),
+    last_event_id: str | None = Header(None, description="Resume after this event"),
+):
+    """Server-Sent Events of meal changes as they are committed.
+
+    Each event is named created, updated or deleted and carries the meal's
+    id, date and meal_type. A reset event means changes were missed and
+    the range should be fetched again. Runs on the event loop, so open
+    streams don't occupy threads.
+    """
+    return StreamingResponse(
+        change_broadcaster.stream(start_date, end_date, last_event_id),
+        media_type="text/event-stream",
+        # Proxies such as nginx must pass events on instead of buffering them
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export")
+def export_meals(
+    export_format: FileFormat = Query("ndjson", alias="format", description="ndjson or csv"),
+    start_date: date | None = Query(None, description="Start date (inclusive)"),
+    end_date: date | None = Query(None, description="End date (inclusive)"),
+    gzip: bool = Query(False, description="Gzip the export on the fly"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all meals within a date range."""
-    meals = db.query(Meal).filter(
-        Meal.date >= start_date,
-        Meal.date <= end_date
-    ).order_by(Meal.date, Meal.meal_type).all()
-    return meals
+    """Stream the meal history, oldest first, as a file download.
+
+    Rows are read and sent in batches, so any amount of history exports
+    in constant memory.
+    """
+    return crud.export_meals(db, export_format, start_date, end_date, gzip)
 
 
 @router.post("", response_model=MealResponse, status_code=201)
 def create_meal(meal: MealCreate, db: Session = Depends(get_db)):
     """Create a new meal."""
-    db_meal = Meal(
-        date=meal.date,
-        meal_type=meal.meal_type,
-        name=meal.name,
-        ingredients=meal.ingredients
-    )
-    try:
-        db.add(db_meal)
-        db.commit()
-        db.refresh(db_meal)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=409,
-            detail=f"A meal already exists for {meal.date} - {meal.meal_type}"
-        ) from None
+    return _write(db, crud.stage_create_meal, meal)
+
+
+@router.post("/batch", response_model=MealBatchResponse)
+def create_meals_batch(batch: MealBatchCreate, db: Session = Depends(get_db)):
+    """Create many meals in a single transaction.
+
+    Each item is reported as created, overwritten, conflict or invalid.
+    ``on_conflict`` decides what happens when a date/meal type slot is taken:
+    ``skip`` leaves the existing meal, ``overwrite`` replaces it and ``fail``
+    writes nothing if any item conflicts or is invalid.
+    """
+    return crud.create_meals_batch(db, batch)
+
+
+@router.post("/import", response_model=MealImportResult)
+def import_meals(
+    file: UploadFile = File(..., description="NDJSON or CSV file, optionally gzipped"),
+    import_format: FileFormat | None = Query(
+        None, alias="format", description="ndjson or csv; guessed from the file name if omitted"
+    ),
+    on_conflict: ImportConflictPolicy = Query("skip", description="skip or overwrite"),
+    db: Session = Depends(get_db)
+):
+    """Import meals from an NDJSON or CSV file, e.g. an export or a spreadsheet.
+
+    Rows are validated like single creates and written in chunked
+    transactions; the summary lists rejected rows by file line.
+    """
+    file_format = import_format or crud.file_format_of(file.filename)
+    return crud.import_meals(db, file.file, file_format, on_conflict)
+
+
+@router.put("/slot/{day}/{meal_type}", response_model=MealResponse)
+def set_meal_slot(
+    day: date,
+    meal_type: MealType,
+    meal: MealUpdate,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Create or replace the meal in a date/meal type slot in one request.
+
+    Returns 201 if the slot was empty and 200 if its meal was replaced.
+    """
+    db_meal, created = crud.set_meal_slot(db, day, meal_type, meal)
+    response.status_code = 201 if created else 200
     return db_meal
 
 
 @router.put("/{meal_id}", response_model=MealResponse)
 def update_meal(meal_id: int, meal: MealUpdate, db: Session = Depends(get_db)):
     """Update an existing meal."""
-    db_meal = db.query(Meal).filter(Meal.id == meal_id).first()
-    if not db_meal:
-        raise HTTPException(status_code=404, detail="Meal not found")
-    
-    db_meal.name = meal.name
-    db_meal.ingredients = meal.ingredients
-    db.commit()
-    db.refresh(db_meal)
-    return db_meal
+    return _write(db, crud.stage_update_meal, meal_id, meal)
 
 
 @router.delete("/{meal_id}", status_code=204)
 def delete_meal(meal_id: int, db: Session = Depends(get_db)):
     """Delete a meal."""
-    db_meal = db.query(Meal).filter(Meal.id == meal_id).first()
-    if not db_meal:
-        raise HTTPException(status_code=404, detail="Meal not found")
-    
-    db.delete(db_meal)
-    db.commit()
+    _write(db, crud.stage_delete_meal, meal_id)
     return None
 
 
 @router.post("/{meal_id}/copy", response_model=MealResponse, status_code=201)
 def copy_meal(meal_id: int, copy_data: MealCopy, db: Session = Depends(get_db)):
     """Copy an existing meal to a different date and/or meal type."""
-    source_meal = db.query(Meal).filter(Meal.id == meal_id).first()
-    if not source_meal:
-        raise HTTPException(status_code=404, detail="Source meal not found")
-    
-    new_meal = Meal(
-        date=copy_data.target_date,
-        meal_type=copy_data.target_meal_type,
-        name=source_meal.name,
-        ingredients=source_meal.ingredients or []
-    )
-    
-    try:
-        db.add(new_meal)
-        db.commit()
-        db.refresh(new_meal)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(
-            status_code=409,
-            detail=f"A meal already exists for {copy_data.target_date} - "
-            f"{copy_data.target_meal_type}",
-        ) from None
-
-    return new_meal
+    return _write(db, crud.stage_copy_meal, meal_id, copy_data)
+
+
+@router.post("/copy-range", response_model=MealCopyResult)
+def copy_meal_range(copy_range: MealCopyRange, db: Session = Depends(get_db)):
+    """Copy every meal in a date range so that the copy starts at target_start.
+
+    The copy runs as a single INSERT ... SELECT with the dates shifted inside SQLite.
+    """
+    return crud.copy_meal_range(db, copy_range)
+
+
+@router.post("/{meal_id}/copy-many", response_model=MealCopyResult)
+def copy_meal_many(meal_id: int, copy_data: MealCopyMany, db: Session = Depends(get_db)):
+    """Copy an existing meal to every combination of the given dates and meal types."""
+    return crud.copy_meal_many(db, meal_id, copy_data)
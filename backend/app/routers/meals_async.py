@@ -0,0 +1,155 @@
+"""Async variants of the meal endpoints, enabled with ASYNC_DATABASE=true.
+
+Handlers run on the event loop and execute the shared queries in ``crud``
+on an ``AsyncSession`` through ``run_sync``, so no request occupies a
+threadpool slot. Included ahead of the sync router so these routes win;
+endpoints without an async variant fall through to the sync router.
+"""
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud
+from ..database import get_async_db
+from ..schemas import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    MealBatchCreate,
+    MealBatchResponse,
+    MealCopy,
+    MealCopyMany,
+    MealCopyRange,
+    MealCopyResult,
+    MealCreate,
+    MealPage,
+    MealResponse,
+    MealType,
+    MealUpdate,
+)
+
+router = APIRouter(prefix="/api/meals", tags=["meals"])
+
+
+@router.get("/search", response_model=list[MealResponse] | MealPage)
+async def search_meals_by_ingredient(
+    ingredient: str = Query(..., min_length=1, description="Ingredient to search for"),
+    limit: int | None = Query(
+        None, ge=1, le=100, description="Page size; returns a page with next_cursor"
+    ),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search for meals containing a specific ingredient (exact match, case-insensitive).
+
+    Without limit or cursor the latest 10 matches are returned as a plain list.
+    """
+    page = await db.run_sync(crud.search_meals_by_ingredient, ingredient, limit or 10, cursor)
+    if limit is None and cursor is None:
+        return page.items
+    return page
+
+
+@router.get("/search/text", response_model=MealPage)
+async def search_meals_by_text(
+    q: str = Query(..., min_length=1, description="Words to search for in names and ingredients"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search over meal names and ingredients, best matches first."""
+    return await db.run_sync(crud.search_meals_by_text, q, limit, cursor)
+
+
+@router.get("", response_model=list[MealResponse] | MealPage)
+async def get_meals(
+    request: Request,
+    start_date: date = Query(..., description="Start date (inclusive)"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    limit: int | None = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a page with next_cursor"
+    ),
+    cursor: str | None = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all meals within a date range.
+
+    Responses carry a weak ETag; a matching If-None-Match returns 304.
+    With limit or cursor one page is returned instead, ordered by date,
+    meal type and id; long ranges must be read this way.
+    """
+    if limit is None and cursor is None:
+        return await db.run_sync(
+            crud.get_meals_response, start_date, end_date, request.headers.get("if-none-match")
+        )
+    return await db.run_sync(
+        crud.get_meals_page, start_date, end_date, limit or DEFAULT_PAGE_SIZE, cursor
+    )
+
+
+@router.post("", response_model=MealResponse, status_code=201)
+async def create_meal(meal: MealCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new meal."""
+    return await db.run_sync(crud.create_meal, meal)
+
+
+@router.post("/batch", response_model=MealBatchResponse)
+async def create_meals_batch(batch: MealBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create many meals in a single transaction."""
+    return await db.run_sync(crud.create_meals_batch, batch)
+
+
+@router.put("/slot/{day}/{meal_type}", response_model=MealResponse)
+async def set_meal_slot(
+    day: date,
+    meal_type: MealType,
+    meal: MealUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create or replace the meal in a date/meal type slot in one request.
+
+    Returns 201 if the slot was empty and 200 if its meal was replaced.
+    """
+    db_meal, created = await db.run_sync(crud.set_meal_slot, day, meal_type, meal)
+    response.status_code = 201 if created else 200
+    return db_meal
+
+
+@router.put("/{meal_id}", response_model=MealResponse)
+async def update_meal(
+    meal_id: int, meal: MealUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    """Update an existing meal."""
+    return await db.run_sync(crud.update_meal, meal_id, meal)
+
+
+@router.delete("/{meal_id}", status_code=204)
+async def delete_meal(meal_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a meal."""
+    await db.run_sync(crud.delete_meal, meal_id)
+    return None
+
+
+@router.post("/{meal_id}/copy", response_model=MealResponse, status_code=201)
+async def copy_meal(
+    meal_id: int, copy_data: MealCopy, db: AsyncSession = Depends(get_async_db)
+):
+    """Copy an existing meal to a different date and/or meal type."""
+    return await db.run_sync(crud.copy_meal, meal_id, copy_data)
+
+
+@router.post("/copy-range", response_model=MealCopyResult)
+async def copy_meal_range(
+    copy_range: MealCopyRange, db: AsyncSession = Depends(get_async_db)
+):
+    """Copy every meal in a date range so that the copy starts at target_start."""
+    return await db.run_sync(crud.copy_meal_range, copy_range)
+
+
+@router.post("/{meal_id}/copy-many", response_model=MealCopyResult)
+async def copy_meal_many(
+    meal_id: int, copy_data: MealCopyMany, db: AsyncSession = Depends(get_async_db)
+):
+    """Copy an existing meal to every combination of the given dates and meal types."""
+    return await db.run_sync(crud.copy_meal_many, meal_id, copy_data)
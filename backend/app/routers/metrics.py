@@ -0,0 +1,36 @@
+from anyio import to_thread
+from fastapi import APIRouter, Response
+
+from ..broadcast import change_broadcaster
+from ..cache import meal_cache
+from ..metrics import CONTENT_TYPE, metrics
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+
+@router.get("/metrics", response_class=Response)
+async def prometheus_metrics():
+    """Request, SQL, connection pool, threadpool and cache metrics for Prometheus.
+
+    Async so it runs on the event loop, where the threadpool that serves the
+    sync routes can be inspected, and so a saturated pool cannot block it.
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    cache = meal_cache.stats()
+    extra = [
+        ("threadpool_capacity", "gauge", "Worker threads available to sync routes.",
+         limiter.total_tokens),
+        ("threadpool_in_use", "gauge", "Worker threads currently busy.",
+         limiter.borrowed_tokens),
+        ("threadpool_waiting", "gauge", "Calls queued for a worker thread.",
+         limiter.statistics().tasks_waiting),
+        ("meal_cache_entries", "gauge", "Date ranges in the response cache.", cache["entries"]),
+        ("meal_cache_bytes", "gauge", "Bytes held by the response cache.", cache["bytes"]),
+        ("meal_cache_hits_total", "counter", "Response cache hits.", cache["hits"]),
+        ("meal_cache_misses_total", "counter", "Response cache misses.", cache["misses"]),
+        ("meal_stream_subscribers", "gauge", "Open change streams.",
+         change_broadcaster.subscribers),
+        ("meal_stream_resets_total", "counter", "Resets sent to streams that fell behind.",
+         change_broadcaster.resets),
+    ]
+    return Response(metrics.render(extra), media_type=CONTENT_TYPE)
@@ -0,0 +1,23 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..database import SessionRoute, get_read_db
+from ..schemas import ShoppingListItem
+
+router = APIRouter(prefix="/api/shopping-list", tags=["shopping-list"], route_class=SessionRoute)
+
+
+@router.get("", response_model=list[ShoppingListItem])
+def get_shopping_list(
+    start_date: date = Query(..., description="Start date (inclusive)"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    db: Session = Depends(get_read_db)
+):
+    """Ingredients needed for a date range, with how often and where each is used.
+
+    Ingredients are matched case-insensitively and listed in lower case.
+    """
+    return crud.get_shopping_list(db, start_date, end_date)
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..database import SessionRoute, get_read_db
+from ..schemas import MealStats, MealStatsSort
+
+router = APIRouter(prefix="/api/stats", tags=["stats"], route_class=SessionRoute)
+
+
+@router.get("/meals", response_model=list[MealStats])
+def get_meal_stats(
+    sort: MealStatsSort = Query("count", description="count, last_date or name"),
+    name: str | None = Query(None, min_length=1, description="Only this meal (case-insensitive)"),
+    not_eaten_for_days: int | None = Query(
+        None, ge=0, description="Only meals last planned more than this many days ago"
+    ),
+    limit: int = Query(20, ge=1, le=500, description="Maximum number of meals"),
+    db: Session = Depends(get_read_db)
+):
+    """How often and when each meal was planned, e.g. the most common meals,
+    when a meal was last planned, or meals not planned for a while.
+    """
+    not_since = None
+    if not_eaten_for_days is not None:
+        not_since = date.today() - timedelta(days=not_eaten_for_days)
+    return crud.get_meal_stats(db, sort, name, not_since, limit)
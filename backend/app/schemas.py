@@ -1,11 +1,21 @@
 from datetime import date
-from typing import Literal
+from typing import Any, Literal, Self
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 MealType = Literal["breakfast", "lunch", "dinner"]
+ConflictPolicy = Literal["skip", "overwrite", "fail"]
+FileFormat = Literal["ndjson", "csv"]
+MealStatsSort = Literal["count", "last_date", "name"]
+ImportConflictPolicy = Literal["skip", "overwrite"]
 
 MAX_INGREDIENTS = 10
+MAX_BATCH_SIZE = 500
+MAX_COPY_DAYS = 366
+MAX_UNPAGINATED_DAYS = 366
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_IMPORT_ERRORS = 100
 
 
 def clean_ingredients(ingredients: list[str] | None) -> list[str]:
@@ -66,6 +76,38 @@ class MealCopy(BaseModel):
     target_meal_type: MealType
 
 
+class MealCopyRange(BaseModel):
+    """Schema for copying every meal in a date range to a range starting elsewhere."""
+    source_start: date
+    source_end: date
+    target_start: date
+    on_conflict: ConflictPolicy = "skip"
+
+    @model_validator(mode='after')
+    def validate_range(self) -> Self:
+        if self.source_end < self.source_start:
+            raise ValueError('source_end must not be before source_start')
+        if (self.source_end - self.source_start).days >= MAX_COPY_DAYS:
+            raise ValueError(f'Maximum {MAX_COPY_DAYS} days can be copied at once')
+        if self.target_start == self.source_start:
+            raise ValueError('target_start must differ from source_start')
+        return self
+
+
+class MealCopyMany(BaseModel):
+    """Schema for copying one meal to every combination of dates and meal types."""
+    target_dates: list[date] = Field(..., min_length=1, max_length=MAX_COPY_DAYS)
+    target_meal_types: list[MealType] = Field(..., min_length=1)
+    on_conflict: ConflictPolicy = "skip"
+
+
+class MealCopyResult(BaseModel):
+    """Schema for the outcome of a multi-meal copy."""
+    copied: int
+    skipped: int
+    overwritten: int
+
+
 class MealResponse(MealBase):
     """Schema for meal response."""
     id: int
@@ -74,3 +116,89 @@ class MealResponse(MealBase):
     ingredients: list[str] = []
     
     model_config = {"from_attributes": True}
+
+
+class MealPage(BaseModel):
+    """Schema for one page of meals; pass next_cursor back to get the next page."""
+    items: list[MealResponse]
+    next_cursor: str | None = None
+
+
+class ShoppingListMeal(BaseModel):
+    """A meal that uses a shopping list ingredient."""
+    id: int
+    date: date
+    meal_type: MealType
+    name: str
+
+
+class ShoppingListItem(BaseModel):
+    """One normalized ingredient of a date range with the meals that need it."""
+    ingredient: str
+    count: int
+    dates: list[date]
+    meals: list[ShoppingListMeal]
+
+
+class IngredientSuggestion(BaseModel):
+    """An existing ingredient matching a typed prefix."""
+    ingredient: str
+    count: int
+
+
+class MealStats(BaseModel):
+    """How often and when a meal (by normalized name) was planned."""
+    name: str
+    count: int
+    first_date: date
+    last_date: date
+    breakfast_count: int
+    lunch_count: int
+    dinner_count: int
+
+    model_config = {"from_attributes": True}
+
+
+class MealBatchCreate(BaseModel):
+    """Schema for creating many meals in one request.
+
+    Items are validated one by one so a single bad item is reported
+    instead of rejecting the whole batch.
+    """
+    items: list[dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    on_conflict: ConflictPolicy = "skip"
+
+
+class MealBatchItemResult(BaseModel):
+    """Outcome of a single batch item, in request order."""
+    index: int
+    status: Literal["created", "overwritten", "conflict", "invalid"]
+    meal: MealResponse | None = None
+    detail: str | None = None
+
+
+class MealBatchResponse(BaseModel):
+    """Schema for the result of a batch create."""
+    results: list[MealBatchItemResult]
+    created: int = 0
+    overwritten: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+
+
+class MealImportError(BaseModel):
+    """A rejected import row and the file line it came from."""
+    line: int
+    detail: str
+
+
+class MealImportResult(BaseModel):
+    """Schema for the summary of a bulk import.
+
+    Only the first MAX_IMPORT_ERRORS errors are listed; ``invalid`` counts all.
+    """
+    created: int = 0
+    overwritten: int = 0
+    skipped: int = 0
+    invalid: int = 0
+    errors: list[MealImportError] = []
@@ -0,0 +1,66 @@
+"""
+Rebuild or verify the meal name summary table from the meals table.
+
+The summary is kept current by triggers; this recomputes it from scratch,
+e.g. after restoring a backup or to check the triggers. Run from backend/:
+
+    python -m app.stats verify
+    python -m app.stats rebuild
+"""
+import argparse
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, engine
+from .migrations import migrate
+from .models import MEAL_NAME_STATS_SELECT, MealNameStats
+
+_COLUMNS = ", ".join(column.name for column in MealNameStats.__table__.columns)
+
+
+def verify(db: Session) -> list[str]:
+    """Names whose summary row differs from a fresh computation, empty if consistent."""
+    fresh = f"SELECT {_COLUMNS} FROM ({MEAL_NAME_STATS_SELECT})"
+    stored = f"SELECT {_COLUMNS} FROM meal_name_stats"
+    rows = db.execute(text(
+        f"SELECT name_norm FROM ({fresh} EXCEPT {stored})"
+        f" UNION SELECT name_norm FROM ({stored} EXCEPT {fresh})"
+        " ORDER BY name_norm"
+    ))
+    return list(rows.scalars())
+
+
+def rebuild(db: Session) -> int:
+    """Recompute the whole summary table in one transaction; returns its row count."""
+    db.execute(text("DELETE FROM meal_name_stats"))
+    db.execute(text(
+        f"INSERT INTO meal_name_stats ({_COLUMNS})"
+        f" SELECT {_COLUMNS} FROM ({MEAL_NAME_STATS_SELECT})"
+    ))
+    db.commit()
+    return db.query(MealNameStats).count()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    # A database from before the summary table gets it, backfilled, here
+    migrate(engine)
+    with SessionLocal() as db:
+        mismatched = verify(db)
+        for name in mismatched:
+            print(f"out of date: {name}")
+        if args.command == "verify":
+            print(f"{len(mismatched)} summary rows out of date")
+            sys.exit(1 if mismatched else 0)
+        rows = rebuild(db)
+        print(f"rebuilt {rows} summary rows, {len(mismatched)} were out of date")
+        sys.exit(1 if verify(db) else 0)
+
+
+if __name__ == "__main__":
+    main()
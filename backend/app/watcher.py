@@ -0,0 +1,88 @@
+"""Notice meal writes committed by other processes.
+
+Within one process the change feed keeps the range cache and the ingredient
+index current. Writes from another uvicorn worker, a CLI tool or the sqlite3
+shell never reach it. Every write to ``meals`` stamps its days with the next
+value of the global day version sequence (see ``MealDayVersion``), so a
+worker reads ``max(version)``, a single index lookup, before it answers from
+memory. When the number has moved, it re-reads only the days stamped since
+and sends a reset to the change streams that show any of them.
+"""
+import os
+import threading
+import time
+from typing import Self
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .broadcast import change_broadcaster
+from .cache import meal_cache
+from .ingredients import ingredient_index
+from .models import MealDayVersion
+
+
+class ExternalWriteWatcher:
+    """Invalidates in-memory state for days another process wrote to."""
+
+    def __init__(self, enabled: bool = False, interval: float = 0.0):
+        self.enabled = enabled
+        # Seconds between checks; 0 checks before every in-memory answer
+        self.interval = interval
+        self.seen_version = 0
+        self.refreshes = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> Self:
+        """Build a watcher from MEAL_WATCH_EXTERNAL_WRITES and MEAL_WATCH_INTERVAL.
+
+        Watching is on by default when WEB_CONCURRENCY, the worker count
+        uvicorn and gunicorn read, asks for more than one worker.
+        """
+        multi_worker = int(environ.get("WEB_CONCURRENCY", "1")) > 1
+        default = "true" if multi_worker else "false"
+        return cls(
+            enabled=environ.get("MEAL_WATCH_EXTERNAL_WRITES", default).lower()
+            in ("1", "true", "yes"),
+            interval=float(environ.get("MEAL_WATCH_INTERVAL", "0")),
+        )
+
+    def prime(self, db: Session) -> None:
+        """Start from the database's current version; call before loading caches."""
+        self.seen_version = self._latest(db)
+
+    def check(self, db: Session) -> None:
+        """Catch up with writes committed elsewhere since the last check."""
+        if not self.enabled:
+            return
+        if self.interval:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.interval
+        latest = self._latest(db)
+        if latest <= self.seen_version:
+            return
+        with self._lock:
+            seen = self.seen_version
+            if latest <= seen:
+                return
+            days = set(db.scalars(
+                select(MealDayVersion.date).where(MealDayVersion.version > seen)
+            ))
+            # Writes from this process arrive here too; invalidating them again is
+            # harmless, and a stream showing them refetches once more at most
+            meal_cache.invalidate_dates(days)
+            ingredient_index.refresh_days(db, days)
+            change_broadcaster.reset_days(days)
+            self.seen_version = latest
+            self.refreshes += 1
+
+    @staticmethod
+    def _latest(db: Session) -> int:
+        return db.scalar(select(func.max(MealDayVersion.version))) or 0
+
+
+write_watcher = ExternalWriteWatcher.from_env()
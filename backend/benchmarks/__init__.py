@@ -0,0 +1 @@
+# Benchmarks package; run modules from backend/, e.g. python -m benchmarks.async_vs_sync
@@ -0,0 +1,182 @@
+"""
+Compare requests/sec and tail latency of the sync and async request paths.
+
+Both apps serve the same seeded SQLite file in-process through httpx's ASGI
+transport, so the numbers isolate the request path (threadpool vs event
+loop) from network overhead. The response cache is off while they run, so
+every request reaches the database. Run from backend/:
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 10 100 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import meal_cache
+from app.database import (
+    SQLITE_PROFILES,
+    async_database_url,
+    configure_sqlite,
+    create_engines,
+    get_async_db,
+    get_db,
+    get_read_db,
+)
+from app.migrations import migrate
+from app.models import Meal
+from app.routers import meals, meals_async
+
+FIRST_DAY = date(2022, 1, 3)  # a Monday
+SEED_DAYS = 3 * 365
+
+# The async path's pool. The sync path uses the app's own engine pair: one
+# write connection and a read-only pool whose sessions SessionRoute gives
+# back as soon as the handler returns.
+POOL = {"pool_size": 50, "max_overflow": 0}
+
+
+def seed(url: str) -> None:
+    """Migrate a new database and fill it with three meals a day."""
+    engine = create_engine(url)
+    migrate(engine)
+    rows = [
+        {
+            "date": FIRST_DAY + timedelta(days=day),
+            "meal_type": meal_type,
+            "name": f"{meal_type.title()} {day}",
+            "ingredients": ["eggs", "flour", f"item {day % 97}"],
+        }
+        for day in range(SEED_DAYS)
+        for meal_type in ("breakfast", "lunch", "dinner")
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Meal), rows)
+    engine.dispose()
+
+
+def build_sync_app(url: str) -> FastAPI:
+    engine, read_engine = create_engines(url, SQLITE_PROFILES["performance"])
+    session_factory = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+    read_session_factory = sessionmaker(autoflush=False, bind=read_engine)
+
+    def sessions(factory):
+        def override():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return override
+
+    app = FastAPI()
+    app.include_router(meals.router)
+    app.dependency_overrides[get_db] = sessions(session_factory)
+    app.dependency_overrides[get_read_db] = sessions(read_session_factory)
+    return app
+
+
+def build_async_app(url: str) -> FastAPI:
+    engine = create_async_engine(async_database_url(url), **POOL)
+    configure_sqlite(engine.sync_engine, SQLITE_PROFILES["performance"])
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(meals_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return app
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(app: FastAPI, total_requests: int, concurrency: int) -> dict:
+    """Fire total_requests week reads from `concurrency` concurrent clients."""
+    rng = random.Random(concurrency)
+    latencies: list[float] = []
+    errors = 0
+    remaining = total_requests
+
+    # Server errors (e.g. pool timeouts) are counted, not raised
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = FIRST_DAY + timedelta(weeks=rng.randrange(SEED_DAYS // 7))
+                params = {"start_date": start, "end_date": start + timedelta(days=6)}
+                began = time.perf_counter()
+                response = await client.get("/api/meals", params=params)
+                latencies.append(time.perf_counter() - began)
+                if response.status_code != 200:
+                    errors += 1
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url)
+        apps = {"sync": build_sync_app(url), "async": build_async_app(url)}
+
+        # Only the sync path consults the cache; a warm cache would time it, not SQLite
+        cache_enabled, meal_cache.enabled = meal_cache.enabled, False
+        results = []
+        try:
+            for concurrency in args.concurrency:
+                for mode, app in apps.items():
+                    result = asyncio.run(drive(app, args.requests, concurrency))
+                    results.append({"mode": mode, **result})
+        finally:
+            meal_cache.enabled = cache_enabled
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    for r in results:
+        print(
+            f"{r['mode']:<6} {r['concurrency']:>7} {r['requests_per_sec']:>9} "
+            f"{r['p50_ms']:>9} {r['p99_ms']:>9} {r['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
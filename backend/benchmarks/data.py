@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic meal history for benchmarks.
+
+Every dish has a fixed recipe and dishes are picked with a Zipf-like skew,
+so a few meals and staple ingredients dominate while a long tail is rare,
+much like a real household. The same years and seed always produce the
+same rows.
+"""
+import random
+from collections.abc import Iterator
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from app.migrations import migrate
+from app.models import Meal
+
+# The history ends here, so generated dates do not depend on when a run starts
+LAST_DAY = date(2025, 12, 31)
+MEAL_TYPES = ("breakfast", "lunch", "dinner")
+
+# Share of slots that hold a meal; the rest of the calendar stays empty
+FILL_RATE = 0.85
+
+STAPLES = [
+    "salt", "olive oil", "onion", "garlic", "butter", "eggs", "milk", "flour",
+    "pepper", "tomato", "potato", "rice", "pasta", "cheese", "carrot", "lemon",
+    "chicken", "bread", "sugar", "parsley", "beef", "yogurt", "spinach",
+    "mushroom", "bell pepper", "cream", "basil", "beans", "lentils", "oats",
+    "honey", "banana", "apple", "ginger", "soy sauce", "chickpeas", "salmon",
+    "tofu", "zucchini", "cucumber", "avocado", "coriander", "cumin", "paprika",
+    "thyme", "rosemary", "bacon", "ham", "tuna", "broccoli",
+]
+# Long tail of rarely used ingredients
+RARE = [f"spice {index}" for index in range(250)]
+VOCABULARY = STAPLES + RARE
+
+DISHES_PER_MEAL_TYPE = 60
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> list[float]:
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def _recipes(rng: random.Random) -> dict[str, list[tuple[str, list[str]]]]:
+    """A fixed menu of dishes with their ingredients per meal type."""
+    weights = _zipf_weights(len(VOCABULARY))
+    menu = {}
+    for meal_type in MEAL_TYPES:
+        dishes = []
+        for index in range(DISHES_PER_MEAL_TYPE):
+            size = rng.randint(2, 8)
+            ingredients = list(dict.fromkeys(rng.choices(VOCABULARY, weights, k=size)))
+            dishes.append((f"{meal_type.title()} dish {index}", ingredients))
+        menu[meal_type] = dishes
+    return menu
+
+
+def generate_meals(years: int, seed: int = 0) -> Iterator[dict]:
+    """Rows for `years` of history ending on LAST_DAY, ready for an insert."""
+    rng = random.Random(seed)
+    menu = _recipes(rng)
+    dish_weights = _zipf_weights(DISHES_PER_MEAL_TYPE)
+    first_day = first_day_of(years)
+    for offset in range((LAST_DAY - first_day).days + 1):
+        day = first_day + timedelta(days=offset)
+        for meal_type in MEAL_TYPES:
+            if rng.random() >= FILL_RATE:
+                continue
+            name, ingredients = rng.choices(menu[meal_type], dish_weights)[0]
+            yield {
+                "date": day,
+                "meal_type": meal_type,
+                "name": name,
+                "ingredients": ingredients,
+            }
+
+
+def first_day_of(years: int) -> date:
+    """First day of a generated history of `years` years."""
+    return LAST_DAY - timedelta(days=365 * years - 1)
+
+
+def seed(url: str, years: int, seed: int = 0, batch_size: int = 5000) -> int:
+    """Create the schema at `url` and fill it; returns the number of meals."""
+    engine = create_engine(url)
+    migrate(engine)
+    count = 0
+    batch: list[dict] = []
+    with engine.begin() as connection:
+        for row in generate_meals(years, seed):
+            batch.append(row)
+            if len(batch) == batch_size:
+                connection.execute(insert(Meal), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.execute(insert(Meal), batch)
+            count += len(batch)
+    engine.dispose()
+    return count
@@ -0,0 +1,366 @@
+"""
+Drive a real uvicorn server with concurrent HTTP traffic.
+
+Starts ``app.main:app`` on a seeded temporary SQLite file for every
+workers x concurrency combination and fires a weighted mix of reads and
+writes at it over TCP. Reports throughput, latency percentiles and
+histograms, and error rates per endpoint, which is where threadpool
+saturation and "database is locked" errors show up.
+
+The "consistency" operation rewrites a slot and reads its week back on a
+new connection, which usually lands on another worker. A read without
+the write counts as a stale read. Run with --no-watch to see the stale
+reads that per-worker caches serve when they don't watch for writes from
+other workers. Run from backend/:
+
+    python -m benchmarks.load --workers 1 4 --concurrency 10 100 --duration 20
+    python -m benchmarks.load --mix get_meals=50,create=30,delete=20 --json
+    python -m benchmarks.load --workers 4 --mix consistency=1 --no-watch
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+import httpx
+
+from . import data
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = "get_meals=55,search=15,create=10,update=7,copy=5,delete=3,consistency=5"
+
+# The consistency check writes its own weeks, far after the seeded history
+# and the days taken by creates
+CHECK_FIRST_DAY = data.LAST_DAY + timedelta(days=36500)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        weights[name] = int(weight)
+    return weights
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    db_path: Path, workdir: Path, port: int, workers: int, watch: bool
+) -> subprocess.Popen:
+    """Run uvicorn in a subprocess; the app creates its data/ directory in workdir."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "PYTHONPATH": str(BACKEND),
+        "WEB_CONCURRENCY": str(workers),
+        "MEAL_WATCH_EXTERNAL_WRITES": "true" if watch else "false",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not become healthy within 30s")
+
+
+class StaleRead(Exception):
+    """A read did not return a write that had already been acknowledged."""
+
+
+class Traffic:
+    """Shared state of one run: meal ids to update and fresh days to write to."""
+
+    def __init__(self, years: int, seed: int, concurrency: int):
+        self.rng = random.Random(seed)
+        self.first_day = data.first_day_of(years)
+        self.days = (data.LAST_DAY - self.first_day).days
+        self.next_fresh_day = 1
+        self.meal_ids: list[int] = []
+        # One slot per client, so concurrent consistency checks never share one
+        self.free_slots = [
+            (CHECK_FIRST_DAY + timedelta(days=index // 3), data.MEAL_TYPES[index % 3])
+            for index in range(concurrency)
+        ]
+        # Without keep-alive, so each read picks a worker afresh
+        self.fresh_client: httpx.AsyncClient | None = None
+
+    def random_day(self):
+        return self.first_day + timedelta(days=self.rng.randrange(self.days))
+
+    def fresh_day(self):
+        day = data.LAST_DAY + timedelta(days=self.next_fresh_day)
+        self.next_fresh_day += 1
+        return str(day)
+
+
+async def get_meals(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    start = traffic.random_day()
+    return await client.get("/api/meals", params={
+        "start_date": start, "end_date": start + timedelta(days=6),
+    })
+
+
+async def search(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    if traffic.rng.random() < 0.5:
+        ingredient = traffic.rng.choice(data.STAPLES)
+        return await client.get("/api/meals/search", params={"ingredient": ingredient})
+    query = f"dish {traffic.rng.randrange(data.DISHES_PER_MEAL_TYPE)}"
+    return await client.get("/api/meals/search/text", params={"q": query})
+
+
+async def create(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    response = await client.post("/api/meals", json={
+        "date": traffic.fresh_day(),
+        "meal_type": traffic.rng.choice(data.MEAL_TYPES),
+        "name": "Load test meal",
+        "ingredients": traffic.rng.sample(data.STAPLES, 3),
+    })
+    if response.status_code == 201:
+        traffic.meal_ids.append(response.json()["id"])
+    return response
+
+
+async def update(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    if not traffic.meal_ids:
+        return await create(client, traffic)
+    meal_id = traffic.rng.choice(traffic.meal_ids)
+    return await client.put(f"/api/meals/{meal_id}", json={
+        "name": "Updated load test meal", "ingredients": traffic.rng.sample(data.STAPLES, 2),
+    })
+
+
+async def copy(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    if not traffic.meal_ids:
+        return await create(client, traffic)
+    response = await client.post(f"/api/meals/{traffic.rng.choice(traffic.meal_ids)}/copy", json={
+        "target_date": traffic.fresh_day(),
+        "target_meal_type": traffic.rng.choice(data.MEAL_TYPES),
+    })
+    if response.status_code == 201:
+        traffic.meal_ids.append(response.json()["id"])
+    return response
+
+
+async def delete(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    if not traffic.meal_ids:
+        return await create(client, traffic)
+    meal_id = traffic.meal_ids.pop(traffic.rng.randrange(len(traffic.meal_ids)))
+    return await client.delete(f"/api/meals/{meal_id}")
+
+
+async def consistency(client: httpx.AsyncClient, traffic: Traffic) -> httpx.Response:
+    day, meal_type = traffic.free_slots.pop()
+    try:
+        token = f"Check {traffic.rng.getrandbits(64):x}"
+        response = await client.put(f"/api/meals/slot/{day}/{meal_type}", json={"name": token})
+        if response.status_code >= 400:
+            return response
+        week_start = day - timedelta(days=(day - CHECK_FIRST_DAY).days % 7)
+        read = await traffic.fresh_client.get("/api/meals", params={
+            "start_date": week_start, "end_date": week_start + timedelta(days=6),
+        })
+        names = {(meal["date"], meal["meal_type"]): meal["name"] for meal in read.json()}
+        if names.get((str(day), meal_type)) != token:
+            raise StaleRead(f"{day} {meal_type}")
+        return read
+    finally:
+        traffic.free_slots.append((day, meal_type))
+
+
+OPERATIONS = {
+    "get_meals": get_meals,
+    "search": search,
+    "create": create,
+    "update": update,
+    "copy": copy,
+    "delete": delete,
+    "consistency": consistency,
+}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def drive(
+    base_url: str, server: subprocess.Popen, traffic: Traffic, mix: dict[str, int],
+    concurrency: int, duration: float,
+) -> dict:
+    """Run `concurrency` clients for `duration` seconds; results per operation."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(30.0)
+    async with (
+        httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client,
+        httpx.AsyncClient(
+            base_url=base_url, limits=httpx.Limits(max_keepalive_connections=0), timeout=timeout
+        ) as fresh_client,
+    ):
+        traffic.fresh_client = fresh_client
+        await wait_until_healthy(client, server)
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            while time.monotonic() < deadline:
+                name = traffic.rng.choices(names, weights)[0]
+                began = time.perf_counter()
+                try:
+                    response = await OPERATIONS[name](client, traffic)
+                    status = str(response.status_code)
+                except (httpx.TransportError, StaleRead) as exc:
+                    status = type(exc).__name__
+                latencies[name].append((time.perf_counter() - began) * 1000)
+                statuses[name][status] += 1
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+    results = {}
+    for name in names:
+        values = sorted(latencies[name])
+        histogram = [0] * (len(BUCKETS_MS) + 1)
+        for value in values:
+            histogram[bisect.bisect_left(BUCKETS_MS, value)] += 1
+        # 409 is the API's answer to a taken slot, not a server failure
+        errors = sum(
+            count for status, count in statuses[name].items()
+            if not status.isdigit() or int(status) >= 500
+        )
+        results[name] = {
+            "requests": len(values),
+            "requests_per_sec": round(len(values) / elapsed, 1),
+            "errors": errors,
+            "error_rate": round(errors / len(values), 4) if values else 0.0,
+            "statuses": dict(statuses[name]),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "histogram_ms": dict(zip(
+                [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"],
+                histogram, strict=True,
+            )),
+        }
+    total = sum(result["requests"] for result in results.values())
+    results["total"] = {
+        "requests": total,
+        "requests_per_sec": round(total / elapsed, 1),
+        "errors": sum(result["errors"] for result in results.values()),
+    }
+    return results
+
+
+def run_setting(
+    seeded: Path, years: int, workers: int, concurrency: int, mix: dict[str, int],
+    duration: float, watch: bool,
+) -> dict:
+    """One server with a fresh copy of the seeded database, driven once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "load.db"
+        shutil.copy(seeded, db_path)
+        port = free_port()
+        server = start_server(db_path, Path(tmp), port, workers, watch)
+        try:
+            traffic = Traffic(years, seed=workers * 1000 + concurrency, concurrency=concurrency)
+            return asyncio.run(drive(
+                f"http://127.0.0.1:{port}", server, traffic, mix, concurrency, duration
+            ))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=int, default=10, help="years of seeded history")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--duration", type=float, default=15, help="seconds per setting")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    parser.add_argument("--no-watch", dest="watch", action="store_false",
+                        help="don't let workers watch for each other's writes")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = Path(tmp) / "seed.db"
+        meals = data.seed(f"sqlite:///{seeded}", args.years)
+        print(f"seeded {meals} meals ({args.years}y)", file=sys.stderr)
+        for workers in args.workers:
+            for concurrency in args.concurrency:
+                print(f"workers={workers} concurrency={concurrency}", file=sys.stderr)
+                endpoints = run_setting(
+                    seeded, args.years, workers, concurrency, mix, args.duration, args.watch
+                )
+                results.append(
+                    {"workers": workers, "concurrency": concurrency, "endpoints": endpoints}
+                )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(
+        f"{'workers':>7} {'clients':>7} {'endpoint':<10} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for setting in results:
+        for name, r in setting["endpoints"].items():
+            if name == "total":
+                line = f"{'total':<10} {r['requests_per_sec']:>8} {'':>8} {'':>8} {'':>8}"
+            else:
+                line = (
+                    f"{name:<10} {r['requests_per_sec']:>8} {r['p50_ms']:>8} "
+                    f"{r['p95_ms']:>8} {r['p99_ms']:>8}"
+                )
+            print(f"{setting['workers']:>7} {setting['concurrency']:>7} {line} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
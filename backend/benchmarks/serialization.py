@@ -0,0 +1,109 @@
+"""
+Compare the two ways GET /api/meals turns a date range into a JSON body.
+
+"orm" loads Meal objects and dumps them through the Pydantic response model;
+"core" selects plain rows and encodes them directly (orjson when installed).
+Both read the same seeded SQLite file, so the numbers isolate row loading
+and serialization. Run from backend/:
+
+    python -m benchmarks.serialization --meals 100 1000 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.database import SQLITE_PROFILES, configure_sqlite
+from app.migrations import migrate
+from app.models import Meal
+
+FIRST_DAY = date(2022, 1, 3)
+MEAL_TYPES = ("breakfast", "lunch", "dinner")
+
+
+def orm_body(db, start_date: date, end_date: date) -> bytes:
+    meals = crud.get_meals(db, start_date, end_date)
+    return crud._MEAL_LIST.dump_json(crud._MEAL_LIST.validate_python(meals, from_attributes=True))
+
+
+def core_body(db, start_date: date, end_date: date) -> bytes:
+    return crud.get_meals_json(db, start_date, end_date)
+
+
+def seed(url: str, count: int) -> tuple[date, date]:
+    """Migrate a new database, add `count` meals, three a day, and return the range."""
+    engine = create_engine(url)
+    migrate(engine)
+    rows = [
+        {
+            "date": FIRST_DAY + timedelta(days=index // 3),
+            "meal_type": MEAL_TYPES[index % 3],
+            "name": f"Meal {index}",
+            "ingredients": ["eggs", "flour", f"item {index % 97}"],
+        }
+        for index in range(count)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Meal), rows)
+    engine.dispose()
+    return FIRST_DAY, FIRST_DAY + timedelta(days=(count - 1) // 3)
+
+
+def measure(session_factory, body, start_date: date, end_date: date, repeat: int) -> float:
+    """Best-of-`repeat` milliseconds for one range read."""
+    best = float("inf")
+    for _ in range(repeat):
+        with session_factory() as db:
+            began = time.perf_counter()
+            body(db, start_date, end_date)
+            best = min(best, time.perf_counter() - began)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meals", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.meals:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            start_date, end_date = seed(url, count)
+            engine = create_engine(url)
+            configure_sqlite(engine, SQLITE_PROFILES["performance"])
+            session_factory = sessionmaker(autoflush=False, bind=engine)
+            with session_factory() as db:
+                assert orm_body(db, start_date, end_date) == core_body(db, start_date, end_date)
+            orm_ms = measure(session_factory, orm_body, start_date, end_date, args.repeat)
+            core_ms = measure(session_factory, core_body, start_date, end_date, args.repeat)
+            engine.dispose()
+        results.append({
+            "meals": count,
+            "encoder": "orjson" if crud.orjson else "json",
+            "orm_ms": round(orm_ms, 3),
+            "core_ms": round(core_ms, 3),
+            "speedup": round(orm_ms / core_ms, 2),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'meals':>6} {'encoder':>7} {'orm ms':>9} {'core ms':>9} {'speedup':>7}")
+    for r in results:
+        print(
+            f"{r['meals']:>6} {r['encoder']:>7} {r['orm_ms']:>9} "
+            f"{r['core_ms']:>9} {r['speedup']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
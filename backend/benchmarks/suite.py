@@ -0,0 +1,320 @@
+"""
+Benchmark every endpoint and the request validation on synthetic histories.
+
+Each history size is seeded deterministically (see benchmarks.data) into a
+temporary SQLite file and served in-process through the real routers.
+Results are p50/p95/p99 latency and ops/sec per benchmark, as JSON. With
+--baseline the run is compared against stored results and exits non-zero
+when a benchmark's p50 regressed by more than --threshold. Run from backend/:
+
+    python -m benchmarks.suite --years 1 10 50
+    python -m benchmarks.suite --years 1 --baseline benchmarks/baseline.json
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.cache import meal_cache
+from app.database import SQLITE_PROFILES, create_engines, get_db, get_read_db
+from app.ingredients import ingredient_index
+from app.routers import ingredients, meals, shopping_list, stats
+from app.schemas import MealCreate, clean_ingredients
+
+from . import data
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(operation: Callable[[int], object], iterations: int, warmup: int) -> dict:
+    """Latency percentiles and throughput of `operation(i)` over `iterations` calls."""
+    for i in range(warmup):
+        operation(i)
+    latencies = []
+    began = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        start = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "ops_per_sec": round(iterations / elapsed, 1),
+    }
+
+
+def build_app(url: str) -> FastAPI:
+    # The app's own engine pair: one write connection and a read-only pool
+    engine, read_engine = create_engines(url, SQLITE_PROFILES["performance"])
+    session_factory = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+    read_session_factory = sessionmaker(autoflush=False, bind=read_engine)
+
+    def sessions(factory):
+        def override():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return override
+
+    app = FastAPI()
+    for router in (meals.router, shopping_list.router, ingredients.router, stats.router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = sessions(session_factory)
+    app.dependency_overrides[get_read_db] = sessions(read_session_factory)
+
+    with read_session_factory() as db:
+        ingredient_index.load(db)
+    meal_cache.clear()
+    return app
+
+
+def ok(response):
+    """Fail the run loudly instead of timing error responses."""
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.url}: {response.status_code} {response.text}")
+    return response
+
+
+def benchmarks(
+    client: TestClient, years: int
+) -> tuple[dict[str, Callable[[int], object]], dict[str, Callable[[int], None]]]:
+    """Named operations for one seeded history, reads first, then writes.
+
+    Also returns the untimed setup of the writes that need existing meals,
+    called with the number of operation calls to prepare for.
+    """
+    rng = random.Random(years)
+    first_day = data.first_day_of(years)
+    days = (data.LAST_DAY - first_day).days
+    # Writes go to fresh days after the seeded history so they never conflict
+    fresh_days = (data.LAST_DAY + timedelta(days=n) for n in itertools.count(1))
+    meal_ids: dict[str, list[int]] = {}
+
+    def add_meals(name: str, count: int) -> None:
+        """Create `count` meals on fresh days for the benchmark `name` to work on."""
+        meal_ids[name] = []
+        for start in range(0, count, 500):
+            results = ok(client.post("/api/meals/batch", json={"items": [
+                {"date": str(next(fresh_days)), "meal_type": "lunch", "name": f"Setup {n}",
+                 "ingredients": ["salt", "onion", "garlic"]}
+                for n in range(start, min(count, start + 500))
+            ]})).json()["results"]
+            meal_ids[name] += [result["meal"]["id"] for result in results]
+
+    def random_day():
+        return first_day + timedelta(days=rng.randrange(days))
+
+    def week_params():
+        start = random_day()
+        return {"start_date": start, "end_date": start + timedelta(days=6)}
+
+    def get_meals_uncached(_):
+        meal_cache.enabled = False
+        try:
+            ok(client.get("/api/meals", params=week_params()))
+        finally:
+            meal_cache.enabled = True
+
+    week = week_params()
+    etag = ok(client.get("/api/meals", params=week)).headers["etag"]
+
+    def create_meal(i):
+        ok(client.post("/api/meals", json={
+            "date": str(next(fresh_days)), "meal_type": "lunch", "name": f"Bench {i}",
+            "ingredients": ["salt", "onion", "garlic"],
+        }))
+
+    def update_meal(i):
+        ids = meal_ids["update_meal"]
+        meal_id = ids[i % len(ids)]
+        ok(client.put(f"/api/meals/{meal_id}", json={
+            "name": f"Bench {i}", "ingredients": ["rice"],
+        }))
+
+    def delete_meal(_):
+        ok(client.delete(f"/api/meals/{meal_ids['delete_meal'].pop()}"))
+
+    def copy_meal(_):
+        ok(client.post(f"/api/meals/{meal_ids['copy_meal'][0]}/copy", json={
+            "target_date": str(next(fresh_days)), "target_meal_type": "dinner",
+        }))
+
+    def copy_meal_many(_):
+        ok(client.post(f"/api/meals/{meal_ids['copy_meal_many'][0]}/copy-many", json={
+            "target_dates": [str(next(fresh_days)) for _ in range(7)],
+            "target_meal_types": ["breakfast", "lunch", "dinner"],
+        }))
+
+    def copy_range_week(_):
+        start = random_day()
+        target = next(fresh_days)
+        for _ in range(6):
+            next(fresh_days)
+        ok(client.post("/api/meals/copy-range", json={
+            "source_start": str(start), "source_end": str(start + timedelta(days=6)),
+            "target_start": str(target),
+        }))
+
+    def batch_create_50(i):
+        ok(client.post("/api/meals/batch", json={"items": [
+            {"date": str(next(fresh_days)), "meal_type": "dinner", "name": f"Batch {i}",
+             "ingredients": ["pasta", "tomato"]}
+            for _ in range(50)
+        ]}))
+
+    def import_100_ndjson(i):
+        lines = "\n".join(json.dumps({
+            "date": str(next(fresh_days)), "meal_type": "breakfast", "name": f"Import {i}",
+            "ingredients": ["oats", "milk"],
+        }) for _ in range(100))
+        ok(client.post("/api/meals/import", files={"file": ("meals.ndjson", lines.encode())}))
+
+    def set_meal_slot(i):
+        ok(client.put(f"/api/meals/slot/{next(fresh_days)}/breakfast", json={"name": f"Slot {i}"}))
+
+    staples = data.STAPLES[:20]
+    raw_ingredients = [" Salt ", "", "olive oil", "  ", "Garlic", "pepper", "lemon "]
+    raw_meal = {"date": "2024-01-15", "meal_type": "lunch", "name": " Soup ",
+                "ingredients": raw_ingredients}
+
+    operations = {
+        "clean_ingredients": lambda _: clean_ingredients(raw_ingredients),
+        "validate_meal_create": lambda _: MealCreate.model_validate(raw_meal),
+        "get_meals_week_cached": lambda _: ok(client.get("/api/meals", params=week)),
+        "get_meals_week_uncached": get_meals_uncached,
+        "get_meals_not_modified": lambda _: client.get(
+            "/api/meals", params=week, headers={"If-None-Match": etag}
+        ),
+        "get_meals_page_100": lambda _: ok(client.get("/api/meals", params={
+            "start_date": first_day, "end_date": data.LAST_DAY, "limit": 100,
+        })),
+        "search_ingredient": lambda i: ok(client.get(
+            "/api/meals/search", params={"ingredient": staples[i % len(staples)]}
+        )),
+        "search_text": lambda i: ok(client.get(
+            "/api/meals/search/text", params={"q": f"dish {i % 60}"}
+        )),
+        "shopping_list_month": lambda _: ok(client.get("/api/shopping-list", params={
+            "start_date": (start := random_day()), "end_date": start + timedelta(days=30),
+        })),
+        "suggest_ingredients": lambda i: ok(client.get(
+            "/api/ingredients/suggest", params={"prefix": staples[i % len(staples)][:2]}
+        )),
+        "meal_stats": lambda _: ok(client.get("/api/stats/meals")),
+        "export_year_ndjson": lambda _: ok(client.get("/api/meals/export", params={
+            "start_date": data.LAST_DAY - timedelta(days=364), "end_date": data.LAST_DAY,
+        })),
+        "create_meal": create_meal,
+        "update_meal": update_meal,
+        "set_meal_slot": set_meal_slot,
+        "copy_meal": copy_meal,
+        "copy_meal_many": copy_meal_many,
+        "copy_range_week": copy_range_week,
+        "batch_create_50": batch_create_50,
+        "import_100_ndjson": import_100_ndjson,
+        "delete_meal": delete_meal,
+    }
+    setups = {
+        "update_meal": lambda calls: add_meals("update_meal", min(calls, 100)),
+        "copy_meal": lambda _: add_meals("copy_meal", 1),
+        "copy_meal_many": lambda _: add_meals("copy_meal_many", 1),
+        "delete_meal": lambda calls: add_meals("delete_meal", calls),
+    }
+    return operations, setups
+
+
+def run(years: list[int], iterations: int, warmup: int, only: str) -> dict:
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "iterations": iterations,
+        },
+        "results": {},
+    }
+    for count in years:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            meals_seeded = data.seed(url, count)
+            print(f"{count}y: seeded {meals_seeded} meals", file=sys.stderr)
+            with TestClient(build_app(url)) as client:
+                scale = results["results"][f"{count}y"] = {}
+                operations, setups = benchmarks(client, count)
+                for name, operation in operations.items():
+                    if fnmatch.fnmatch(name, only):
+                        if name in setups:
+                            setups[name](warmup + iterations)
+                        scale[name] = measure(operation, iterations, warmup)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print p50 changes against the baseline; returns the regressed benchmarks."""
+    regressions = []
+    print(f"{'benchmark':<34} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for scale, current in results["results"].items():
+        for name, result in current.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if base is None:
+                continue
+            change = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            print(
+                f"{scale + ' ' + name:<34} {base['p50_ms']:>10} {result['p50_ms']:>10} "
+                f"{change:>+8.0%}{flag}"
+            )
+            if flag:
+                regressions.append(f"{scale} {name}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--iterations", type=int, default=100, help="timed calls per benchmark")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls per benchmark")
+    parser.add_argument("--only", default="*", help="glob of benchmark names to run")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help=f"compare with this file, e.g. {BASELINE}")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="p50 slowdown counted as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run(args.years, args.iterations, args.warmup, args.only)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
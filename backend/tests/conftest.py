@@ -2,6 +2,7 @@
 Test configuration and fixtures for the meal calendar backend.
 """
 import os
+import threading
 
 # Set test database before importing app modules
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
@@ -14,7 +15,16 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.database import Base, get_db
+from app.cache import meal_cache
+from app.database import (
+    SQLITE_PROFILES,
+    Base,
+    configure_sqlite,
+    create_engines,
+    get_db,
+    get_read_db,
+)
+from app.ingredients import ingredient_index
 from app.models import Meal
 
 # Create a test database in memory
@@ -25,7 +35,11 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+configure_sqlite(engine, {"foreign_keys": "ON"})
+# Like SessionLocal, written meals stay loaded for the response after commit
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 
 @pytest.fixture(scope="function")
@@ -56,6 +70,10 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Cached ranges and indexed ingredients of a previous test's database must not leak
+    meal_cache.clear()
+    ingredient_index.clear()
     
     with TestClient(app) as test_client:
         yield test_client
@@ -63,6 +81,96 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="function")
+def file_client(tmp_path):
+    """Create a test client on a SQLite file with the app's real write and read pools."""
+    from app.main import app
+
+    file_engine, file_read_engine = create_engines(
+        f"sqlite:///{tmp_path / 'meals.db'}", SQLITE_PROFILES["performance"]
+    )
+    Base.metadata.create_all(bind=file_engine)
+    FileSessionLocal = sessionmaker(
+        autoflush=False, expire_on_commit=False, bind=file_engine
+    )
+    FileReadSessionLocal = sessionmaker(autoflush=False, bind=file_read_engine)
+
+    def sessions(factory):
+        def override():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        return override
+
+    app.dependency_overrides[get_db] = sessions(FileSessionLocal)
+    app.dependency_overrides[get_read_db] = sessions(FileReadSessionLocal)
+    meal_cache.clear()
+    ingredient_index.clear()
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+    app.dependency_overrides.clear()
+    file_read_engine.dispose()
+    file_engine.dispose()
+
+
+def send_together(client, method: str, url: str, count: int, **kwargs) -> list[int]:
+    """Send the same request from count threads at once; the status codes."""
+    statuses = [None] * count
+
+    def send(index):
+        statuses[index] = client.request(method, url, **kwargs).status_code
+
+    threads = [threading.Thread(target=send, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+@pytest.fixture(scope="function")
+def async_client():
+    """Create a test client serving the async meal routes on an aiosqlite database."""
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("greenlet")
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.database import get_async_db
+    from app.routers import meals_async
+
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def create_tables():
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(meals_async.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    meal_cache.clear()
+    ingredient_index.clear()
+
+    with TestClient(app) as test_client:
+        test_client.portal.call(create_tables)
+        yield test_client
+        test_client.portal.call(async_engine.dispose)
+
+
 @pytest.fixture
 def sample_meal_data():
     """Sample meal data for testing."""
@@ -1,6 +1,20 @@
 """
 Tests for the meals API endpoints.
 """
+import csv
+import gzip
+import io
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import changes, crud
+from app.cache import meal_cache
+from app.models import Meal
+from app.schemas import MealUpdate
+from tests.conftest import engine, send_together
 
 
 class TestHealthEndpoint:
@@ -61,6 +75,399 @@ class TestGetMeals:
         assert response.status_code == 422
 
 
+class TestGetMealsPaginated:
+    """Tests for GET /api/meals with limit and cursor."""
+
+    def _read_all(self, client, url, limit):
+        pages = [client.get(f"{url}&limit={limit}").json()]
+        while pages[-1]["next_cursor"] is not None:
+            pages.append(client.get(f"{url}&limit={limit}&cursor={pages[-1]['next_cursor']}").json())
+        return pages
+
+    def test_pages_cover_range_in_order(self, client, sample_meals):
+        """Test that following next_cursor returns every meal once, in order."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-17"
+        pages = self._read_all(client, url, 4)
+
+        assert [len(page["items"]) for page in pages] == [4, 2]
+        paged = [m["id"] for page in pages for m in page["items"]]
+        assert len(set(paged)) == 6
+        items = [m for page in pages for m in page["items"]]
+        assert items == sorted(items, key=lambda m: (m["date"], m["meal_type"], m["id"]))
+
+    def test_exact_multiple_has_no_empty_page(self, client, sample_meals):
+        """Test that the last full page carries no cursor."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-17"
+        pages = self._read_all(client, url, 3)
+        assert [len(page["items"]) for page in pages] == [3, 3]
+
+    def test_pages_ignore_deletes_before_cursor(self, client, sample_meals):
+        """Test that deleting an already returned meal does not shift later pages."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-17"
+        first = client.get(f"{url}&limit=3").json()
+        client.delete(f"/api/meals/{first['items'][0]['id']}")
+
+        second = client.get(f"{url}&limit=3&cursor={first['next_cursor']}").json()
+        assert [m["name"] for m in second["items"]] == ["Oatmeal", "Sandwich", "Pizza"]
+
+    def test_long_range_requires_pagination(self, client, sample_meals):
+        """Test that unpaginated ranges over the limit are rejected."""
+        url = "/api/meals?start_date=2020-01-01&end_date=2024-12-31"
+        assert client.get(url).status_code == 400
+
+        page = client.get(f"{url}&limit=10").json()
+        assert len(page["items"]) == 6
+
+    def test_invalid_cursor_fails(self, client):
+        """Test that malformed cursors return 400."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-17&cursor="
+        for cursor in ("not-a-cursor", "WyIyMDI0LTAxLTE1Il0", "WyJ4IiwibHVuY2giLDFd"):
+            assert client.get(url + cursor).status_code == 400
+
+    def test_limit_bounds(self, client):
+        """Test that limit must be positive and bounded."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-17"
+        assert client.get(f"{url}&limit=0").status_code == 422
+        assert client.get(f"{url}&limit=100000").status_code == 422
+
+    def test_deep_page_seeks_on_index(self, db_session):
+        """Test that a page after a cursor is read from the index without sorting."""
+        stmt = (
+            "EXPLAIN QUERY PLAN SELECT id FROM meals"
+            " WHERE date BETWEEN '2024-01-01' AND '2024-12-31'"
+            " AND (date, meal_type, id) > ('2024-06-01', 'lunch', 5)"
+            " ORDER BY date, meal_type, id LIMIT 101"
+        )
+        plan = " ".join(row[3] for row in db_session.connection().exec_driver_sql(stmt))
+        assert "INDEX sqlite_autoindex_meals_1" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestGetMealsConditional:
+    """Tests for ETag / If-None-Match handling on GET /api/meals."""
+
+    URL = "/api/meals?start_date=2024-01-15&end_date=2024-01-21"
+
+    def test_get_meals_returns_weak_etag(self, client, sample_meals):
+        """Test that range responses carry a weak ETag."""
+        response = client.get(self.URL)
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('W/"')
+        assert response.headers["cache-control"] == "no-cache"
+
+    def test_get_meals_not_modified(self, client, sample_meals):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        etag = client.get(self.URL).headers["etag"]
+
+        response = client.get(self.URL, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_get_meals_etag_changes_on_write(self, client, sample_meals):
+        """Test that creating, updating and deleting inside the range change the ETag."""
+        etags = [client.get(self.URL).headers["etag"]]
+
+        created = client.post("/api/meals", json={
+            "date": "2024-01-18", "meal_type": "lunch", "name": "Soup"
+        }).json()
+        etags.append(client.get(self.URL).headers["etag"])
+
+        client.put(f"/api/meals/{created['id']}", json={"name": "Stew"})
+        etags.append(client.get(self.URL).headers["etag"])
+
+        client.delete(f"/api/meals/{created['id']}")
+        etags.append(client.get(self.URL).headers["etag"])
+
+        assert len(set(etags)) == 4
+        response = client.get(self.URL, headers={"If-None-Match": etags[0]})
+        assert response.status_code == 200
+
+    def test_get_meals_etag_ignores_writes_outside_range(self, client, sample_meals):
+        """Test that writes to other weeks keep the ETag valid."""
+        etag = client.get(self.URL).headers["etag"]
+
+        client.post("/api/meals", json={
+            "date": "2024-02-01", "meal_type": "lunch", "name": "Soup"
+        })
+
+        response = client.get(self.URL, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_get_meals_etag_changes_on_range_copy(self, client, sample_meals):
+        """Test that plain-SQL writes such as range copies change the ETag."""
+        url = "/api/meals?start_date=2024-01-22&end_date=2024-01-28"
+        etag = client.get(url).headers["etag"]
+
+        client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-17",
+            "target_start": "2024-01-22",
+        })
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 6
+
+
+class TestGetMealsSerialization:
+    """Tests for the Core-row fast path of GET /api/meals."""
+
+    @pytest.fixture
+    def mixed_meals(self, db_session):
+        meals = [
+            Meal(date=date(2024, 1, 15), meal_type="lunch", name="Crème brûlée",
+                 ingredients=["crème", "sucre"]),
+            Meal(date=date(2024, 1, 15), meal_type="breakfast", name="Pancakes"),
+            Meal(date=date(2024, 1, 16), meal_type="dinner", name="Soup"),
+        ]
+        db_session.add_all(meals)
+        db_session.commit()
+        return meals
+
+    def _pydantic_body(self, db_session):
+        return crud._MEAL_LIST.dump_json(crud._MEAL_LIST.validate_python(
+            crud.get_meals(db_session, date(2024, 1, 15), date(2024, 1, 21)),
+            from_attributes=True,
+        ))
+
+    def test_fast_path_matches_pydantic_output(self, db_session, mixed_meals):
+        """Test that the fast path produces the same bytes as Pydantic."""
+        fast = crud.get_meals_json(db_session, date(2024, 1, 15), date(2024, 1, 21))
+        assert fast == self._pydantic_body(db_session)
+
+    def test_fast_path_without_orjson(self, db_session, mixed_meals, monkeypatch):
+        """Test that the stdlib encoder fallback produces the same bytes."""
+        monkeypatch.setattr(crud, "orjson", None)
+        fast = crud.get_meals_json(db_session, date(2024, 1, 15), date(2024, 1, 21))
+        assert fast == self._pydantic_body(db_session)
+
+    def test_endpoint_with_fast_path_disabled(self, client, mixed_meals, monkeypatch):
+        """Test that the endpoint returns the same JSON with the fast path off."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-21"
+        fast = client.get(url).json()
+
+        monkeypatch.setattr(crud, "FAST_SERIALIZATION", False)
+        meal_cache.clear()
+        slow = client.get(url).json()
+
+        assert fast == slow
+        assert [m["name"] for m in fast] == ["Pancakes", "Crème brûlée", "Soup"]
+        assert fast[2]["ingredients"] == []
+
+
+class TestExportMeals:
+    """Tests for GET /api/meals/export endpoint."""
+
+    def test_export_ndjson(self, client, sample_meals):
+        """Test that NDJSON export has one meal per line, like the range endpoint."""
+        response = client.get("/api/meals/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert 'filename="meals.ndjson"' in response.headers["content-disposition"]
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-17").json()
+
+    def test_export_csv(self, client):
+        """Test that CSV export has a header and JSON-encoded ingredients."""
+        client.post("/api/meals", json={
+            "date": "2024-01-15",
+            "meal_type": "lunch",
+            "name": "Salad, green",
+            "ingredients": ["lettuce", "oil; olive"]
+        })
+
+        response = client.get("/api/meals/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 1
+        assert rows[0]["name"] == "Salad, green"
+        assert rows[0]["date"] == "2024-01-15"
+        assert json.loads(rows[0]["ingredients"]) == ["lettuce", "oil; olive"]
+
+    def test_export_csv_empty(self, client):
+        """Test that an empty CSV export still has its header."""
+        response = client.get("/api/meals/export?format=csv")
+        assert response.text == "id,date,meal_type,name,ingredients\n"
+
+    def test_export_date_bounds(self, client, sample_meals):
+        """Test that optional date bounds filter the export."""
+        response = client.get("/api/meals/export?start_date=2024-01-16")
+        assert {json.loads(line)["date"] for line in response.text.splitlines()} == {
+            "2024-01-16", "2024-01-17"
+        }
+
+        response = client.get("/api/meals/export?end_date=2024-01-15")
+        assert len(response.text.splitlines()) == 3
+
+    def test_export_gzip(self, client, sample_meals):
+        """Test that gzip=true streams a gzip file of the same export."""
+        plain = client.get("/api/meals/export?format=csv").content
+        response = client.get("/api/meals/export?format=csv&gzip=true")
+        assert response.headers["content-type"] == "application/gzip"
+        assert 'filename="meals.csv.gz"' in response.headers["content-disposition"]
+        assert gzip.decompress(response.content) == plain
+
+    def test_export_in_batches(self, client, sample_meals, monkeypatch):
+        """Test that small batches produce the same export."""
+        expected = client.get("/api/meals/export?format=csv").content
+        monkeypatch.setattr(crud, "EXPORT_BATCH_SIZE", 4)
+        assert client.get("/api/meals/export?format=csv").content == expected
+
+    def test_export_encodes_one_chunk_per_batch(self):
+        """Test that each fetched batch becomes one streamed chunk."""
+        batches = [[(1, "2024-01-15", "lunch", "A", [])], [(2, "2024-01-16", "lunch", "B", None)]]
+        chunks = list(crud._csv_chunks(iter(batches)))
+        assert len(chunks) == 2
+        assert chunks[0].startswith(b"id,date")
+        assert chunks[1] == b"2,2024-01-16,lunch,B,[]\n"
+
+    def test_export_invalid_format_fails(self, client):
+        """Test that an unknown format returns 422."""
+        response = client.get("/api/meals/export?format=xml")
+        assert response.status_code == 422
+
+
+class TestImportMeals:
+    """Tests for POST /api/meals/import endpoint."""
+
+    def _import(self, client, content, filename="meals.ndjson", **params):
+        if isinstance(content, str):
+            content = content.encode()
+        return client.post(
+            "/api/meals/import", params=params, files={"file": (filename, content)}
+        )
+
+    def test_import_ndjson(self, client):
+        """Test importing NDJSON lines."""
+        content = "\n".join(json.dumps(row) for row in [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+            {"date": "2024-01-15", "meal_type": "lunch", "name": " Salad ",
+             "ingredients": ["lettuce", " ", "tomato "]},
+        ]) + "\n\n"
+
+        response = self._import(client, content)
+        assert response.status_code == 200
+        assert response.json() == {
+            "created": 2, "overwritten": 0, "skipped": 0, "invalid": 0, "errors": []
+        }
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()
+        assert [(m["name"], m["ingredients"]) for m in meals] == [
+            ("Pancakes", []), ("Salad", ["lettuce", "tomato"])
+        ]
+
+    def test_import_reports_errors_by_line(self, client):
+        """Test that invalid rows are skipped and reported with their line."""
+        content = "\n".join([
+            '{"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"}',
+            "not json",
+            "",
+            '{"date": "2024-01-15", "meal_type": "brunch", "name": "Eggs"}',
+            '{"date": "2024-01-16", "meal_type": "lunch", "name": "   "}',
+        ])
+
+        result = self._import(client, content).json()
+        assert result["created"] == 1
+        assert result["invalid"] == 3
+        assert [error["line"] for error in result["errors"]] == [2, 4, 5]
+        assert "meal_type" in result["errors"][1]["detail"]
+
+    def test_import_skip_and_overwrite(self, client, sample_meal):
+        """Test that conflicting slots are skipped or overwritten."""
+        row = {"date": "2024-01-15", "meal_type": "breakfast", "name": "Waffles"}
+        content = json.dumps(row)
+
+        result = self._import(client, content).json()
+        assert (result["created"], result["skipped"]) == (0, 1)
+
+        result = self._import(client, content, on_conflict="overwrite").json()
+        assert (result["created"], result["overwritten"]) == (0, 1)
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()
+        assert [m["name"] for m in meals] == ["Waffles"]
+
+    def test_import_duplicate_slots_in_file(self, client):
+        """Test that the last duplicate wins on overwrite and the first on skip."""
+        content = "\n".join(json.dumps(
+            {"date": "2024-01-15", "meal_type": "dinner", "name": name}
+        ) for name in ("First", "Second"))
+
+        result = self._import(client, content).json()
+        assert (result["created"], result["skipped"]) == (1, 1)
+
+        result = self._import(client, content, on_conflict="overwrite").json()
+        assert result["overwritten"] == 2
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()
+        assert [m["name"] for m in meals] == ["Second"]
+
+    def test_import_csv(self, client):
+        """Test importing CSV with JSON or semicolon-separated ingredients."""
+        content = (
+            "date,meal_type,name,ingredients\n"
+            '2024-01-15,lunch,"Salad, green","[""lettuce"", ""oil""]"\n'
+            "2024-01-16,dinner,Soup,carrot; onion\n"
+            "2024-01-17,dinner,,\n"
+        )
+
+        result = self._import(client, content, filename="plan.csv").json()
+        assert result["created"] == 2
+        assert [error["line"] for error in result["errors"]] == [4]
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-16").json()
+        assert [m["ingredients"] for m in meals] == [["lettuce", "oil"], ["carrot", "onion"]]
+
+    def test_import_csv_missing_columns_fails(self, client):
+        """Test that a CSV without the required columns returns 400."""
+        response = self._import(client, "date,name\n2024-01-15,Soup\n", filename="plan.csv")
+        assert response.status_code == 400
+
+    def test_import_round_trips_gzipped_export(self, client, sample_meals):
+        """Test that a gzipped CSV export imports back unchanged."""
+        export = client.get("/api/meals/export?format=csv&gzip=true").content
+        before = client.get("/api/meals/export").text
+
+        result = self._import(
+            client, export, filename="meals.csv.gz", on_conflict="overwrite"
+        ).json()
+        assert result["overwritten"] == 6
+        assert client.get("/api/meals/export").text == before
+
+    def test_import_in_chunks(self, client, monkeypatch):
+        """Test that rows are written across several chunked transactions."""
+        monkeypatch.setattr(crud, "IMPORT_CHUNK_SIZE", 2)
+        content = "\n".join(json.dumps(
+            {"date": f"2024-01-{day:02d}", "meal_type": "lunch", "name": f"Meal {day}"}
+        ) for day in range(1, 6))
+
+        result = self._import(client, content).json()
+        assert result["created"] == 5
+        meals = client.get("/api/meals?start_date=2024-01-01&end_date=2024-01-05").json()
+        assert len(meals) == 5
+
+    def test_import_invalidates_cached_range(self, client):
+        """Test that imported meals show up in an already cached range."""
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-21"
+        assert client.get(url).json() == []
+
+        self._import(client, '{"date": "2024-01-16", "meal_type": "lunch", "name": "Soup"}')
+        assert [m["name"] for m in client.get(url).json()] == ["Soup"]
+
+    def test_import_invalid_encoding_fails(self, client):
+        """Test that a file that is not UTF-8 returns 400."""
+        response = self._import(client, b"\xff\xfe\x00garbage")
+        assert response.status_code == 400
+
+    def test_import_caps_listed_errors(self, client, monkeypatch):
+        """Test that only the first errors are listed but all are counted."""
+        monkeypatch.setattr(crud, "MAX_IMPORT_ERRORS", 2)
+        result = self._import(client, "x\ny\nz\n").json()
+        assert result["invalid"] == 3
+        assert len(result["errors"]) == 2
+
+
 class TestCreateMeal:
     """Tests for POST /api/meals endpoint."""
 
@@ -249,6 +656,92 @@ class TestUpdateMeal:
         assert update_response.json()["ingredients"] == ["maple syrup"]
 
 
+class TestSetMealSlot:
+    """Tests for PUT /api/meals/slot/{date}/{meal_type} endpoint."""
+
+    def test_set_slot_creates_meal(self, client):
+        """Test that an empty slot is filled and reported as created."""
+        response = client.put("/api/meals/slot/2024-01-15/lunch", json={
+            "name": " Soup ", "ingredients": ["carrot", ""]
+        })
+        assert response.status_code == 201
+        meal = response.json()
+        assert meal["date"] == "2024-01-15"
+        assert meal["meal_type"] == "lunch"
+        assert meal["name"] == "Soup"
+        assert meal["ingredients"] == ["carrot"]
+
+    def test_set_slot_replaces_meal(self, client, sample_meal):
+        """Test that a taken slot keeps its id and is reported as updated."""
+        response = client.put("/api/meals/slot/2024-01-15/breakfast", json={
+            "name": "Waffles", "ingredients": ["flour"]
+        })
+        assert response.status_code == 200
+        assert response.json()["id"] == sample_meal.id
+        assert response.json()["name"] == "Waffles"
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()
+        assert [m["name"] for m in meals] == ["Waffles"]
+
+    def test_set_slot_twice(self, client):
+        """Test that setting a slot again updates the meal it created."""
+        first = client.put("/api/meals/slot/2024-01-15/dinner", json={"name": "Pasta"})
+        second = client.put("/api/meals/slot/2024-01-15/dinner", json={"name": "Pizza"})
+        assert (first.status_code, second.status_code) == (201, 200)
+        assert first.json()["id"] == second.json()["id"]
+
+    def test_set_slot_keeps_timestamp_format(self, client, db_session):
+        """Test that an overwrite stamps updated_at like an insert and counts the overwrite."""
+        client.put("/api/meals/slot/2024-01-15/dinner", json={"name": "Pasta"})
+        client.put("/api/meals/slot/2024-01-15/dinner", json={"name": "Pizza"})
+
+        created_at, updated_at, overwrites = db_session.connection().exec_driver_sql(
+            "SELECT created_at, updated_at, overwrites FROM meals"
+        ).one()
+        assert len(updated_at) == len(created_at)
+        assert overwrites == 1
+
+    def test_set_slot_reports_from_one_statement(self, db_session, sample_meal):
+        """Test that created or updated comes from the upsert itself, without a SELECT first."""
+        statements = []
+        published = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        changes.subscribe(published.append)
+        try:
+            for meal_type in ("breakfast", "lunch", "lunch"):
+                crud.set_meal_slot(
+                    db_session, date(2024, 1, 15), meal_type, MealUpdate(name="Soup")
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+            changes.unsubscribe(published.append)
+
+        assert [statement.split()[0] for statement in statements] == ["INSERT"] * 3
+        assert [change.action for [change] in published] == ["updated", "created", "updated"]
+
+    def test_set_slot_keeps_search_in_sync(self, client, sample_meal):
+        """Test that replaced ingredients are searchable."""
+        client.put("/api/meals/slot/2024-01-15/breakfast", json={
+            "name": "Omelette", "ingredients": ["eggs"]
+        })
+        response = client.get("/api/meals/search?ingredient=eggs")
+        assert [m["name"] for m in response.json()] == ["Omelette"]
+
+    def test_set_slot_invalid_meal_type_fails(self, client):
+        """Test that an unknown meal type returns 422."""
+        response = client.put("/api/meals/slot/2024-01-15/brunch", json={"name": "Eggs"})
+        assert response.status_code == 422
+
+    def test_set_slot_empty_name_fails(self, client):
+        """Test that an empty name returns 422."""
+        response = client.put("/api/meals/slot/2024-01-15/lunch", json={"name": "  "})
+        assert response.status_code == 422
+
+
 class TestDeleteMeal:
     """Tests for DELETE /api/meals/{meal_id} endpoint."""
 
@@ -449,6 +942,37 @@ class TestSearchMeals:
         meals = response.json()
         assert len(meals) == 10
 
+    def test_search_meals_pagination(self, client):
+        """Test that limit and cursor page through all matches, latest first."""
+        for i in range(5):
+            for meal_type in ("breakfast", "dinner"):
+                client.post("/api/meals", json={
+                    "date": f"2024-01-{i + 1:02d}",
+                    "meal_type": meal_type,
+                    "name": f"Meal {i}",
+                    "ingredients": ["test"]
+                })
+
+        first = client.get("/api/meals/search?ingredient=test&limit=4").json()
+        assert len(first["items"]) == 4
+        assert first["next_cursor"] is not None
+
+        items = first["items"]
+        cursor = first["next_cursor"]
+        while cursor is not None:
+            page = client.get(f"/api/meals/search?ingredient=test&limit=4&cursor={cursor}").json()
+            items += page["items"]
+            cursor = page["next_cursor"]
+
+        assert len({m["id"] for m in items}) == 10
+        dates = [m["date"] for m in items]
+        assert dates == sorted(dates, reverse=True)
+
+    def test_search_meals_invalid_cursor_fails(self, client):
+        """Test that a malformed cursor returns 400."""
+        response = client.get("/api/meals/search?ingredient=test&cursor=not-a-cursor")
+        assert response.status_code == 400
+
     def test_search_meals_no_results(self, client):
         """Test searching for non-existent ingredient returns empty."""
         client.post("/api/meals", json={
@@ -490,3 +1014,551 @@ class TestSearchMeals:
         response = client.get("/api/meals/search?ingredient=chee")
         assert response.status_code == 200
         assert len(response.json()) == 0
+
+    def test_search_deep_page_seeks_on_index(self, db_session):
+        """Test that a page after a cursor is read from the index without sorting."""
+        stmt = (
+            "EXPLAIN QUERY PLAN SELECT meals.id FROM meals"
+            " JOIN meal_ingredients ON meal_ingredients.meal_id = meals.id"
+            " WHERE meal_ingredients.ingredient_norm = 'salt'"
+            " AND (meal_ingredients.date, meal_ingredients.meal_id) < ('2024-06-01', 5)"
+            " ORDER BY meal_ingredients.date DESC, meal_ingredients.meal_id DESC LIMIT 11"
+        )
+        plan = " ".join(row[3] for row in db_session.connection().exec_driver_sql(stmt))
+        assert "INDEX ix_meal_ingredients_ingredient_norm_date" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+class TestSearchMealsByText:
+    """Tests for GET /api/meals/search/text endpoint."""
+
+    def _create_meals(self, client):
+        client.post("/api/meals", json={
+            "date": "2024-01-15",
+            "meal_type": "breakfast",
+            "name": "Pancakes",
+            "ingredients": ["flour", "eggs", "milk"]
+        })
+        client.post("/api/meals", json={
+            "date": "2024-01-16",
+            "meal_type": "lunch",
+            "name": "Chicken Salad",
+            "ingredients": ["chicken", "lettuce"]
+        })
+        client.post("/api/meals", json={
+            "date": "2024-01-17",
+            "meal_type": "dinner",
+            "name": "Egg Fried Rice",
+            "ingredients": ["rice", "eggs", "chicken"]
+        })
+
+    def test_search_text_matches_name(self, client):
+        """Test that words in the meal name are searchable."""
+        self._create_meals(client)
+
+        response = client.get("/api/meals/search/text?q=salad")
+        assert response.status_code == 200
+        data = response.json()
+        assert [m["name"] for m in data["items"]] == ["Chicken Salad"]
+        assert data["next_cursor"] is None
+
+    def test_search_text_matches_ingredients(self, client):
+        """Test that ingredients are searchable."""
+        self._create_meals(client)
+
+        response = client.get("/api/meals/search/text?q=lettuce")
+        assert [m["name"] for m in response.json()["items"]] == ["Chicken Salad"]
+
+    def test_search_text_prefix_match(self, client):
+        """Test that partially typed words match as prefixes."""
+        self._create_meals(client)
+
+        response = client.get("/api/meals/search/text?q=panc")
+        assert [m["name"] for m in response.json()["items"]] == ["Pancakes"]
+
+    def test_search_text_all_words_must_match(self, client):
+        """Test that every word of the query has to match."""
+        self._create_meals(client)
+
+        response = client.get("/api/meals/search/text?q=chicken rice")
+        assert [m["name"] for m in response.json()["items"]] == ["Egg Fried Rice"]
+
+    def test_search_text_ranks_name_matches_first(self, client):
+        """Test that a match in the name ranks above a match in ingredients."""
+        self._create_meals(client)
+
+        response = client.get("/api/meals/search/text?q=chicken")
+        names = [m["name"] for m in response.json()["items"]]
+        assert names == ["Chicken Salad", "Egg Fried Rice"]
+
+    def test_search_text_reflects_updates_and_deletes(self, client):
+        """Test that the index follows updates and deletes."""
+        create_response = client.post("/api/meals", json={
+            "date": "2024-01-15",
+            "meal_type": "breakfast",
+            "name": "Pancakes"
+        })
+        meal_id = create_response.json()["id"]
+
+        client.put(f"/api/meals/{meal_id}", json={"name": "Waffles"})
+        assert client.get("/api/meals/search/text?q=pancakes").json()["items"] == []
+        assert len(client.get("/api/meals/search/text?q=waffles").json()["items"]) == 1
+
+        client.delete(f"/api/meals/{meal_id}")
+        assert client.get("/api/meals/search/text?q=waffles").json()["items"] == []
+
+    def test_search_text_pagination(self, client):
+        """Test that results are paginated with a cursor."""
+        for i in range(5):
+            client.post("/api/meals", json={
+                "date": f"2024-01-{i + 1:02d}",
+                "meal_type": "dinner",
+                "name": f"Soup {i}"
+            })
+
+        first = client.get("/api/meals/search/text?q=soup&limit=3").json()
+        assert len(first["items"]) == 3
+        assert first["next_cursor"] is not None
+
+        second = client.get(
+            f"/api/meals/search/text?q=soup&limit=3&cursor={first['next_cursor']}"
+        ).json()
+        assert len(second["items"]) == 2
+        assert second["next_cursor"] is None
+
+        ids = [m["id"] for m in first["items"] + second["items"]]
+        assert len(set(ids)) == 5
+
+    def test_search_text_pagination_with_ties(self, client):
+        """Test that meals tied on rank and date are each returned on exactly one page."""
+        for meal_type in ("breakfast", "lunch", "dinner"):
+            client.post("/api/meals", json={
+                "date": "2024-01-15",
+                "meal_type": meal_type,
+                "name": "Soup"
+            })
+
+        ids = []
+        cursor = None
+        while True:
+            url = "/api/meals/search/text?q=soup&limit=1"
+            page = client.get(url + (f"&cursor={cursor}" if cursor else "")).json()
+            ids += [m["id"] for m in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert ids == sorted(set(ids), reverse=True)
+        assert len(ids) == 3
+
+    def test_search_text_ignores_query_syntax(self, client):
+        """Test that FTS operators in the query are treated as plain words."""
+        self._create_meals(client)
+
+        response = client.get('/api/meals/search/text?q="pancakes" OR -(')
+        assert response.status_code == 200
+        assert response.json()["items"] == []
+
+    def test_search_text_invalid_cursor_fails(self, client):
+        """Test that a malformed cursor returns 400."""
+        response = client.get("/api/meals/search/text?q=soup&cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    def test_search_text_missing_query_fails(self, client):
+        """Test that missing query parameter fails."""
+        response = client.get("/api/meals/search/text")
+        assert response.status_code == 422
+
+
+class TestCreateMealsBatch:
+    """Tests for POST /api/meals/batch endpoint."""
+
+    def test_batch_create_success(self, client):
+        """Test creating several meals in one request."""
+        response = client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+            {"date": "2024-01-15", "meal_type": "lunch", "name": "Salad",
+             "ingredients": ["lettuce"]},
+            {"date": "2024-01-16", "meal_type": "dinner", "name": "Pizza"},
+        ]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert [r["status"] for r in data["results"]] == ["created"] * 3
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        assert data["results"][1]["meal"]["ingredients"] == ["lettuce"]
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-16").json()
+        assert len(meals) == 3
+
+    def test_batch_create_reports_invalid_items(self, client):
+        """Test that invalid items are reported without failing the batch."""
+        response = client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+            {"date": "2024-01-15", "meal_type": "brunch", "name": "Eggs"},
+            {"date": "2024-01-16", "meal_type": "dinner", "name": "  "},
+        ]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 1
+        assert data["invalid"] == 2
+        assert [r["status"] for r in data["results"]] == ["created", "invalid", "invalid"]
+        assert "meal_type" in data["results"][1]["detail"]
+
+    def test_batch_create_skip_conflicts(self, client, sample_meal):
+        """Test that the skip policy keeps existing meals."""
+        response = client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Waffles"},
+            {"date": "2024-01-15", "meal_type": "lunch", "name": "Salad"},
+        ]})
+
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == ["conflict", "created"]
+        assert "already exists" in data["results"][0]["detail"]
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()
+        assert {m["name"] for m in meals} == {sample_meal.name, "Salad"}
+
+    def test_batch_create_overwrite_conflicts(self, client, sample_meal):
+        """Test that the overwrite policy replaces existing meals in place."""
+        response = client.post("/api/meals/batch", json={
+            "on_conflict": "overwrite",
+            "items": [
+                {"date": "2024-01-15", "meal_type": "breakfast", "name": "Waffles",
+                 "ingredients": ["flour"]},
+                {"date": "2024-01-15", "meal_type": "lunch", "name": "Salad"},
+            ],
+        })
+
+        data = response.json()
+        assert data["overwritten"] == 1
+        assert data["created"] == 1
+        overwritten = data["results"][0]
+        assert overwritten["status"] == "overwritten"
+        assert overwritten["meal"]["id"] == sample_meal.id
+        assert overwritten["meal"]["name"] == "Waffles"
+        assert overwritten["meal"]["ingredients"] == ["flour"]
+
+    def test_batch_create_fail_policy_writes_nothing(self, client, sample_meal, sample_meal_data):
+        """Test that the fail policy rejects the whole batch on a conflict."""
+        response = client.post("/api/meals/batch", json={
+            "on_conflict": "fail",
+            "items": [
+                {"date": "2024-01-16", "meal_type": "lunch", "name": "Salad"},
+                {"date": "2024-01-15", "meal_type": "breakfast", "name": "Waffles"},
+            ],
+        })
+
+        assert response.status_code == 409
+        data = response.json()
+        assert data["conflicts"] == 1
+        assert data["results"][0]["index"] == 1
+
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-16").json()
+        assert [m["name"] for m in meals] == [sample_meal_data["name"]]
+
+    def test_batch_create_fail_policy_slot_taken_concurrently(self, client):
+        """Test that the fail policy writes nothing when a concurrent writer takes a slot."""
+
+        taken = []
+
+        def take_slot(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO meals") and not taken:
+                taken.append(statement)
+                cursor.execute(
+                    "INSERT INTO meals (date, meal_type, name, ingredients)"
+                    " VALUES ('2024-01-15', 'breakfast', 'Waffles', '[]')"
+                )
+
+        event.listen(engine, "before_cursor_execute", take_slot)
+        try:
+            response = client.post("/api/meals/batch", json={
+                "on_conflict": "fail",
+                "items": [
+                    {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+                    {"date": "2024-01-16", "meal_type": "lunch", "name": "Salad"},
+                ],
+            })
+        finally:
+            event.remove(engine, "before_cursor_execute", take_slot)
+
+        assert response.status_code == 409
+        data = response.json()
+        assert data["conflicts"] == 1
+        assert data["created"] == 0
+        assert data["results"][0]["index"] == 0
+        meals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-16").json()
+        assert [m["name"] for m in meals if m["name"] == "Salad"] == []
+
+    def test_batch_create_overwrite_status_from_insert(self, client):
+        """Test that a slot filled just before the insert is reported as overwritten."""
+        taken = []
+
+        def take_slot(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO meals") and not taken:
+                taken.append(statement)
+                cursor.execute(
+                    "INSERT INTO meals (date, meal_type, name, ingredients)"
+                    " VALUES ('2024-01-15', 'breakfast', 'Waffles', '[]')"
+                )
+
+        event.listen(engine, "before_cursor_execute", take_slot)
+        try:
+            response = client.post("/api/meals/batch", json={
+                "on_conflict": "overwrite",
+                "items": [
+                    {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+                    {"date": "2024-01-16", "meal_type": "lunch", "name": "Salad"},
+                ],
+            })
+        finally:
+            event.remove(engine, "before_cursor_execute", take_slot)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == ["overwritten", "created"]
+        assert (data["created"], data["overwritten"]) == (1, 1)
+
+    def test_batch_create_duplicate_slots_in_batch(self, client):
+        """Test that a slot repeated within the batch is a conflict."""
+        response = client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Waffles"},
+        ]})
+
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == ["created", "conflict"]
+        assert "item 0" in data["results"][1]["detail"]
+
+    def test_batch_create_keeps_ingredient_search_in_sync(self, client):
+        """Test that batch inserts are visible to ingredient search."""
+        client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Omelette",
+             "ingredients": ["Eggs"]},
+        ]})
+
+        response = client.get("/api/meals/search?ingredient=eggs")
+        assert [m["name"] for m in response.json()] == ["Omelette"]
+
+    def test_batch_create_conflicts_release_the_writer(self, file_client):
+        """Test that conflicting batches beyond the threadpool size don't stall the writer."""
+        meal = {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"}
+        file_client.post("/api/meals", json=meal)
+
+        for policy in ("fail", "skip"):
+            statuses = send_together(
+                file_client, "POST", "/api/meals/batch", 60,
+                json={"on_conflict": policy, "items": [meal]},
+            )
+            assert statuses == [409 if policy == "fail" else 200] * 60
+
+    def test_batch_create_empty_fails(self, client):
+        """Test that an empty batch fails validation."""
+        response = client.post("/api/meals/batch", json={"items": []})
+        assert response.status_code == 422
+
+    def test_batch_create_invalid_policy_fails(self, client):
+        """Test that an unknown conflict policy fails validation."""
+        response = client.post("/api/meals/batch", json={
+            "on_conflict": "merge",
+            "items": [{"date": "2024-01-15", "meal_type": "breakfast", "name": "Eggs"}],
+        })
+        assert response.status_code == 422
+
+
+class TestCopyMealRange:
+    """Tests for POST /api/meals/copy-range endpoint."""
+
+    def test_copy_range_success(self, client, sample_meals):
+        """Test cloning a range of days shifts every meal by the same offset."""
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-17",
+            "target_start": "2024-01-22",
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"copied": 6, "skipped": 0, "overwritten": 0}
+
+        copies = client.get("/api/meals?start_date=2024-01-22&end_date=2024-01-24").json()
+        originals = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-17").json()
+        assert [(m["meal_type"], m["name"]) for m in copies] == [
+            (m["meal_type"], m["name"]) for m in originals
+        ]
+        assert copies[0]["date"] == "2024-01-22"
+        assert copies[-1]["date"] == "2024-01-24"
+
+    def test_copy_range_copies_ingredients(self, client):
+        """Test that copied meals keep their ingredients and stay searchable."""
+        client.post("/api/meals", json={
+            "date": "2024-01-15",
+            "meal_type": "breakfast",
+            "name": "Pancakes",
+            "ingredients": ["flour", "eggs"]
+        })
+
+        client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-15",
+            "target_start": "2024-02-01",
+        })
+
+        copies = client.get("/api/meals?start_date=2024-02-01&end_date=2024-02-01").json()
+        assert copies[0]["ingredients"] == ["flour", "eggs"]
+        search = client.get("/api/meals/search?ingredient=eggs").json()
+        assert [m["date"] for m in search] == ["2024-02-01", "2024-01-15"]
+
+    def test_copy_range_skips_conflicts(self, client, sample_meals):
+        """Test that the skip policy leaves occupied target slots alone."""
+        client.post("/api/meals", json={
+            "date": "2024-01-22", "meal_type": "breakfast", "name": "Waffles"
+        })
+
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-15",
+            "target_start": "2024-01-22",
+        })
+
+        assert response.json() == {"copied": 2, "skipped": 1, "overwritten": 0}
+        copies = client.get("/api/meals?start_date=2024-01-22&end_date=2024-01-22").json()
+        assert "Waffles" in [m["name"] for m in copies]
+
+    def test_copy_range_overwrites_conflicts(self, client, sample_meals):
+        """Test that the overwrite policy replaces occupied target slots."""
+        client.post("/api/meals", json={
+            "date": "2024-01-22", "meal_type": "breakfast", "name": "Waffles"
+        })
+
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-15",
+            "target_start": "2024-01-22",
+            "on_conflict": "overwrite",
+        })
+
+        assert response.json() == {"copied": 2, "skipped": 0, "overwritten": 1}
+        copies = client.get("/api/meals?start_date=2024-01-22&end_date=2024-01-22").json()
+        assert [m["name"] for m in copies] == ["Pancakes", "Pasta Carbonara", "Chicken Salad"]
+
+    def test_copy_range_fail_policy_writes_nothing(self, client, sample_meals):
+        """Test that the fail policy rejects the copy when any slot is taken."""
+        client.post("/api/meals", json={
+            "date": "2024-01-22", "meal_type": "breakfast", "name": "Waffles"
+        })
+
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-15",
+            "target_start": "2024-01-22",
+            "on_conflict": "fail",
+        })
+
+        assert response.status_code == 409
+        copies = client.get("/api/meals?start_date=2024-01-22&end_date=2024-01-22").json()
+        assert [m["name"] for m in copies] == ["Waffles"]
+
+    def test_copy_range_overlapping_ranges(self, client, sample_meals):
+        """Test shifting a range onto itself reads the source before writing."""
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-17",
+            "target_start": "2024-01-16",
+            "on_conflict": "overwrite",
+        })
+
+        # 16th breakfast and lunch were taken; the 17th keeps its own dinner
+        assert response.json() == {"copied": 4, "skipped": 0, "overwritten": 2}
+        meals = client.get("/api/meals?start_date=2024-01-16&end_date=2024-01-18").json()
+        assert [(m["date"], m["name"]) for m in meals] == [
+            ("2024-01-16", "Pancakes"),
+            ("2024-01-16", "Pasta Carbonara"),
+            ("2024-01-16", "Chicken Salad"),
+            ("2024-01-17", "Oatmeal"),
+            ("2024-01-17", "Pizza"),
+            ("2024-01-17", "Sandwich"),
+            ("2024-01-18", "Pizza"),
+        ]
+
+    def test_copy_range_empty_source(self, client):
+        """Test copying an empty range copies nothing."""
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-21",
+            "target_start": "2024-01-22",
+        })
+        assert response.json() == {"copied": 0, "skipped": 0, "overwritten": 0}
+
+    def test_copy_range_invalid_range_fails(self, client):
+        """Test that an inverted or zero-offset range fails validation."""
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-21",
+            "source_end": "2024-01-15",
+            "target_start": "2024-01-22",
+        })
+        assert response.status_code == 422
+
+        response = client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-21",
+            "target_start": "2024-01-15",
+        })
+        assert response.status_code == 422
+
+
+class TestCopyMealMany:
+    """Tests for POST /api/meals/{meal_id}/copy-many endpoint."""
+
+    def test_copy_many_fans_out(self, client, sample_meal):
+        """Test copying one meal to every date and meal type combination."""
+        response = client.post(f"/api/meals/{sample_meal.id}/copy-many", json={
+            "target_dates": ["2024-01-20", "2024-01-21"],
+            "target_meal_types": ["lunch", "dinner"],
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"copied": 4, "skipped": 0, "overwritten": 0}
+        meals = client.get("/api/meals?start_date=2024-01-20&end_date=2024-01-21").json()
+        assert len(meals) == 4
+        assert {m["name"] for m in meals} == {sample_meal.name}
+
+    def test_copy_many_conflict_policies(self, client, sample_meal):
+        """Test skip and overwrite policies on occupied slots."""
+        client.post("/api/meals", json={
+            "date": "2024-01-20", "meal_type": "lunch", "name": "Salad"
+        })
+        payload = {"target_dates": ["2024-01-20"], "target_meal_types": ["lunch", "dinner"]}
+
+        response = client.post(f"/api/meals/{sample_meal.id}/copy-many", json=payload)
+        assert response.json() == {"copied": 1, "skipped": 1, "overwritten": 0}
+
+        response = client.post(
+            f"/api/meals/{sample_meal.id}/copy-many",
+            json={**payload, "on_conflict": "overwrite"},
+        )
+        assert response.json() == {"copied": 0, "skipped": 0, "overwritten": 2}
+
+        response = client.post(
+            f"/api/meals/{sample_meal.id}/copy-many",
+            json={**payload, "on_conflict": "fail"},
+        )
+        assert response.status_code == 409
+
+    def test_copy_many_source_not_found(self, client):
+        """Test copying a non-existent meal returns 404."""
+        response = client.post("/api/meals/99999/copy-many", json={
+            "target_dates": ["2024-01-20"],
+            "target_meal_types": ["lunch"],
+        })
+        assert response.status_code == 404
+        assert "Source meal not found" in response.json()["detail"]
+
+    def test_copy_many_invalid_meal_type_fails(self, client, sample_meal):
+        """Test that an invalid meal type fails validation."""
+        response = client.post(f"/api/meals/{sample_meal.id}/copy-many", json={
+            "target_dates": ["2024-01-20"],
+            "target_meal_types": ["snack"],
+        })
+        assert response.status_code == 422
@@ -0,0 +1,117 @@
+"""
+Tests for the async meal endpoints (ASYNC_DATABASE mode).
+
+The handlers share their queries with the sync router, so these tests
+cover that each route is wired up and behaves the same, not every rule.
+"""
+
+
+class TestAsyncMeals:
+    """Tests for the async variants of the meal endpoints."""
+
+    def test_create_and_get_meals(self, async_client, sample_meal_data):
+        """Test creating a meal and reading it back by date range."""
+        response = async_client.post("/api/meals", json=sample_meal_data)
+        assert response.status_code == 201
+        assert response.json()["name"] == sample_meal_data["name"]
+
+        response = async_client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-21")
+        assert response.status_code == 200
+        assert [m["name"] for m in response.json()] == [sample_meal_data["name"]]
+
+    def test_create_duplicate_fails(self, async_client, sample_meal_data):
+        """Test that a taken slot returns 409."""
+        async_client.post("/api/meals", json=sample_meal_data)
+        response = async_client.post("/api/meals", json=sample_meal_data)
+        assert response.status_code == 409
+        assert "already exists" in response.json()["detail"]
+
+    def test_update_and_delete_meal(self, async_client, sample_meal_data):
+        """Test updating and then deleting a meal."""
+        meal_id = async_client.post("/api/meals", json=sample_meal_data).json()["id"]
+
+        response = async_client.put(
+            f"/api/meals/{meal_id}", json={"name": "Waffles", "ingredients": ["flour"]}
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == "Waffles"
+        assert response.json()["ingredients"] == ["flour"]
+
+        assert async_client.delete(f"/api/meals/{meal_id}").status_code == 204
+        assert async_client.delete(f"/api/meals/{meal_id}").status_code == 404
+
+    def test_copy_meal(self, async_client, sample_meal_data):
+        """Test copying a meal to another slot."""
+        meal_id = async_client.post("/api/meals", json=sample_meal_data).json()["id"]
+
+        response = async_client.post(
+            f"/api/meals/{meal_id}/copy",
+            json={"target_date": "2024-01-20", "target_meal_type": "dinner"}
+        )
+        assert response.status_code == 201
+        assert response.json()["date"] == "2024-01-20"
+
+    def test_search_endpoints(self, async_client):
+        """Test ingredient and full-text search."""
+        async_client.post("/api/meals", json={
+            "date": "2024-01-15",
+            "meal_type": "breakfast",
+            "name": "Pancakes",
+            "ingredients": ["Flour", "eggs"]
+        })
+
+        response = async_client.get("/api/meals/search?ingredient=flour")
+        assert [m["name"] for m in response.json()] == ["Pancakes"]
+
+        response = async_client.get("/api/meals/search/text?q=panc")
+        assert [m["name"] for m in response.json()["items"]] == ["Pancakes"]
+
+        response = async_client.get("/api/meals/search?ingredient=flour&limit=1")
+        page = response.json()
+        assert [m["name"] for m in page["items"]] == ["Pancakes"]
+        assert page["next_cursor"] is None
+
+    def test_get_meals_paginated(self, async_client, sample_meal_data):
+        """Test reading a date range page by page."""
+        for meal_type in ("breakfast", "lunch", "dinner"):
+            async_client.post("/api/meals", json={**sample_meal_data, "meal_type": meal_type})
+
+        url = "/api/meals?start_date=2024-01-15&end_date=2024-01-15&limit=2"
+        first = async_client.get(url).json()
+        second = async_client.get(f"{url}&cursor={first['next_cursor']}").json()
+        assert [m["meal_type"] for m in first["items"] + second["items"]] == [
+            "breakfast", "dinner", "lunch"
+        ]
+        assert second["next_cursor"] is None
+
+    def test_batch_and_range_copy(self, async_client):
+        """Test the multi-meal write endpoints."""
+        response = async_client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "breakfast", "name": "Pancakes"},
+            {"date": "2024-01-15", "meal_type": "lunch", "name": "Salad"},
+        ]})
+        assert response.json()["created"] == 2
+
+        response = async_client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-15",
+            "target_start": "2024-01-22",
+        })
+        assert response.json() == {"copied": 2, "skipped": 0, "overwritten": 0}
+
+        meal_id = async_client.get(
+            "/api/meals?start_date=2024-01-15&end_date=2024-01-15"
+        ).json()[0]["id"]
+        response = async_client.post(f"/api/meals/{meal_id}/copy-many", json={
+            "target_dates": ["2024-01-29"],
+            "target_meal_types": ["breakfast", "dinner"],
+        })
+        assert response.json() == {"copied": 2, "skipped": 0, "overwritten": 0}
+
+    def test_set_meal_slot(self, async_client):
+        """Test creating and then replacing the meal in a slot."""
+        first = async_client.put("/api/meals/slot/2024-01-15/lunch", json={"name": "Soup"})
+        second = async_client.put("/api/meals/slot/2024-01-15/lunch", json={"name": "Stew"})
+        assert (first.status_code, second.status_code) == (201, 200)
+        assert second.json()["id"] == first.json()["id"]
+        assert second.json()["name"] == "Stew"
@@ -0,0 +1,88 @@
+"""
+Tests for the shopping list endpoint.
+"""
+import pytest
+
+
+@pytest.fixture
+def planned_meals(client):
+    """A few meals sharing ingredients in different spellings."""
+    for meal in [
+        {"date": "2024-01-16", "meal_type": "lunch", "name": "Quiche",
+         "ingredients": ["Eggs", "milk", "flour"]},
+        {"date": "2024-01-15", "meal_type": "dinner", "name": "Carbonara",
+         "ingredients": [" eggs", "pasta"]},
+        {"date": "2024-01-15", "meal_type": "breakfast", "name": "Omelette",
+         "ingredients": ["EGGS"]},
+        {"date": "2024-01-22", "meal_type": "lunch", "name": "Pasta salad",
+         "ingredients": ["pasta"]},
+    ]:
+        assert client.post("/api/meals", json=meal).status_code == 201
+
+
+class TestShoppingList:
+    """Tests for GET /api/shopping-list endpoint."""
+
+    def test_shopping_list_groups_ingredients(self, client, planned_meals):
+        """Test that ingredients are normalized, counted and sorted."""
+        response = client.get("/api/shopping-list?start_date=2024-01-15&end_date=2024-01-21")
+        assert response.status_code == 200
+
+        items = response.json()
+        assert [(item["ingredient"], item["count"]) for item in items] == [
+            ("eggs", 3), ("flour", 1), ("milk", 1), ("pasta", 1)
+        ]
+
+    def test_shopping_list_lists_dates_and_meals(self, client, planned_meals):
+        """Test that each ingredient lists its distinct dates and meals in calendar order."""
+        items = client.get(
+            "/api/shopping-list?start_date=2024-01-15&end_date=2024-01-21"
+        ).json()
+        eggs = items[0]
+
+        assert eggs["dates"] == ["2024-01-15", "2024-01-16"]
+        assert [(m["date"], m["meal_type"], m["name"]) for m in eggs["meals"]] == [
+            ("2024-01-15", "breakfast", "Omelette"),
+            ("2024-01-15", "dinner", "Carbonara"),
+            ("2024-01-16", "lunch", "Quiche"),
+        ]
+
+    def test_shopping_list_respects_range(self, client, planned_meals):
+        """Test that meals outside the range are not counted."""
+        items = client.get(
+            "/api/shopping-list?start_date=2024-01-01&end_date=2024-01-31"
+        ).json()
+        pasta = next(item for item in items if item["ingredient"] == "pasta")
+        assert pasta["count"] == 2
+
+        items = client.get(
+            "/api/shopping-list?start_date=2024-01-22&end_date=2024-01-22"
+        ).json()
+        assert [item["ingredient"] for item in items] == ["pasta"]
+
+    def test_shopping_list_follows_edits(self, client, planned_meals):
+        """Test that updated and deleted meals are reflected immediately."""
+        quiche, = client.get("/api/meals?start_date=2024-01-16&end_date=2024-01-16").json()
+        client.put(f"/api/meals/{quiche['id']}", json={
+            "name": "Pancakes", "ingredients": ["flour"]
+        })
+        omelette = client.get("/api/meals?start_date=2024-01-15&end_date=2024-01-15").json()[0]
+        client.delete(f"/api/meals/{omelette['id']}")
+
+        items = client.get(
+            "/api/shopping-list?start_date=2024-01-15&end_date=2024-01-21"
+        ).json()
+        assert [(item["ingredient"], item["count"]) for item in items] == [
+            ("eggs", 1), ("flour", 1), ("pasta", 1)
+        ]
+
+    def test_shopping_list_empty(self, client):
+        """Test that a range without meals returns an empty list."""
+        response = client.get("/api/shopping-list?start_date=2024-01-15&end_date=2024-01-21")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_shopping_list_missing_params(self, client):
+        """Test that missing query parameters returns 422."""
+        response = client.get("/api/shopping-list")
+        assert response.status_code == 422
@@ -0,0 +1,210 @@
+"""
+Tests for the Server-Sent Events change feed.
+"""
+import asyncio
+import signal
+import threading
+import time
+from datetime import date
+
+from app.broadcast import ChangeBroadcaster, change_broadcaster
+from app.changes import MealChange
+
+
+def change(meal_id: int, day: int, action: str = "created") -> MealChange:
+    return MealChange(action=action, id=meal_id, date=date(2024, 1, day), meal_type="lunch")
+
+
+def frames(chunk: bytes) -> list[str]:
+    return [frame for frame in chunk.decode().split("\n\n") if frame]
+
+
+class TestChangeBroadcaster:
+    """Tests for fan-out to stream subscribers."""
+
+    def test_events_filtered_by_date_range(self):
+        """Test that a stream only gets the changes inside its range."""
+        broadcaster = ChangeBroadcaster()
+
+        async def scenario():
+            stream = broadcaster.stream(date(2024, 1, 15), date(2024, 1, 21))
+            assert await anext(stream) == b"retry: 3000\n\n"
+            broadcaster.publish([change(1, 14), change(2, 15), change(3, 22, "deleted")])
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        [frame] = frames(asyncio.run(scenario()))
+        assert frame == (
+            f"id: {broadcaster.token}-2\nevent: created\n"
+            'data: {"id":2,"date":"2024-01-15","meal_type":"lunch"}'
+        )
+        assert broadcaster.subscribers == 0
+
+    def test_changes_from_other_threads(self):
+        """Test that changes published by threadpool threads reach the stream."""
+        broadcaster = ChangeBroadcaster()
+
+        async def scenario():
+            stream = broadcaster.stream()
+            await anext(stream)
+            await asyncio.to_thread(broadcaster.publish, [change(1, 15, "updated")])
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        assert "event: updated" in asyncio.run(scenario()).decode()
+
+    def test_subscriber_too_far_behind_is_reset(self):
+        """Test that a full queue is dropped for a single reset event."""
+        broadcaster = ChangeBroadcaster(queue_size=2)
+
+        async def scenario():
+            stream = broadcaster.stream()
+            await anext(stream)
+            for meal_id in range(3):
+                broadcaster.publish([change(meal_id, 15)])
+            await asyncio.sleep(0)
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        [frame] = frames(asyncio.run(scenario()))
+        assert frame == f"id: {broadcaster.token}-3\nevent: reset"
+        assert broadcaster.resets == 1
+
+    def test_reset_days_reaches_streams_showing_them(self):
+        """Test that days written elsewhere reset only the streams whose range holds them."""
+        broadcaster = ChangeBroadcaster()
+
+        async def scenario():
+            week = broadcaster.stream(date(2024, 1, 15), date(2024, 1, 21))
+            next_week = broadcaster.stream(date(2024, 1, 22), date(2024, 1, 28))
+            await anext(week)
+            await anext(next_week)
+            broadcaster.reset_days({date(2024, 1, 16)})
+            chunk = await anext(week)
+            queued = [subscriber.queue.qsize() for subscriber in broadcaster._subscribers]
+            await week.aclose()
+            await next_week.aclose()
+            return chunk, queued
+
+        chunk, queued = asyncio.run(scenario())
+        assert frames(chunk) == [f"id: {broadcaster.token}-0\nevent: reset"]
+        assert queued == [0, 0]
+
+    def test_reconnect_replays_missed_events(self):
+        """Test that Last-Event-ID resumes after the last event the client saw."""
+        broadcaster = ChangeBroadcaster(replay=2)
+        broadcaster.publish([change(1, 15), change(2, 16), change(3, 17)])
+
+        async def first_chunk(last_event_id):
+            stream = broadcaster.stream(last_event_id=last_event_id)
+            await anext(stream)
+            chunk = await anext(stream)
+            await stream.aclose()
+            return frames(chunk)
+
+        replayed = asyncio.run(first_chunk(f"{broadcaster.token}-2"))
+        assert [frame.splitlines()[0] for frame in replayed] == [f"id: {broadcaster.token}-3"]
+        # Event 1 is no longer kept, and another process's ids mean nothing here
+        for last_event_id in (f"{broadcaster.token}-0", "0000-2", "garbage"):
+            [frame] = asyncio.run(first_chunk(last_event_id))
+            assert frame.endswith("event: reset")
+
+    def test_idle_stream_gets_keep_alive(self):
+        """Test that an idle stream sends comments, which reveal closed connections."""
+        broadcaster = ChangeBroadcaster(heartbeat=0.01)
+
+        async def scenario():
+            stream = broadcaster.stream()
+            await anext(stream)
+            chunk = await anext(stream)
+            await stream.aclose()
+            return chunk
+
+        assert asyncio.run(scenario()) == b": keep-alive\n\n"
+
+    def test_many_idle_streams_without_threads(self):
+        """Test that hundreds of open streams share the event loop."""
+        broadcaster = ChangeBroadcaster()
+        threads_before = threading.active_count()
+
+        async def scenario():
+            streams = [broadcaster.stream() for _ in range(500)]
+            for stream in streams:
+                await anext(stream)
+            assert threading.active_count() == threads_before
+            broadcaster.publish([change(1, 15)])
+            chunks = await asyncio.gather(*(anext(stream) for stream in streams))
+            broadcaster.close()
+            ended = await asyncio.gather(
+                *(anext(stream, None) for stream in streams)
+            )
+            return chunks, ended
+
+        chunks, ended = asyncio.run(scenario())
+        assert all(b"event: created" in chunk for chunk in chunks)
+        assert ended == [None] * 500
+        assert broadcaster.subscribers == 0
+
+    def test_exit_signal_ends_streams(self):
+        """Test that SIGTERM ends open streams, and new ones, before the server's handler runs."""
+        broadcaster = ChangeBroadcaster()
+        received = []
+        handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+        signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))
+
+        async def scenario():
+            broadcaster.close_on_exit_signals()
+            stream = broadcaster.stream()
+            await anext(stream)
+            signal.raise_signal(signal.SIGTERM)
+            ended = await anext(stream, None)
+            late = [chunk async for chunk in broadcaster.stream()]
+            return ended, late
+
+        try:
+            ended, late = asyncio.run(scenario())
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        assert (ended, late) == (None, [])
+        assert received == [signal.SIGTERM]
+        assert broadcaster.subscribers == 0
+
+
+class TestStreamEndpoint:
+    """Tests for GET /api/meals/stream."""
+
+    def test_stream_receives_api_writes(self, client):
+        """Test that writes through the API are pushed to an open stream."""
+        responses = []
+        reader = threading.Thread(target=lambda: responses.append(client.get(
+            "/api/meals/stream",
+            params={"start_date": "2024-01-15", "end_date": "2024-01-21"},
+        )))
+        reader.start()
+        deadline = time.monotonic() + 5
+        while change_broadcaster.subscribers == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        meal = client.post("/api/meals", json={
+            "date": "2024-01-16", "meal_type": "dinner", "name": "Soup"
+        }).json()
+        client.post("/api/meals", json={
+            "date": "2024-02-01", "meal_type": "dinner", "name": "Outside the range"
+        })
+        client.delete(f"/api/meals/{meal['id']}")
+        time.sleep(0.05)
+        change_broadcaster.close()
+        reader.join(5)
+
+        [response] = responses
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            line.removeprefix("event: ")
+            for line in response.text.splitlines() if line.startswith("event: ")
+        ]
+        assert events == ["created", "deleted"]
+        assert f'"id":{meal["id"]},"date":"2024-01-16"' in response.text
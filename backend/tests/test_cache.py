@@ -0,0 +1,176 @@
+"""
+Tests for the date-range response cache.
+"""
+from datetime import date
+
+from app import crud
+from app.cache import RangeCache, meal_cache
+from app.changes import MealChange
+
+WEEK = (date(2024, 1, 15), date(2024, 1, 21))
+NEXT_WEEK = (date(2024, 1, 22), date(2024, 1, 28))
+
+
+class TestRangeCache:
+    """Tests for RangeCache."""
+
+    def test_get_after_put(self):
+        """Test that a stored response is returned and counted as a hit."""
+        cache = RangeCache()
+        cache.put(WEEK, 'W/"1"', b"[]", cache.generation)
+
+        assert cache.get(WEEK) == ('W/"1"', b"[]")
+        assert cache.get(NEXT_WEEK) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_by_entries(self):
+        """Test that the least recently used range is evicted first."""
+        cache = RangeCache(max_entries=2)
+        third = (date(2024, 1, 29), date(2024, 2, 4))
+        cache.put(WEEK, "a", b"1", cache.generation)
+        cache.put(NEXT_WEEK, "b", b"2", cache.generation)
+        cache.get(WEEK)
+        cache.put(third, "c", b"3", cache.generation)
+
+        assert cache.get(NEXT_WEEK) is None
+        assert cache.get(WEEK) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_size(self):
+        """Test that entries are evicted to stay under the byte budget."""
+        cache = RangeCache(max_bytes=10)
+        cache.put(WEEK, "a", b"123456", cache.generation)
+        cache.put(NEXT_WEEK, "b", b"123456", cache.generation)
+
+        assert cache.get(WEEK) is None
+        assert cache.stats()["bytes"] == 6
+
+    def test_expired_entries_are_misses(self):
+        """Test that entries older than the TTL are dropped."""
+        cache = RangeCache(ttl=0)
+        cache.put(WEEK, "a", b"[]", cache.generation)
+
+        assert cache.get(WEEK) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_invalidate_only_ranges_containing_date(self):
+        """Test that invalidation is limited to ranges containing the date."""
+        cache = RangeCache()
+        cache.put(WEEK, "a", b"[]", cache.generation)
+        cache.put(NEXT_WEEK, "b", b"[]", cache.generation)
+
+        cache.invalidate_changes([
+            MealChange(action="created", id=1, date=date(2024, 1, 17), meal_type="lunch")
+        ])
+
+        assert cache.get(WEEK) is None
+        assert cache.get(NEXT_WEEK) is not None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_put_after_concurrent_invalidation_is_dropped(self):
+        """Test that a response read before a write is not cached after it."""
+        cache = RangeCache()
+        generation = cache.generation
+        cache.invalidate_dates({date(2024, 3, 1)})
+        cache.put(WEEK, "a", b"[]", generation)
+
+        assert cache.get(WEEK) is None
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test that a disabled cache never returns entries."""
+        cache = RangeCache(enabled=False)
+        cache.put(WEEK, "a", b"[]", cache.generation)
+
+        assert cache.get(WEEK) is None
+
+    def test_from_env(self):
+        """Test configuration from environment variables."""
+        cache = RangeCache.from_env({
+            "MEAL_CACHE_ENABLED": "false",
+            "MEAL_CACHE_MAX_ENTRIES": "8",
+            "MEAL_CACHE_TTL": "2.5",
+        })
+        assert cache.enabled is False
+        assert cache.max_entries == 8
+        assert cache.ttl == 2.5
+
+
+class TestRangeCacheApi:
+    """Tests for the cache behind GET /api/meals."""
+
+    URL = "/api/meals?start_date=2024-01-15&end_date=2024-01-21"
+
+    def test_repeated_reads_hit_cache(self, client, sample_meals):
+        """Test that a second read of the same range is a cache hit."""
+        first = client.get(self.URL)
+        before = client.get("/api/diagnostics/cache").json()
+        second = client.get(self.URL)
+        after = client.get("/api/diagnostics/cache").json()
+
+        assert second.json() == first.json()
+        assert second.headers["etag"] == first.headers["etag"]
+        assert after["hits"] == before["hits"] + 1
+
+    def test_writes_invalidate_cached_range(self, client, sample_meals):
+        """Test that every write path refreshes the cached range."""
+        client.get(self.URL)
+        created = client.post("/api/meals", json={
+            "date": "2024-01-18", "meal_type": "lunch", "name": "Soup"
+        }).json()
+        assert "Soup" in [m["name"] for m in client.get(self.URL).json()]
+
+        client.put(f"/api/meals/{created['id']}", json={"name": "Stew"})
+        assert "Stew" in [m["name"] for m in client.get(self.URL).json()]
+
+        client.post(f"/api/meals/{created['id']}/copy", json={
+            "target_date": "2024-01-19", "target_meal_type": "lunch"
+        })
+        assert len([m for m in client.get(self.URL).json() if m["name"] == "Stew"]) == 2
+
+        client.delete(f"/api/meals/{created['id']}")
+        assert len([m for m in client.get(self.URL).json() if m["name"] == "Stew"]) == 1
+
+    def test_bulk_writes_invalidate_cached_range(self, client, sample_meals):
+        """Test that batch and range copies refresh cached ranges."""
+        url = "/api/meals?start_date=2024-01-22&end_date=2024-01-28"
+        assert client.get(url).json() == []
+
+        client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15",
+            "source_end": "2024-01-17",
+            "target_start": "2024-01-22",
+        })
+        assert len(client.get(url).json()) == 6
+
+        client.post("/api/meals/batch", json={"on_conflict": "overwrite", "items": [
+            {"date": "2024-01-22", "meal_type": "breakfast", "name": "Waffles"},
+        ]})
+        assert "Waffles" in [m["name"] for m in client.get(url).json()]
+
+    def test_write_outside_range_keeps_cache(self, client, sample_meals):
+        """Test that writes to other dates do not invalidate the range."""
+        client.get(self.URL)
+        client.post("/api/meals", json={
+            "date": "2024-03-01", "meal_type": "lunch", "name": "Soup"
+        })
+        before = client.get("/api/diagnostics/cache").json()
+        client.get(self.URL)
+        after = client.get("/api/diagnostics/cache").json()
+
+        assert after["hits"] == before["hits"] + 1
+
+    def test_write_during_read_not_cached(self, client, sample_meals, monkeypatch):
+        """Test that a write landing once the read has started keeps its body out of the cache."""
+        def check_then_write(db):
+            db.connection()
+            meal_cache.invalidate_dates({date(2024, 1, 16)})
+
+        monkeypatch.setattr(crud.write_watcher, "check", check_then_write)
+        client.get(self.URL)
+        before = client.get("/api/diagnostics/cache").json()
+        monkeypatch.undo()
+        client.get(self.URL)
+        after = client.get("/api/diagnostics/cache").json()
+
+        assert after["misses"] == before["misses"] + 1
@@ -0,0 +1,60 @@
+"""
+Tests for the in-process meal change feed.
+"""
+from datetime import date
+
+from app import changes
+from app.changes import MealChange
+
+CHANGE = MealChange(action="created", id=1, date=date(2024, 1, 15), meal_type="lunch")
+
+
+class TestChangeFeed:
+    """Tests for publish/subscribe."""
+
+    def test_subscribers_receive_changes(self):
+        """Test that every subscriber receives published changes."""
+        received = []
+        callback = changes.subscribe(received.extend)
+        try:
+            changes.publish([CHANGE])
+        finally:
+            changes.unsubscribe(callback)
+
+        assert received == [CHANGE]
+
+    def test_failing_subscriber_does_not_stop_others(self):
+        """Test that an exception in one subscriber is isolated."""
+        received = []
+
+        def broken(_changes):
+            raise RuntimeError("boom")
+
+        changes.subscribe(broken)
+        callback = changes.subscribe(received.extend)
+        try:
+            changes.publish([CHANGE])
+        finally:
+            changes.unsubscribe(broken)
+            changes.unsubscribe(callback)
+
+        assert received == [CHANGE]
+
+    def test_write_paths_publish(self, client):
+        """Test that API writes publish the affected meals."""
+        received = []
+        callback = changes.subscribe(received.extend)
+        try:
+            meal = client.post("/api/meals", json={
+                "date": "2024-01-15", "meal_type": "lunch", "name": "Soup"
+            }).json()
+            client.put(f"/api/meals/{meal['id']}", json={"name": "Stew"})
+            client.delete(f"/api/meals/{meal['id']}")
+        finally:
+            changes.unsubscribe(callback)
+
+        assert [(c.action, c.id, c.date, c.meal_type) for c in received] == [
+            ("created", meal["id"], date(2024, 1, 15), "lunch"),
+            ("updated", meal["id"], date(2024, 1, 15), "lunch"),
+            ("deleted", meal["id"], date(2024, 1, 15), "lunch"),
+        ]
@@ -0,0 +1,226 @@
+"""
+Tests for database configuration.
+"""
+import os
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import (
+    SQLITE_PROFILES,
+    async_database_url,
+    configure_sqlite,
+    create_engines,
+    get_db,
+    read_only_database_url,
+    sqlite_pragmas_from_env,
+)
+from tests.conftest import send_together
+
+
+class TestSqlitePragmasFromEnv:
+    """Tests for resolving the SQLite profile from environment variables."""
+
+    def test_default_profile(self):
+        """Test that the performance profile is used by default."""
+        profile, pragmas = sqlite_pragmas_from_env({})
+        assert profile == "performance"
+        assert pragmas == SQLITE_PROFILES["performance"]
+        assert pragmas["journal_mode"] == "WAL"
+
+    def test_named_profile(self):
+        """Test selecting a profile by name."""
+        profile, pragmas = sqlite_pragmas_from_env({"SQLITE_PROFILE": "legacy"})
+        assert profile == "legacy"
+        assert pragmas == {}
+
+    def test_override_single_pragma(self):
+        """Test that SQLITE_<PRAGMA> overrides one value of the profile."""
+        _, pragmas = sqlite_pragmas_from_env({
+            "SQLITE_PROFILE": "performance",
+            "SQLITE_CACHE_SIZE": "-2000",
+        })
+        assert pragmas["cache_size"] == "-2000"
+        assert pragmas["synchronous"] == "NORMAL"
+
+    def test_override_adds_to_legacy_profile(self):
+        """Test that overrides apply even when the profile sets nothing."""
+        _, pragmas = sqlite_pragmas_from_env({
+            "SQLITE_PROFILE": "legacy",
+            "SQLITE_BUSY_TIMEOUT": "10000",
+        })
+        assert pragmas == {"busy_timeout": "10000"}
+
+    def test_unknown_profile_fails(self):
+        """Test that an unknown profile name is rejected."""
+        with pytest.raises(ValueError, match="Unknown SQLITE_PROFILE"):
+            sqlite_pragmas_from_env({"SQLITE_PROFILE": "turbo"})
+
+    def test_invalid_value_fails(self):
+        """Test that values that are not plain words or numbers are rejected."""
+        with pytest.raises(ValueError, match="Invalid value"):
+            sqlite_pragmas_from_env({"SQLITE_SYNCHRONOUS": "OFF; DROP TABLE meals"})
+
+
+class TestConfigureSqlite:
+    """Tests for applying pragmas on connect."""
+
+    def test_pragmas_applied_on_connect(self, tmp_path):
+        """Test that every pragma of the profile is in effect on a new connection."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'meals.db'}")
+        configure_sqlite(engine, SQLITE_PROFILES["performance"])
+
+        with engine.connect() as connection:
+            def pragma(name):
+                return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("cache_size") == -65536
+            assert pragma("temp_store") == 2  # MEMORY
+            assert pragma("busy_timeout") == 5000
+            assert pragma("foreign_keys") == 1
+        engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    """Tests for deriving the aiosqlite URL."""
+
+    def test_sqlite_file_url(self):
+        """Test that file URLs switch to the aiosqlite driver."""
+        assert async_database_url("sqlite:///./data/meals.db") == (
+            "sqlite+aiosqlite:///./data/meals.db"
+        )
+
+    def test_sqlite_memory_url(self):
+        """Test that in-memory URLs switch to the aiosqlite driver."""
+        assert async_database_url("sqlite:///:memory:") == "sqlite+aiosqlite:///:memory:"
+
+    def test_other_url_unchanged(self):
+        """Test that URLs already naming a driver are kept."""
+        url = "sqlite+aiosqlite:///./data/meals.db"
+        assert async_database_url(url) == url
+
+
+class TestCreateEngines:
+    """Tests for the separate read and write engines."""
+
+    @pytest.fixture
+    def engines(self, tmp_path):
+        engine, read_engine = create_engines(
+            f"sqlite:///{tmp_path / 'meals.db'}", SQLITE_PROFILES["performance"]
+        )
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE meals (id INTEGER PRIMARY KEY, name TEXT)"))
+        yield engine, read_engine
+        read_engine.dispose()
+        engine.dispose()
+
+    def test_read_only_url(self):
+        """Test that a file URL becomes an absolute read-only URI."""
+        url = read_only_database_url("sqlite:///./data/meals.db")
+        path = os.path.abspath("./data/meals.db")
+        assert url.database == f"file:{path}"
+        assert dict(url.query) == {"mode": "ro", "uri": "true"}
+
+    def test_memory_database_shares_one_engine(self):
+        """Test that an in-memory database has no separate read engine."""
+        assert read_only_database_url("sqlite:///:memory:") is None
+        engine, read_engine = create_engines("sqlite:///:memory:", {})
+        assert read_engine is engine
+
+    def test_read_engine_cannot_write(self, engines):
+        """Test that read connections refuse writes."""
+        _, read_engine = engines
+        with read_engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA query_only").scalar() == 1
+            with pytest.raises(OperationalError, match="readonly"):
+                connection.execute(text("INSERT INTO meals (name) VALUES ('Soup')"))
+
+    def test_reads_not_blocked_by_open_write(self, engines):
+        """Test that a read sees the last commit while a write is in progress."""
+        engine, read_engine = engines
+        with engine.begin() as writer:
+            writer.execute(text("INSERT INTO meals (name) VALUES ('Soup')"))
+            with read_engine.connect() as reader:
+                assert reader.execute(text("SELECT count(*) FROM meals")).scalar() == 0
+        with read_engine.connect() as reader:
+            assert reader.execute(text("SELECT count(*) FROM meals")).scalar() == 1
+
+    def test_concurrent_writes_take_turns(self, engines):
+        """Test that concurrent writers queue for the one write connection."""
+        engine, _ = engines
+        errors = []
+
+        def write(worker):
+            try:
+                for n in range(20):
+                    with engine.begin() as connection:
+                        connection.execute(
+                            text("INSERT INTO meals (name) VALUES (:name)"),
+                            {"name": f"{worker}-{n}"},
+                        )
+            except Exception as exc:
+                errors.append(exc)
+
+        writers = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+        assert errors == []
+        assert engine.pool.size() == 1
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM meals")).scalar() == 160
+
+
+class TestSqliteDiagnostics:
+    """Tests for GET /api/diagnostics/sqlite endpoint."""
+
+    def test_sqlite_diagnostics(self, client):
+        """Test that the endpoint reports the profile and live pragma values."""
+        response = client.get("/api/diagnostics/sqlite")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["profile"] in SQLITE_PROFILES
+        assert set(data["effective"]) >= {"journal_mode", "synchronous", "foreign_keys"}
+        assert data["effective"]["foreign_keys"] == 1
+        assert data["sqlite_version"]
+
+    def test_sqlite_diagnostics_leaves_write_connection_alone(self, file_client):
+        """Test that the endpoint reads from the read pool, not the single writer."""
+        from app.main import app
+
+        def no_writer():
+            raise AssertionError("diagnostics checked out the write connection")
+            yield
+
+        app.dependency_overrides[get_db] = no_writer
+        response = file_client.get("/api/diagnostics/sqlite")
+        assert response.status_code == 200
+        assert response.json()["effective"]["journal_mode"] == "wal"
+
+
+class TestSessionRoute:
+    """Tests for releasing pooled connections before the response is serialized."""
+
+    def test_more_concurrent_writes_than_threads(self, file_client):
+        """Test that writes beyond the threadpool size take turns on the write connection."""
+        statuses = send_together(
+            file_client, "PUT", "/api/meals/slot/2024-01-15/dinner", 60,
+            json={"name": "Soup", "ingredients": ["Egg"]},
+        )
+        assert sorted(statuses) == [200] * 59 + [201]
+
+    def test_more_concurrent_reads_than_threads(self, file_client):
+        """Test that reads beyond the threadpool size don't exhaust the read pool."""
+        file_client.put("/api/meals/slot/2024-01-15/dinner", json={
+            "name": "Omelette", "ingredients": ["Egg"]
+        })
+        statuses = send_together(
+            file_client, "GET", "/api/meals/search", 100, params={"ingredient": "egg"}
+        )
+        assert statuses == [200] * 100
@@ -0,0 +1,30 @@
+"""
+Tests for ETag helpers.
+"""
+from app.etag import etag_matches, weak_etag
+
+
+class TestEtagMatches:
+    """Tests for If-None-Match comparison."""
+
+    def test_exact_match(self):
+        """Test that the same ETag matches."""
+        assert etag_matches('W/"7"', weak_etag(7))
+
+    def test_weak_comparison(self):
+        """Test that a strong tag with the same value matches a weak ETag."""
+        assert etag_matches('"7"', weak_etag(7))
+
+    def test_list_of_tags(self):
+        """Test that any tag of a comma-separated list can match."""
+        assert etag_matches('W/"3", W/"7"', weak_etag(7))
+
+    def test_wildcard(self):
+        """Test that * matches any ETag."""
+        assert etag_matches("*", weak_etag(7))
+
+    def test_no_match(self):
+        """Test that a different or missing tag does not match."""
+        assert not etag_matches('W/"6"', weak_etag(7))
+        assert not etag_matches(None, weak_etag(7))
+        assert not etag_matches("", weak_etag(7))
@@ -0,0 +1,183 @@
+"""
+Tests for the group committer.
+"""
+import threading
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import changes, crud
+from app.database import Base, create_engines
+from app.group_commit import GroupCommitter
+from app.metrics import MetricsRegistry
+from app.models import Meal
+from app.routers import meals as meals_router
+from app.schemas import MealCopy, MealCreate, MealUpdate
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """The write engine of a fresh SQLite file, with the meal schema."""
+    engine, read_engine = create_engines(
+        f"sqlite:///{tmp_path / 'meals.db'}", {"journal_mode": "WAL", "busy_timeout": "5000"}
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    read_engine.dispose()
+    engine.dispose()
+
+
+@pytest.fixture
+def committer(file_engine):
+    """A group committer with a long window, so concurrent writes share a batch."""
+    committer = GroupCommitter(
+        sessionmaker(autoflush=False, bind=file_engine),
+        enabled=True,
+        window=0.2,
+        registry=MetricsRegistry(),
+    )
+    yield committer
+    committer.stop()
+
+
+@pytest.fixture
+def published():
+    """Every batch of changes published while the test runs."""
+    batches = []
+    changes.subscribe(batches.append)
+    yield batches
+    changes.unsubscribe(batches.append)
+
+
+def submit_together(committer, writes) -> list:
+    """Submit (stage, *args) writes from one thread each; results or raised errors."""
+    results = [None] * len(writes)
+
+    def submit(index, stage, *args):
+        try:
+            results[index] = committer.submit(stage, *args)
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [
+        threading.Thread(target=submit, args=(index, *write))
+        for index, write in enumerate(writes)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def meal(day: int, meal_type: str = "dinner", name: str = "Soup") -> MealCreate:
+    return MealCreate(date=date(2024, 1, day), meal_type=meal_type, name=name)
+
+
+class TestGroupCommitter:
+    """Tests for batching writes into shared transactions."""
+
+    def test_from_env(self):
+        """Test that group commit is opt-in and configured from the environment."""
+        assert not GroupCommitter.from_env({}).enabled
+        committer = GroupCommitter.from_env({
+            "MEAL_GROUP_COMMIT": "true",
+            "MEAL_GROUP_COMMIT_WINDOW_MS": "5",
+            "MEAL_GROUP_COMMIT_MAX_BATCH": "10",
+        })
+        assert (committer.enabled, committer.window, committer.max_batch) == (True, 0.005, 10)
+
+    def test_concurrent_writes_share_one_commit(self, committer, file_engine, published):
+        """Test that writes arriving within the window commit together."""
+        results = submit_together(
+            committer, [(crud.stage_create_meal, meal(day)) for day in range(1, 9)]
+        )
+
+        assert sorted(result.date.day for result in results) == list(range(1, 9))
+        assert all(result.id is not None for result in results)
+        batch = committer.registry.commit_batch_size
+        assert batch.sum == 8 and sum(batch.counts) < 8
+        assert sum(len(batch) for batch in published) == 8
+        with sessionmaker(bind=file_engine)() as db:
+            assert db.scalar(select(func.count()).select_from(Meal)) == 8
+
+    def test_conflict_fails_only_its_write(self, committer, file_engine):
+        """Test that a 409 in a batch rolls back that write alone."""
+        results = submit_together(committer, [
+            (crud.stage_create_meal, meal(1, name="First")),
+            (crud.stage_create_meal, meal(1, name="Second")),
+            (crud.stage_create_meal, meal(2)),
+        ])
+
+        errors = [result for result in results if isinstance(result, HTTPException)]
+        assert [error.status_code for error in errors] == [409]
+        with sessionmaker(bind=file_engine)() as db:
+            assert db.scalar(select(func.count()).select_from(Meal)) == 2
+
+    def test_update_copy_and_delete(self, committer, file_engine):
+        """Test that every staged write returns what its direct version returns."""
+        created = committer.submit(crud.stage_create_meal, meal(1))
+
+        updated = committer.submit(
+            crud.stage_update_meal, created.id, MealUpdate(name="Stew", ingredients=["Beans"])
+        )
+        copied = committer.submit(
+            crud.stage_copy_meal, created.id,
+            MealCopy(target_date=date(2024, 1, 2), target_meal_type="lunch"),
+        )
+        assert (updated.name, updated.ingredients) == ("Stew", ["Beans"])
+        assert (copied.name, copied.meal_type) == ("Stew", "lunch")
+        assert committer.submit(crud.stage_delete_meal, created.id) is None
+        with pytest.raises(HTTPException) as exc_info:
+            committer.submit(crud.stage_delete_meal, created.id)
+        assert exc_info.value.status_code == 404
+        with sessionmaker(bind=file_engine)() as db:
+            assert db.scalars(select(Meal.name)).all() == ["Stew"]
+
+    def test_stop_commits_pending_writes(self, committer, file_engine):
+        """Test that stopping lets the writer finish and a later write restarts it."""
+        committer.submit(crud.stage_create_meal, meal(1))
+        committer.stop()
+
+        committer.submit(crud.stage_create_meal, meal(2))
+        with sessionmaker(bind=file_engine)() as db:
+            assert db.scalar(select(func.count()).select_from(Meal)) == 2
+
+
+class TestGroupCommitRoutes:
+    """Tests for the meal routes with group commit switched on."""
+
+    @pytest.fixture
+    def grouped(self, client, monkeypatch):
+        committer = GroupCommitter(
+            TestingSessionLocal, enabled=True, window=0, registry=MetricsRegistry()
+        )
+        monkeypatch.setattr(meals_router, "group_commit", committer)
+        yield committer
+        committer.stop()
+
+    def test_write_routes(self, client, grouped, sample_meal_data):
+        """Test that create, update, copy and delete answer as without group commit."""
+        response = client.post("/api/meals", json=sample_meal_data)
+        assert response.status_code == 201
+        meal_id = response.json()["id"]
+        assert client.post("/api/meals", json=sample_meal_data).status_code == 409
+
+        response = client.put(f"/api/meals/{meal_id}", json={"name": "Waffles"})
+        assert response.json()["name"] == "Waffles"
+        response = client.post(
+            f"/api/meals/{meal_id}/copy",
+            json={"target_date": "2024-01-16", "target_meal_type": "breakfast"},
+        )
+        assert response.status_code == 201
+        assert client.delete(f"/api/meals/{meal_id}").status_code == 204
+
+        week = client.get("/api/meals", params={
+            "start_date": "2024-01-15", "end_date": "2024-01-21",
+        }).json()
+        assert [(m["date"], m["name"]) for m in week] == [("2024-01-16", "Waffles")]
+        assert sum(grouped.registry.commit_batch_size.counts) == 4
@@ -0,0 +1,161 @@
+"""
+Tests for the ingredient autocomplete index.
+"""
+import json
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from app.changes import MealChange
+from app.ingredients import IngredientIndex, normalize_ingredient
+from app.models import Meal
+
+
+class TestIngredientIndex:
+    """Tests for IngredientIndex."""
+
+    def test_suggest_by_prefix_most_used_first(self):
+        """Test that prefix matches are ordered by usage, then alphabetically."""
+        index = IngredientIndex()
+        index.set_meal(1, ["tomato", "tofu", "salt"])
+        index.set_meal(2, ["Tomato", "thyme"])
+        index.set_meal(3, ["tofu", "tomato"])
+
+        assert index.suggest("to") == [("tomato", 3), ("tofu", 2)]
+        assert index.suggest("T") == [("tomato", 3), ("tofu", 2), ("thyme", 1)]
+        assert index.suggest("t", limit=1) == [("tomato", 3)]
+        assert index.suggest("x") == []
+
+    def test_set_meal_replaces_previous_ingredients(self):
+        """Test that changing a meal moves its counts and drops unused ingredients."""
+        index = IngredientIndex()
+        index.set_meal(1, ["basil", "butter"])
+        index.set_meal(2, ["butter"])
+        index.set_meal(1, ["bacon", "butter"])
+
+        assert index.suggest("b") == [("butter", 2), ("bacon", 1)]
+        index.set_meal(2, [])
+        index.set_meal(1, ())
+        assert index.suggest("b") == []
+        assert len(index) == 0
+
+    def test_duplicates_and_blanks_in_a_meal(self):
+        """Test that a meal counts each normalized ingredient once and skips blanks."""
+        index = IngredientIndex()
+        index.set_meal(1, ["Eggs", "eggs ", " ", "", None, 3])
+        assert index.suggest("e") == [("eggs", 1)]
+
+    def test_normalization_matches_sqlite(self, db_session):
+        """Test that normalization agrees with lower(trim()) in SQLite."""
+        for ingredient in ("  Crème Fraîche ", "ÉCLAIR", "Olive OIL"):
+            expected = db_session.scalar(text("SELECT lower(trim(:i))"), {"i": ingredient})
+            assert normalize_ingredient(ingredient) == expected
+
+    def test_apply_changes(self):
+        """Test that change-feed batches update the index."""
+        index = IngredientIndex()
+        day = date(2024, 1, 15)
+        index.apply_changes([
+            MealChange("created", 1, day, "lunch", ("rice", "beans")),
+            MealChange("created", 2, day, "dinner", ("rice",)),
+        ])
+        index.apply_changes([MealChange("deleted", 1, day, "lunch")])
+        assert index.suggest("r") == [("rice", 1)]
+        assert index.suggest("b") == []
+
+    def test_load_from_database(self, db_session):
+        """Test that loading reads every meal, including plain-SQL writes."""
+        db_session.add(Meal(date=date(2024, 1, 15), meal_type="lunch", name="A",
+                            ingredients=["Rice", "peas"]))
+        db_session.commit()
+        db_session.execute(
+            text("INSERT INTO meals (date, meal_type, name, ingredients) "
+                 "VALUES ('2024-01-16', 'lunch', 'B', :ingredients)"),
+            {"ingredients": json.dumps(["rice"])},
+        )
+        db_session.commit()
+
+        index = IngredientIndex()
+        index.set_meal(99, ["stale"])
+        index.load(db_session)
+        assert index.suggest("r") == [("rice", 2)]
+        assert index.suggest("s") == []
+
+    def test_refresh_days(self, db_session):
+        """Test that re-reading days picks up adds, edits and deletes made elsewhere."""
+        db_session.add_all([
+            Meal(id=1, date=date(2024, 1, 15), meal_type="lunch", name="A", ingredients=["rice"]),
+            Meal(id=2, date=date(2024, 1, 15), meal_type="dinner", name="B", ingredients=["kale"]),
+            Meal(id=3, date=date(2024, 1, 16), meal_type="lunch", name="C", ingredients=["rice"]),
+        ])
+        db_session.commit()
+        index = IngredientIndex()
+        index.load(db_session)
+
+        db_session.execute(text("DELETE FROM meals WHERE id = 2"))
+        db_session.execute(text(
+            "UPDATE meals SET date = '2024-01-17', ingredients = '[\"rye\"]' WHERE id = 3"
+        ))
+        db_session.commit()
+        index.refresh_days(db_session, [date(2024, 1, 15), date(2024, 1, 16), date(2024, 1, 17)])
+
+        assert index.suggest("r") == [("rice", 1), ("rye", 1)]
+        assert index.suggest("k") == []
+        db_session.execute(text("DELETE FROM meals WHERE id = 3"))
+        db_session.commit()
+        index.refresh_days(db_session, [date(2024, 1, 17)])
+        assert index.suggest("r") == [("rice", 1)]
+
+    def test_suggest_is_fast(self):
+        """Test that a lookup in a large index takes well under a millisecond."""
+        index = IngredientIndex()
+        for meal_id in range(5000):
+            index.set_meal(meal_id, [f"ingredient {meal_id % 2000}", f"spice {meal_id % 300}"])
+
+        began = time.perf_counter()
+        for _ in range(100):
+            index.suggest("ingredient 19")
+        assert (time.perf_counter() - began) / 100 < 0.001
+
+
+class TestSuggestIngredientsApi:
+    """Tests for GET /api/ingredients/suggest endpoint."""
+
+    def test_suggest_follows_writes(self, client):
+        """Test that created, updated and deleted meals change the suggestions."""
+        meal = client.post("/api/meals", json={
+            "date": "2024-01-15", "meal_type": "lunch", "name": "Soup",
+            "ingredients": ["Carrot", "celery"]
+        }).json()
+        client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-16", "meal_type": "lunch", "name": "Salad",
+             "ingredients": ["carrot"]}
+        ]})
+
+        response = client.get("/api/ingredients/suggest?prefix=c")
+        assert response.status_code == 200
+        assert response.json() == [
+            {"ingredient": "carrot", "count": 2}, {"ingredient": "celery", "count": 1}
+        ]
+
+        client.put(f"/api/meals/{meal['id']}", json={"name": "Soup", "ingredients": ["leek"]})
+        assert client.get("/api/ingredients/suggest?prefix=ce").json() == []
+
+        client.delete(f"/api/meals/{meal['id']}")
+        assert client.get("/api/ingredients/suggest?prefix=le").json() == []
+
+    def test_suggest_feeds_ingredient_search(self, client):
+        """Test that a suggestion finds its meals with the exact-match search."""
+        client.post("/api/meals", json={
+            "date": "2024-01-15", "meal_type": "lunch", "name": "Tarte",
+            "ingredients": ["CRÈME fraîche"]
+        })
+        suggestion = client.get("/api/ingredients/suggest?prefix=cr").json()[0]["ingredient"]
+        response = client.get("/api/meals/search", params={"ingredient": suggestion})
+        assert [m["name"] for m in response.json()] == ["Tarte"]
+
+    def test_suggest_requires_prefix(self, client):
+        """Test that a missing or empty prefix returns 422."""
+        assert client.get("/api/ingredients/suggest").status_code == 422
+        assert client.get("/api/ingredients/suggest?prefix=").status_code == 422
@@ -0,0 +1,187 @@
+"""
+Tests for the Prometheus metrics registry, middleware and endpoint.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import MetricsMiddleware, MetricsRegistry, metrics
+
+
+def samples(exposition: str) -> dict[str, float]:
+    """Sample lines of an exposition as {name{labels}: value}."""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in exposition.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+class TestMetricsRegistry:
+    """Tests for histograms and the text exposition."""
+
+    def test_request_histogram_is_cumulative(self):
+        """Test that bucket counts are cumulative and end with +Inf, _sum and _count."""
+        registry = MetricsRegistry()
+        for seconds in (0.001, 0.02, 0.02, 30.0):
+            registry.observe_request("GET", "/api/meals", 200, seconds)
+
+        rendered = samples(registry.render())
+        series = 'http_request_duration_seconds_bucket{method="GET",route="/api/meals",status="200"'
+        assert rendered[series + ',le="0.005"}'] == 1
+        assert rendered[series + ',le="0.025"}'] == 3
+        assert rendered[series + ',le="10.0"}'] == 3
+        assert rendered[series + ',le="+Inf"}'] == 4
+        labels = '{method="GET",route="/api/meals",status="200"}'
+        assert rendered["http_request_duration_seconds_count" + labels] == 4
+        assert rendered["http_request_duration_seconds_sum" + labels] == pytest.approx(30.041)
+
+    def test_bucket_bound_is_inclusive(self):
+        """Test that a value equal to a bucket bound counts in that bucket."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", "/api/health", 200, 0.005)
+
+        rendered = samples(registry.render())
+        labels = 'method="GET",route="/api/health",status="200",le="0.005"'
+        assert rendered["http_request_duration_seconds_bucket{" + labels + "}"] == 1
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes, backslashes and newlines in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", 'a"b\\c\nd', 200, 0.1)
+
+        assert 'route="a\\"b\\\\c\\nd"' in registry.render()
+
+    def test_group_commit_series_once_observed(self):
+        """Test that group commit histograms appear after the first commit and reset on clear."""
+        registry = MetricsRegistry()
+        assert "db_group_commit_batch_size_count" not in registry.render()
+
+        registry.observe_group_commit(3, 0.002)
+        registry.observe_group_commit(5, 0.004)
+        rendered = samples(registry.render())
+        assert rendered["db_group_commit_batch_size_count"] == 2
+        assert rendered["db_group_commit_batch_size_sum"] == 8
+        assert rendered["db_group_commit_duration_seconds_count"] == 2
+
+        registry.clear()
+        assert "db_group_commit_batch_size_count" not in registry.render()
+
+    def test_extra_samples_follow(self):
+        """Test that caller supplied gauges and counters are rendered with their type."""
+        registry = MetricsRegistry()
+
+        rendered = registry.render([("threadpool_in_use", "gauge", "Busy threads.", 3)])
+
+        assert "# TYPE threadpool_in_use gauge\nthreadpool_in_use 3\n" in rendered
+
+    def test_statements_timed_by_operation(self):
+        """Test that an instrumented engine's statements are counted per operation."""
+        registry = MetricsRegistry()
+        engine = create_engine("sqlite:///:memory:")
+        registry.instrument_engine(engine)
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (x INTEGER)"))
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+            connection.execute(text("  select x FROM t"))
+            connection.execute(text("SELECT x FROM t"))
+
+        rendered = samples(registry.render())
+        count = "db_statement_duration_seconds_count"
+        assert rendered[count + '{operation="SELECT"}'] == 2
+        assert rendered[count + '{operation="INSERT"}'] == 1
+        assert rendered[count + '{operation="OTHER"}'] == 1
+
+    def test_statement_errors_counted(self):
+        """Test that failing statements are counted by exception type, not timed."""
+        registry = MetricsRegistry()
+        engine = create_engine("sqlite:///:memory:")
+        registry.instrument_engine(engine)
+        with engine.connect() as connection, pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+
+        rendered = samples(registry.render())
+        assert rendered['db_statement_errors_total{error="OperationalError"}'] == 1
+        assert not any(name.startswith("db_statement_duration") for name in rendered)
+
+    def test_pool_gauges(self, tmp_path):
+        """Test that a queue pool reports its size and checked out connections."""
+        registry = MetricsRegistry()
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=3)
+        registry.instrument_engine(engine, "main")
+
+        with engine.connect():
+            rendered = samples(registry.render())
+
+        assert rendered['db_pool_size{engine="main"}'] == 3
+        assert rendered['db_pool_checked_out{engine="main"}'] == 1
+        assert rendered['db_pool_overflow{engine="main"}'] == 0
+
+    def test_clear(self):
+        """Test that clear drops every observation."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", "/api/meals", 200, 0.1)
+        registry.observe_statement("SELECT 1", 0.001)
+        registry.clear()
+
+        assert samples(registry.render()) == {}
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /api/metrics and the request middleware."""
+
+    def test_requests_recorded_by_route_template(self, client, sample_meal_data):
+        """Test that requests are labelled with the route template, not the path."""
+        metrics.clear()
+        meal_id = client.post("/api/meals", json=sample_meal_data).json()["id"]
+        client.put(f"/api/meals/{meal_id}", json={"name": "Waffles"})
+        client.put("/api/meals/99999", json={"name": "Waffles"})
+        client.get("/no/such/path")
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        rendered = samples(response.text)
+        count = "http_request_duration_seconds_count"
+        route = 'route="/api/meals/{meal_id}"'
+        assert rendered[f'{count}{{method="POST",route="/api/meals",status="201"}}'] == 1
+        assert rendered[f'{count}{{method="PUT",{route},status="200"}}'] == 1
+        assert rendered[f'{count}{{method="PUT",{route},status="404"}}'] == 1
+        assert rendered[f'{count}{{method="GET",route="unmatched",status="404"}}'] == 1
+        assert not any(f"/api/meals/{meal_id}" in name for name in rendered)
+
+    def test_event_streams_not_timed(self):
+        """Test that Server-Sent Events streams stay out of the latency histogram."""
+        app = FastAPI()
+        registry = MetricsRegistry()
+        app.add_middleware(MetricsMiddleware, registry=registry)  # type: ignore[arg-type]
+
+        @app.get("/events")
+        def events():
+            return StreamingResponse(iter([b"retry: 3000\n\n"]), media_type="text/event-stream")
+
+        @app.get("/export")
+        def export():
+            return StreamingResponse(iter([b"{}\n"]), media_type="application/x-ndjson")
+
+        with TestClient(app) as client:
+            client.get("/events")
+            client.get("/export")
+
+        count = "http_request_duration_seconds_count"
+        assert [name for name in samples(registry.render()) if name.startswith(count)] == [
+            f'{count}{{method="GET",route="/export",status="200"}}'
+        ]
+
+    def test_threadpool_and_cache_gauges(self, client):
+        """Test that the scrape includes threadpool and cache gauges."""
+        rendered = samples(client.get("/api/metrics").text)
+
+        assert rendered["threadpool_capacity"] > 0
+        assert rendered["threadpool_in_use"] >= 0
+        assert rendered["threadpool_waiting"] == 0
+        assert "meal_cache_hits_total" in rendered
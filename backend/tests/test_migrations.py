@@ -0,0 +1,187 @@
+"""
+Tests for the versioned schema migration runner.
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import configure_sqlite
+from app.migrations import (
+    MIGRATIONS,
+    Migration,
+    create_index,
+    current_version,
+    head_version,
+    migrate,
+)
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """An engine on a fresh SQLite file, tuned like the app's."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'meals.db'}")
+    configure_sqlite(engine, {"journal_mode": "WAL", "busy_timeout": "5000"})
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine) -> set[str]:
+    with engine.connect() as connection:
+        return set(connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index'")
+        ).scalars())
+
+
+def version_of(engine) -> int:
+    with engine.connect() as connection:
+        return current_version(connection)
+
+
+class TestMigrate:
+    """Tests for migrate()."""
+
+    def test_new_database_gets_models_and_newest_version(self, file_engine):
+        """Test that an empty database is created from the models in one step."""
+        assert migrate(file_engine) == [head_version()]
+
+        assert version_of(file_engine) == head_version()
+        tables = set(inspect(file_engine).get_table_names())
+        assert {"meals", "meal_ingredients", "meal_day_versions", "meal_name_stats"} <= tables
+
+    def test_up_to_date_database_untouched(self, file_engine):
+        """Test that a second run applies nothing."""
+        migrate(file_engine)
+
+        assert migrate(file_engine) == []
+
+    def test_unversioned_database_upgraded_and_backfilled(self, file_engine):
+        """Test that a database from before versioning gets the missing side tables."""
+        with file_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE meals (id INTEGER PRIMARY KEY, date DATE NOT NULL,"
+                " meal_type VARCHAR NOT NULL, name VARCHAR NOT NULL, ingredients JSON,"
+                " created_at DATETIME, updated_at DATETIME,"
+                " CONSTRAINT unique_date_meal_type UNIQUE (date, meal_type))"
+            ))
+            connection.execute(text(
+                "INSERT INTO meals (date, meal_type, name, ingredients)"
+                " VALUES ('2024-01-15', 'dinner', 'Pasta', '[\"Tomato\"]')"
+            ))
+
+        assert migrate(file_engine) == [1, 2, 3]
+
+        with file_engine.connect() as connection:
+            assert connection.execute(
+                text("SELECT ingredient_norm, date FROM meal_ingredients")
+            ).all() == [("tomato", "2024-01-15")]
+            assert connection.execute(
+                text("SELECT count FROM meal_name_stats WHERE name_norm = 'pasta'")
+            ).scalar() == 1
+        assert version_of(file_engine) == head_version()
+
+    def test_pending_migrations_applied_in_order(self, file_engine):
+        """Test that only the migrations after the stored version run."""
+        migrate(file_engine)
+        head = head_version()
+        calls = []
+
+        def add_index(connection):
+            calls.append(head + 1)
+            create_index(connection, "ix_meals_name", "meals", "name")
+
+        def add_column(connection):
+            calls.append(head + 2)
+            connection.exec_driver_sql("ALTER TABLE meals ADD COLUMN notes VARCHAR")
+
+        migrations = [
+            *MIGRATIONS,
+            Migration(head + 1, "Index meal names", add_index),
+            Migration(head + 2, "Add notes", add_column),
+        ]
+
+        assert migrate(file_engine, migrations) == [head + 1, head + 2]
+        assert calls == [head + 1, head + 2]
+        assert version_of(file_engine) == head + 2
+        assert "ix_meals_name" in index_names(file_engine)
+        assert migrate(file_engine, migrations) == []
+
+    def test_failed_migration_rolled_back(self, file_engine):
+        """Test that a failing migration leaves neither its changes nor a version bump."""
+        migrate(file_engine)
+
+        def broken(connection):
+            create_index(connection, "ix_meals_name", "meals", "name")
+            connection.exec_driver_sql("ALTER TABLE missing ADD COLUMN x")
+
+        with pytest.raises(Exception, match="missing"):
+            migrate(file_engine, [*MIGRATIONS, Migration(head_version() + 1, "Broken", broken)])
+
+        assert version_of(file_engine) == head_version()
+        assert "ix_meals_name" not in index_names(file_engine)
+
+    def test_concurrent_workers_migrate_once(self, file_engine):
+        """Test that workers starting together run each migration exactly once."""
+        migrate(file_engine)
+        calls = []
+
+        def add_index(connection):
+            calls.append(threading.get_ident())
+            create_index(connection, "ix_meals_name", "meals", "name")
+
+        head = head_version()
+        migrations = [*MIGRATIONS, Migration(head + 1, "Index meal names", add_index)]
+        results = []
+        workers = [
+            threading.Thread(target=lambda: results.append(migrate(file_engine, migrations)))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(calls) == 1
+        assert sorted(results) == [[], [], [], [head + 1]]
+
+    def test_ingredient_table_rebuilt_with_dates(self, file_engine):
+        """Test that migration 2 adds meal dates to an existing ingredient table."""
+        with file_engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE meals (id INTEGER PRIMARY KEY, date DATE NOT NULL,"
+                " meal_type VARCHAR NOT NULL, name VARCHAR NOT NULL, ingredients JSON,"
+                " created_at DATETIME, updated_at DATETIME,"
+                " CONSTRAINT unique_date_meal_type UNIQUE (date, meal_type))"
+            ))
+            connection.execute(text(
+                "CREATE TABLE meal_ingredients (meal_id INTEGER, ingredient_norm VARCHAR,"
+                " PRIMARY KEY (meal_id, ingredient_norm))"
+            ))
+            connection.execute(text(
+                "CREATE TRIGGER meal_ingredients_after_insert AFTER INSERT ON meals BEGIN"
+                " INSERT INTO meal_ingredients VALUES (NEW.id, 'stale'); END"
+            ))
+            connection.execute(text(
+                "INSERT INTO meals (date, meal_type, name, ingredients)"
+                " VALUES ('2024-01-15', 'dinner', 'Pasta', '[\"Tomato\"]')"
+            ))
+
+        migrate(file_engine)
+
+        with file_engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO meals (date, meal_type, name, ingredients)"
+                " VALUES ('2024-01-16', 'dinner', 'Soup', '[\"Leek\"]')"
+            ))
+            assert connection.execute(text(
+                "SELECT ingredient_norm, date FROM meal_ingredients ORDER BY date"
+            )).all() == [("tomato", "2024-01-15"), ("leek", "2024-01-16")]
+        assert "ix_meal_ingredients_ingredient_norm_date" in index_names(file_engine)
+
+    def test_version_gaps_rejected(self):
+        """Test that migrations must be numbered without gaps."""
+        with pytest.raises(RuntimeError, match="1..n"):
+            head_version([
+                *MIGRATIONS,
+                Migration(head_version() + 2, "Skipped one", lambda connection: None),
+            ])
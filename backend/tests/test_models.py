@@ -6,7 +6,7 @@ from datetime import date
 import pytest
 from sqlalchemy.exc import IntegrityError
 
-from app.models import Meal
+from app.models import Meal, MealDayVersion, MealIngredient
 
 
 class TestMealModel:
@@ -134,3 +134,142 @@ class TestMealModel:
         # Verify deletion
         deleted = db_session.query(Meal).filter(Meal.id == meal_id).first()
         assert deleted is None
+
+
+class TestMealIngredientSync:
+    """Tests for the trigger-maintained meal_ingredients table."""
+
+    @staticmethod
+    def _ingredients(db_session, meal_id):
+        rows = db_session.query(MealIngredient.ingredient_norm).filter(
+            MealIngredient.meal_id == meal_id
+        )
+        return sorted(row[0] for row in rows)
+
+    def test_insert_normalizes_ingredients(self, db_session):
+        """Test that inserting a meal stores lowercased, deduplicated ingredients."""
+        meal = Meal(
+            date=date(2024, 1, 15),
+            meal_type="breakfast",
+            name="Pancakes",
+            ingredients=["Flour", "EGGS", "eggs", " milk "]
+        )
+        db_session.add(meal)
+        db_session.commit()
+
+        assert self._ingredients(db_session, meal.id) == ["eggs", "flour", "milk"]
+
+    def test_update_replaces_ingredients(self, db_session):
+        """Test that updating ingredients replaces the normalized rows."""
+        meal = Meal(
+            date=date(2024, 1, 15),
+            meal_type="breakfast",
+            name="Pancakes",
+            ingredients=["flour", "eggs"]
+        )
+        db_session.add(meal)
+        db_session.commit()
+
+        meal.ingredients = ["maple syrup"]
+        db_session.commit()
+
+        assert self._ingredients(db_session, meal.id) == ["maple syrup"]
+
+    def test_date_change_moves_ingredients(self, db_session):
+        """Test that moving a meal to another day updates the copied date."""
+        meal = Meal(
+            date=date(2024, 1, 15),
+            meal_type="breakfast",
+            name="Pancakes",
+            ingredients=["flour"]
+        )
+        db_session.add(meal)
+        db_session.commit()
+
+        meal.date = date(2024, 1, 20)
+        db_session.commit()
+
+        rows = db_session.query(MealIngredient.date).filter(MealIngredient.meal_id == meal.id)
+        assert [row[0] for row in rows] == [date(2024, 1, 20)]
+
+    def test_delete_removes_ingredients(self, db_session):
+        """Test that deleting a meal removes its normalized rows."""
+        meal = Meal(
+            date=date(2024, 1, 15),
+            meal_type="breakfast",
+            name="Pancakes",
+            ingredients=["flour"]
+        )
+        db_session.add(meal)
+        db_session.commit()
+        meal_id = meal.id
+
+        db_session.delete(meal)
+        db_session.commit()
+
+        assert self._ingredients(db_session, meal_id) == []
+
+    def test_create_table_backfills_existing_meals(self, db_session):
+        """Test that creating the table on an existing database backfills it."""
+        meal = Meal(
+            date=date(2024, 1, 15),
+            meal_type="breakfast",
+            name="Pancakes",
+            ingredients=["Flour", "eggs"]
+        )
+        db_session.add(meal)
+        db_session.commit()
+        meal_id = meal.id
+        db_session.close()
+
+        engine = db_session.get_bind()
+        MealIngredient.__table__.drop(engine)
+        MealIngredient.__table__.create(engine)
+
+        assert self._ingredients(db_session, meal_id) == ["eggs", "flour"]
+
+
+class TestMealDayVersion:
+    """Tests for the trigger-maintained per-day version table."""
+
+    @staticmethod
+    def _versions(db_session):
+        return dict(db_session.query(MealDayVersion.date, MealDayVersion.version).all())
+
+    def test_insert_stamps_day(self, db_session):
+        """Test that inserting meals stamps their days with increasing versions."""
+        db_session.add(Meal(date=date(2024, 1, 15), meal_type="breakfast", name="Pancakes"))
+        db_session.commit()
+        db_session.add(Meal(date=date(2024, 1, 16), meal_type="breakfast", name="Waffles"))
+        db_session.commit()
+
+        versions = self._versions(db_session)
+        assert versions[date(2024, 1, 16)] > versions[date(2024, 1, 15)]
+
+    def test_moving_a_meal_stamps_both_days(self, db_session):
+        """Test that changing a meal's date stamps the old and the new day."""
+        meal = Meal(date=date(2024, 1, 15), meal_type="breakfast", name="Pancakes")
+        db_session.add(meal)
+        db_session.add(Meal(date=date(2024, 1, 20), meal_type="lunch", name="Salad"))
+        db_session.commit()
+        before = self._versions(db_session)
+
+        meal.date = date(2024, 1, 17)
+        db_session.commit()
+
+        after = self._versions(db_session)
+        assert after[date(2024, 1, 15)] > before[date(2024, 1, 15)]
+        assert date(2024, 1, 17) in after
+        assert after[date(2024, 1, 20)] == before[date(2024, 1, 20)]
+
+    def test_delete_stamps_day(self, db_session):
+        """Test that deleting a meal stamps its day."""
+        meal = Meal(date=date(2024, 1, 15), meal_type="breakfast", name="Pancakes")
+        db_session.add(meal)
+        db_session.commit()
+        before = self._versions(db_session)[date(2024, 1, 15)]
+
+        db_session.delete(meal)
+        db_session.commit()
+
+        assert self._versions(db_session)[date(2024, 1, 15)] > before
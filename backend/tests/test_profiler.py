@@ -0,0 +1,163 @@
+"""
+Tests for the per-request SQL profiler.
+"""
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from app.profiler import SQLProfiler, SQLProfilerMiddleware
+
+
+def profiled_client(profiler: SQLProfiler) -> TestClient:
+    """A client for a small app whose routes query an instrumented engine."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE meals (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO meals (name) VALUES ('a'), ('b'), ('c')"))
+    profiler.instrument_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(SQLProfilerMiddleware, profiler=profiler)  # type: ignore[arg-type]
+
+    @app.get("/meals/{meal_id:int}")
+    def one_meal(meal_id: int):
+        with engine.connect() as connection:
+            return {"name": connection.execute(
+                text("SELECT name FROM meals WHERE id = :id"), {"id": meal_id}
+            ).scalar()}
+
+    @app.get("/meals/broken")
+    def broken():
+        with engine.connect() as connection:
+            try:
+                connection.execute(text("INSERT INTO meals (id, name) VALUES (1, 'dup')"))
+            except IntegrityError:
+                return {"conflict": True}
+
+    @app.get("/meals")
+    def every_meal_one_by_one():
+        with engine.connect() as connection:
+            ids = connection.execute(text("SELECT id FROM meals")).scalars().all()
+            return [
+                connection.execute(
+                    text("SELECT name FROM meals WHERE id = :id"), {"id": meal_id}
+                ).scalar()
+                for meal_id in ids
+            ]
+
+    return TestClient(app)
+
+
+class TestSQLProfilerSettings:
+    """Tests for reading the profiler settings."""
+
+    def test_from_env(self):
+        """Test that mode and thresholds come from the environment."""
+        profiler = SQLProfiler.from_env({
+            "MEAL_SQL_PROFILER": "Headers",
+            "MEAL_SLOW_QUERY_MS": "25",
+            "MEAL_REPEATED_QUERY_LIMIT": "3",
+        })
+
+        assert (profiler.mode, profiler.slow_ms, profiler.repeat_limit) == ("headers", 25.0, 3)
+        assert profiler.enabled
+
+    def test_off_by_default(self):
+        """Test that the profiler is opt-in."""
+        assert not SQLProfiler.from_env({}).enabled
+
+    def test_unknown_mode_rejected(self):
+        """Test that a misspelled mode fails loudly."""
+        with pytest.raises(ValueError, match="MEAL_SQL_PROFILER"):
+            SQLProfiler.from_env({"MEAL_SQL_PROFILER": "verbose"})
+
+
+class TestSQLProfilerMiddleware:
+    """Tests for profiling requests."""
+
+    def test_headers_count_statements(self):
+        """Test that headers mode reports the request's statements."""
+        client = profiled_client(SQLProfiler(mode="headers", slow_ms=10_000))
+
+        response = client.get("/meals/1")
+
+        assert response.json() == {"name": "a"}
+        assert response.headers["X-SQL-Count"] == "1"
+        assert float(response.headers["X-SQL-Time-Ms"]) >= 0
+        assert response.headers["X-SQL-Slow"] == "0"
+        assert response.headers["X-SQL-Repeated"] == "0"
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+
+    def test_repeated_statement_flagged(self, caplog):
+        """Test that one statement per row is reported as an N+1 pattern."""
+        client = profiled_client(SQLProfiler(mode="headers", slow_ms=10_000, repeat_limit=3))
+
+        with caplog.at_level(logging.INFO, logger="app.profiler"):
+            response = client.get("/meals")
+
+        assert response.headers["X-SQL-Count"] == "4"
+        assert response.headers["X-SQL-Repeated"] == "1"
+        [record] = caplog.records
+        assert record.levelno == logging.WARNING
+        report = json.loads(record.getMessage())
+        assert report["route"] == "/meals"
+        assert report["repeated"] == [
+            {"sql": "SELECT name FROM meals WHERE id = ?", "count": 3}
+        ]
+
+    def test_slow_statement_logged_with_plan(self, caplog):
+        """Test that statements over the threshold are logged with their query plan."""
+        client = profiled_client(SQLProfiler(mode="log", slow_ms=0))
+
+        with caplog.at_level(logging.INFO, logger="app.profiler"):
+            client.get("/meals/2")
+
+        [record] = caplog.records
+        report = json.loads(record.getMessage())
+        assert record.levelno == logging.WARNING
+        assert report["status"] == 200
+        assert report["route"] == "/meals/{meal_id:int}"
+        [slow] = report["slow"]
+        assert slow["sql"] == "SELECT name FROM meals WHERE id = ?"
+        assert any("USING INTEGER PRIMARY KEY" in line for line in slow["plan"])
+
+    def test_log_mode_logs_every_request(self, caplog):
+        """Test that log mode writes an info record without adding headers."""
+        client = profiled_client(SQLProfiler(mode="log", slow_ms=10_000))
+
+        with caplog.at_level(logging.INFO, logger="app.profiler"):
+            response = client.get("/meals/1")
+
+        assert "X-SQL-Count" not in response.headers
+        [record] = caplog.records
+        assert record.levelno == logging.INFO
+        report = json.loads(record.getMessage())
+        assert report["statements"] == 1
+        assert report["slow"] == [] and report["repeated"] == []
+
+    def test_statements_outside_requests_ignored(self):
+        """Test that statements outside a profiled request run without a profile."""
+        profiler = SQLProfiler(mode="headers", slow_ms=0)
+        engine = create_engine("sqlite:///:memory:")
+        profiler.instrument_engine(engine)
+
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+
+    def test_failed_statement_counted(self):
+        """Test that a statement that raised is still counted."""
+        client = profiled_client(SQLProfiler(mode="headers", slow_ms=10_000))
+
+        response = client.get("/meals/broken")
+
+        assert response.headers["X-SQL-Count"] == "1"
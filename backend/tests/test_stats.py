@@ -0,0 +1,179 @@
+"""
+Tests for the meal name summary table and the stats endpoint.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app import stats
+from app.models import Meal, MealNameStats
+
+
+def summary(db_session) -> dict[str, tuple]:
+    """The summary table as {name_norm: (name, count, first, last, b, l, d)}."""
+    db_session.expire_all()
+    return {
+        row.name_norm: (
+            row.name, row.count, row.first_date, row.last_date,
+            row.breakfast_count, row.lunch_count, row.dinner_count,
+        )
+        for row in db_session.query(MealNameStats)
+    }
+
+
+class TestMealNameStatsTriggers:
+    """Tests for the triggers that keep meal_name_stats current."""
+
+    def test_insert_counts_per_name(self, db_session):
+        """Test that inserts are grouped by normalized name and meal type."""
+        db_session.add_all([
+            Meal(date=date(2024, 1, 15), meal_type="dinner", name="Pasta"),
+            Meal(date=date(2024, 1, 10), meal_type="lunch", name=" pasta"),
+            Meal(date=date(2024, 1, 20), meal_type="dinner", name="PASTA"),
+            Meal(date=date(2024, 1, 15), meal_type="lunch", name="Soup"),
+        ])
+        db_session.commit()
+
+        assert summary(db_session) == {
+            "pasta": ("PASTA", 3, date(2024, 1, 10), date(2024, 1, 20), 0, 1, 2),
+            "soup": ("Soup", 1, date(2024, 1, 15), date(2024, 1, 15), 0, 1, 0),
+        }
+        assert stats.verify(db_session) == []
+
+    def test_update_moves_meal_between_names(self, db_session):
+        """Test that renaming, moving and retyping a meal updates both names."""
+        first = Meal(date=date(2024, 1, 10), meal_type="lunch", name="Pasta")
+        last = Meal(date=date(2024, 1, 20), meal_type="dinner", name="Pasta")
+        db_session.add_all([first, last])
+        db_session.commit()
+
+        last.name = "Pizza"
+        db_session.commit()
+        first.date = date(2024, 1, 5)
+        first.meal_type = "breakfast"
+        db_session.commit()
+
+        assert summary(db_session) == {
+            "pasta": ("Pasta", 1, date(2024, 1, 5), date(2024, 1, 5), 1, 0, 0),
+            "pizza": ("Pizza", 1, date(2024, 1, 20), date(2024, 1, 20), 0, 0, 1),
+        }
+        assert stats.verify(db_session) == []
+
+    def test_delete_recomputes_dates_and_drops_empty_names(self, db_session):
+        """Test that deleting the last meal of a name moves last_date back, then removes it."""
+        meals = [
+            Meal(date=date(2024, 1, day), meal_type="lunch", name=name)
+            for day, name in ((10, "Soup"), (12, "soup"), (14, "SOUP"))
+        ]
+        db_session.add_all(meals)
+        db_session.commit()
+
+        db_session.delete(meals[2])
+        db_session.commit()
+        assert summary(db_session)["soup"] == (
+            "soup", 2, date(2024, 1, 10), date(2024, 1, 12), 0, 2, 0
+        )
+
+        db_session.delete(meals[0])
+        db_session.delete(meals[1])
+        db_session.commit()
+        assert summary(db_session) == {}
+
+    def test_bulk_api_writes_stay_consistent(self, client, db_session):
+        """Test that batch upserts, range copies and imports keep the summary exact."""
+        client.post("/api/meals/batch", json={"items": [
+            {"date": "2024-01-15", "meal_type": "lunch", "name": "Soup"},
+            {"date": "2024-01-16", "meal_type": "lunch", "name": "Stew"},
+        ]})
+        client.post("/api/meals/batch", json={"on_conflict": "overwrite", "items": [
+            {"date": "2024-01-15", "meal_type": "lunch", "name": "Stew"},
+        ]})
+        client.post("/api/meals/copy-range", json={
+            "source_start": "2024-01-15", "source_end": "2024-01-16",
+            "target_start": "2024-01-22",
+        })
+        client.put("/api/meals/slot/2024-01-23/lunch", json={"name": "Curry"})
+        client.post("/api/meals/import", files={
+            "file": ("meals.csv", b"date,meal_type,name\n2024-01-24,dinner,stew\n")
+        })
+
+        assert summary(db_session) == {
+            "curry": ("Curry", 1, date(2024, 1, 23), date(2024, 1, 23), 0, 1, 0),
+            "stew": ("stew", 4, date(2024, 1, 15), date(2024, 1, 24), 0, 3, 1),
+        }
+        assert stats.verify(db_session) == []
+
+    def test_triggers_use_name_index(self, db_session):
+        """Test that the date lookups seek the expression index instead of scanning."""
+        plan = db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT max(date) FROM meals WHERE lower(trim(name)) = 'soup'"
+        ).all()
+        assert "ix_meals_name_norm_date" in plan[0][3]
+
+
+class TestRebuild:
+    """Tests for rebuilding and verifying the summary."""
+
+    def test_verify_and_rebuild_fix_drift(self, db_session):
+        """Test that a tampered summary is reported and then rebuilt."""
+        db_session.add_all([
+            Meal(date=date(2024, 1, 15), meal_type="lunch", name="Soup"),
+            Meal(date=date(2024, 1, 16), meal_type="lunch", name="Stew"),
+        ])
+        db_session.commit()
+        db_session.execute(text("UPDATE meal_name_stats SET count = 9 WHERE name_norm = 'soup'"))
+        db_session.execute(text("DELETE FROM meal_name_stats WHERE name_norm = 'stew'"))
+        db_session.commit()
+
+        assert stats.verify(db_session) == ["soup", "stew"]
+        assert stats.rebuild(db_session) == 2
+        assert stats.verify(db_session) == []
+        assert summary(db_session)["soup"][1] == 1
+
+
+class TestMealStatsApi:
+    """Tests for GET /api/stats/meals endpoint."""
+
+    @pytest.fixture
+    def history(self, db_session):
+        db_session.add_all([
+            Meal(date=date(2020, 1, day), meal_type="dinner", name="Pasta")
+            for day in range(1, 4)
+        ] + [
+            Meal(date=date(2020, 2, 1), meal_type="lunch", name="Soup"),
+            Meal(date=date.today(), meal_type="lunch", name="Salad"),
+            Meal(date=date.today(), meal_type="dinner", name="salad"),
+        ])
+        db_session.commit()
+
+    def test_most_eaten_first(self, client, history):
+        """Test that meals are ordered by count by default."""
+        response = client.get("/api/stats/meals")
+        assert response.status_code == 200
+        assert [(m["name"], m["count"]) for m in response.json()] == [
+            ("Pasta", 3), ("salad", 2), ("Soup", 1)
+        ]
+        pasta = response.json()[0]
+        assert (pasta["first_date"], pasta["last_date"]) == ("2020-01-01", "2020-01-03")
+        assert (pasta["breakfast_count"], pasta["lunch_count"], pasta["dinner_count"]) == (0, 0, 3)
+
+    def test_last_eaten_by_name(self, client, history):
+        """Test looking up when a meal was last planned."""
+        response = client.get("/api/stats/meals?name=SOUP")
+        assert [(m["name"], m["last_date"]) for m in response.json()] == [("Soup", "2020-02-01")]
+
+    def test_not_eaten_for_days(self, client, history):
+        """Test listing meals not planned for a while, most recent first."""
+        response = client.get("/api/stats/meals?not_eaten_for_days=30&sort=last_date")
+        assert [m["name"] for m in response.json()] == ["Soup", "Pasta"]
+
+    def test_reads_only_the_summary(self, client, history, db_session):
+        """Test that the endpoint answers from the summary table."""
+        db_session.execute(text("UPDATE meal_name_stats SET count = 42 WHERE name_norm = 'soup'"))
+        db_session.commit()
+        assert client.get("/api/stats/meals?limit=1").json()[0]["name"] == "Soup"
+
+    def test_invalid_sort_fails(self, client):
+        """Test that an unknown sort returns 422."""
+        assert client.get("/api/stats/meals?sort=random").status_code == 422
@@ -0,0 +1,125 @@
+"""
+Tests for noticing writes committed by other processes.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.broadcast import change_broadcaster
+from app.watcher import ExternalWriteWatcher, write_watcher
+
+WEEK = {"start_date": "2024-01-15", "end_date": "2024-01-21"}
+INSERT_LUNCH = "INSERT INTO meals (date, meal_type, name) VALUES ('2024-01-15', 'lunch', 'A')"
+
+
+def write_elsewhere(db_session, statement: str) -> None:
+    """Commit plain SQL that bypasses the change feed, like another worker would."""
+    db_session.execute(text(statement))
+    db_session.commit()
+
+
+@pytest.fixture
+def watching(db_session, monkeypatch):
+    """Turn the app's watcher on, starting from the test database's version."""
+    monkeypatch.setattr(write_watcher, "enabled", True)
+    monkeypatch.setattr(write_watcher, "interval", 0.0)
+    write_watcher.prime(db_session)
+    return write_watcher
+
+
+class TestExternalWriteWatcher:
+    """Tests for ExternalWriteWatcher."""
+
+    def test_from_env(self):
+        """Test that several workers turn watching on unless overridden."""
+        assert not ExternalWriteWatcher.from_env({}).enabled
+        assert ExternalWriteWatcher.from_env({"WEB_CONCURRENCY": "4"}).enabled
+        assert not ExternalWriteWatcher.from_env({
+            "WEB_CONCURRENCY": "4", "MEAL_WATCH_EXTERNAL_WRITES": "false",
+        }).enabled
+        watcher = ExternalWriteWatcher.from_env({
+            "MEAL_WATCH_EXTERNAL_WRITES": "true", "MEAL_WATCH_INTERVAL": "0.5",
+        })
+        assert watcher.enabled and watcher.interval == 0.5
+
+    def test_disabled_watcher_reads_nothing(self, db_session):
+        """Test that a disabled watcher never queries the database."""
+        watcher = ExternalWriteWatcher(enabled=False)
+        write_elsewhere(db_session, INSERT_LUNCH)
+
+        watcher.check(db_session)
+
+        assert watcher.seen_version == 0 and watcher.refreshes == 0
+
+    def test_interval_limits_checks(self, db_session):
+        """Test that checks within the interval are skipped."""
+        watcher = ExternalWriteWatcher(enabled=True, interval=60.0)
+        watcher.prime(db_session)
+        watcher.check(db_session)
+        write_elsewhere(db_session, INSERT_LUNCH)
+
+        watcher.check(db_session)
+
+        assert watcher.refreshes == 0
+
+
+class TestCoherenceAcrossProcesses:
+    """Tests for in-memory answers after writes that bypass this process."""
+
+    def test_unwatched_cache_misses_external_update(self, client, db_session, sample_meal_data):
+        """Test that without watching a cached week keeps serving what it had."""
+        client.post("/api/meals", json=sample_meal_data)
+        client.get("/api/meals", params=WEEK)
+        write_elsewhere(db_session, "UPDATE meals SET name = 'Waffles'")
+
+        stale = client.get("/api/meals", params=WEEK).json()
+        assert stale[0]["name"] == "Pancakes with maple syrup"
+
+    def test_watched_range_sees_external_update(
+        self, client, db_session, sample_meal_data, watching
+    ):
+        """Test that a cached week and its ETag follow a write made elsewhere."""
+        client.post("/api/meals", json=sample_meal_data)
+        etag = client.get("/api/meals", params=WEEK).headers["etag"]
+        write_elsewhere(db_session, "UPDATE meals SET name = 'Waffles'")
+
+        response = client.get("/api/meals", params=WEEK, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json()[0]["name"] == "Waffles"
+        assert watching.refreshes >= 1
+
+    def test_watched_range_sees_external_delete(
+        self, client, db_session, sample_meal_data, watching
+    ):
+        """Test that a meal deleted elsewhere disappears from a cached week."""
+        client.post("/api/meals", json=sample_meal_data)
+        client.get("/api/meals", params=WEEK)
+        write_elsewhere(db_session, "DELETE FROM meals")
+
+        assert client.get("/api/meals", params=WEEK).json() == []
+
+    def test_suggestions_follow_external_writes(self, client, db_session, watching):
+        """Test that autocomplete picks up ingredients written elsewhere."""
+        write_elsewhere(
+            db_session,
+            "INSERT INTO meals (date, meal_type, name, ingredients)"
+            " VALUES ('2024-01-15', 'lunch', 'Soup', '[\"Leek\"]')",
+        )
+        assert client.get("/api/ingredients/suggest", params={"prefix": "le"}).json() == [
+            {"ingredient": "leek", "count": 1}
+        ]
+
+        write_elsewhere(db_session, "DELETE FROM meals")
+        assert client.get("/api/ingredients/suggest", params={"prefix": "le"}).json() == []
+
+    def test_streams_reset_for_external_writes(self, db_session, watching, monkeypatch):
+        """Test that days written elsewhere are sent to the change streams as resets."""
+        reset = []
+        monkeypatch.setattr(change_broadcaster, "reset_days", reset.append)
+        write_elsewhere(db_session, INSERT_LUNCH)
+
+        watching.check(db_session)
+
+        assert reset == [{date(2024, 1, 15)}]
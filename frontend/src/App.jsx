@@ -4,7 +4,7 @@ import MealModal from './components/MealModal'
 import Toast from './components/Toast'
 import LanguageSwitcher from './components/LanguageSwitcher'
 import { useTranslation } from './i18n/LanguageContext'
-import { getMeals, createMeal, updateMeal, deleteMeal, copyMeal } from './api/meals'
+import { getMeals, createMeal, updateMeal, deleteMeal, copyMeal, subscribeToMealChanges } from './api/meals'
 
 // Helper functions for date manipulation
 function getWeekStart(date) {
@@ -70,6 +70,24 @@ export default function App() {
         fetchMeals()
     }, [fetchMeals])
 
+    // Refetch quietly when meals of this week change, e.g. on another device.
+    // A burst of changes (a copied week) triggers a single refetch.
+    useEffect(() => {
+        const start = formatDate(weekStart)
+        const end = formatDate(weekEnd)
+        let timer
+        const unsubscribe = subscribeToMealChanges(start, end, () => {
+            clearTimeout(timer)
+            timer = setTimeout(() => {
+                getMeals(start, end).then(setMeals).catch(() => {})
+            }, 200)
+        })
+        return () => {
+            clearTimeout(timer)
+            unsubscribe()
+        }
+    }, [weekStart.getTime(), weekEnd.getTime()])
+
     // Navigation
     const goToPreviousWeek = () => {
         const prev = new Date(currentDate)
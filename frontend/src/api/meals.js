@@ -13,6 +13,27 @@ export async function getMeals(startDate, endDate) {
     return response.json();
 }
 
+/**
+ * Subscribe to changes of the meals in a date range, e.g. edits made on
+ * another device. onChange(type, change) is called for every created,
+ * updated or deleted meal, and with type 'reset' when changes were missed
+ * and the range should be fetched again. Returns a function that closes
+ * the subscription.
+ */
+export function subscribeToMealChanges(startDate, endDate, onChange) {
+    if (typeof EventSource === 'undefined') {
+        return () => {};
+    }
+    const source = new EventSource(
+        `${API_BASE}/meals/stream?start_date=${startDate}&end_date=${endDate}`
+    );
+    const handle = (event) => onChange(event.type, event.data ? JSON.parse(event.data) : null);
+    for (const type of ['created', 'updated', 'deleted', 'reset']) {
+        source.addEventListener(type, handle);
+    }
+    return () => source.close();
+}
+
 /**
  * Create a new meal
  */
@@ -88,3 +109,16 @@ export async function searchMealsByIngredient(ingredient) {
     }
     return response.json();
 }
+
+/**
+ * Suggest existing ingredients for a typed prefix
+ */
+export async function suggestIngredients(prefix) {
+    const response = await fetch(
+        `${API_BASE}/ingredients/suggest?prefix=${encodeURIComponent(prefix)}`
+    );
+    if (!response.ok) {
+        throw new Error('Failed to suggest ingredients');
+    }
+    return response.json();
+}
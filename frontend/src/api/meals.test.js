@@ -1,10 +1,10 @@
 /**
  * Tests for the meals API functions
  */
-import { describe, it, expect, beforeAll, afterAll, afterEach } from 'vitest'
+import { describe, it, expect, vi, beforeAll, afterAll, afterEach } from 'vitest'
 import { server } from '../test/mocks/server'
 import { resetMeals } from '../test/mocks/handlers'
-import { getMeals, createMeal, updateMeal, deleteMeal, copyMeal } from './meals'
+import { getMeals, createMeal, updateMeal, deleteMeal, copyMeal, subscribeToMealChanges } from './meals'
 
 beforeAll(() => server.listen({ onUnhandledRequest: 'error' }))
 afterAll(() => server.close())
@@ -147,3 +147,50 @@ describe('copyMeal', () => {
         await expect(copyMeal(1, '2024-01-15', 'lunch')).rejects.toThrow('already exists')
     })
 })
+
+describe('subscribeToMealChanges', () => {
+    class FakeEventSource {
+        static last = null
+
+        constructor(url) {
+            this.url = url
+            this.listeners = {}
+            this.closed = false
+            FakeEventSource.last = this
+        }
+
+        addEventListener(type, listener) {
+            this.listeners[type] = listener
+        }
+
+        close() {
+            this.closed = true
+        }
+    }
+
+    afterEach(() => vi.unstubAllGlobals())
+
+    it('should report changes in the range until unsubscribed', () => {
+        vi.stubGlobal('EventSource', FakeEventSource)
+        const onChange = vi.fn()
+
+        const unsubscribe = subscribeToMealChanges('2024-01-15', '2024-01-21', onChange)
+        const source = FakeEventSource.last
+        source.listeners.created({ type: 'created', data: '{"id":7,"date":"2024-01-16","meal_type":"lunch"}' })
+        source.listeners.reset({ type: 'reset', data: '' })
+        unsubscribe()
+
+        expect(source.url).toBe('/api/meals/stream?start_date=2024-01-15&end_date=2024-01-21')
+        expect(onChange).toHaveBeenNthCalledWith(1, 'created', { id: 7, date: '2024-01-16', meal_type: 'lunch' })
+        expect(onChange).toHaveBeenNthCalledWith(2, 'reset', null)
+        expect(source.closed).toBe(true)
+    })
+
+    it('should do nothing without EventSource support', () => {
+        vi.stubGlobal('EventSource', undefined)
+
+        const unsubscribe = subscribeToMealChanges('2024-01-15', '2024-01-21', vi.fn())
+
+        expect(() => unsubscribe()).not.toThrow()
+    })
+})
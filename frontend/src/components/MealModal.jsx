@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import DatePicker from './DatePicker'
 import { useTranslation } from '../i18n/LanguageContext'
-import { searchMealsByIngredient } from '../api/meals'
+import { searchMealsByIngredient, suggestIngredients } from '../api/meals'
 
 const MEAL_EMOJIS = {
     breakfast: '🌅',
@@ -19,6 +19,7 @@ export default function MealModal({ date, mealType, meal, onClose, onSave, onDel
     const [name, setName] = useState(meal?.name || '')
     const [ingredients, setIngredients] = useState(meal?.ingredients || [])
     const [ingredientInput, setIngredientInput] = useState('')
+    const [ingredientSuggestions, setIngredientSuggestions] = useState([])
     const [copyDate, setCopyDate] = useState('')
     const [copyMealType, setCopyMealType] = useState('breakfast')
     const [showDatePicker, setShowDatePicker] = useState(false)
@@ -58,6 +59,27 @@ export default function MealModal({ date, mealType, meal, onClose, onSave, onDel
         return () => clearTimeout(timer)
     }, [searchTerm])
 
+    // Suggest existing ingredients while typing so spellings stay consistent
+    useEffect(() => {
+        const prefix = ingredientInput.trim()
+        if (!prefix) {
+            setIngredientSuggestions([])
+            return
+        }
+
+        const timer = setTimeout(async () => {
+            try {
+                const suggestions = await suggestIngredients(prefix)
+                setIngredientSuggestions(suggestions.map(s => s.ingredient))
+            } catch (error) {
+                console.error('Ingredient suggestions failed:', error)
+                setIngredientSuggestions([])
+            }
+        }, 100)
+
+        return () => clearTimeout(timer)
+    }, [ingredientInput])
+
     const handleSelectSearchResult = (result) => {
         setName(result.name)
         setIngredients(result.ingredients || [])
@@ -168,7 +190,14 @@ export default function MealModal({ date, mealType, meal, onClose, onSave, onDel
                                     onKeyDown={handleIngredientKeyDown}
                                     placeholder={t('addIngredientPlaceholder')}
                                     disabled={ingredients.length >= MAX_INGREDIENTS}
+                                    list="ingredient-suggestions"
+                                    autoComplete="off"
                                 />
+                                <datalist id="ingredient-suggestions">
+                                    {ingredientSuggestions.map(suggestion => (
+                                        <option key={suggestion} value={suggestion} />
+                                    ))}
+                                </datalist>
                                 <button
                                     type="button"
                                     className="btn btn--outline"
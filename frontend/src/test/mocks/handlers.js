@@ -183,4 +183,23 @@ export const handlers = [
 
         return HttpResponse.json(matchingMeals)
     }),
+
+    // GET /api/ingredients/suggest
+    http.get('/api/ingredients/suggest', ({ request }) => {
+        const url = new URL(request.url)
+        const prefix = (url.searchParams.get('prefix') || '').toLowerCase().trim()
+
+        const counts = {}
+        meals.forEach(meal => {
+            new Set((meal.ingredients || []).map(ing => ing.toLowerCase().trim()))
+                .forEach(ing => { counts[ing] = (counts[ing] || 0) + 1 })
+        })
+        const suggestions = Object.entries(counts)
+            .filter(([ingredient]) => prefix && ingredient.startsWith(prefix))
+            .sort((a, b) => b[1] - a[1] || a[0].localeCompare(b[0]))
+            .slice(0, 10)
+            .map(([ingredient, count]) => ({ ingredient, count }))
+
+        return HttpResponse.json(suggestions)
+    }),
 ]